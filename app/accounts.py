@@ -0,0 +1,57 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from .ratelimit import TokenBucket
+
+# Password hashing runs on a small dedicated pool (hashlib releases the GIL while it works), so a
+# burst of sign-ins costs at most PASSWORD_HASH_WORKERS cores and never holds the event loop.
+# Work beyond the pool and its queue is refused instead of piling up behind it.
+_pool = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+_slots = threading.BoundedSemaphore(settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_QUEUE)
+
+SIGNIN_BY_USERNAME = TokenBucket("signin:username", settings.SIGNIN_USERNAME_BURST, settings.SIGNIN_USERNAME_PER_MINUTE)
+SIGNIN_BY_IP = TokenBucket("signin:ip", settings.SIGNIN_IP_BURST, settings.SIGNIN_IP_PER_MINUTE)
+SIGNUP_BY_IP = TokenBucket("signup:ip", settings.SIGNUP_IP_BURST, settings.SIGNUP_IP_PER_MINUTE)
+
+
+class PasswordHashingBusy(Exception):
+    pass
+
+
+def _submit(function, *args):
+    if not _slots.acquire(blocking=False):
+        raise PasswordHashingBusy("Too many sign-in attempts in progress, try again shortly")
+    try:
+        future = _pool.submit(function, *args)
+    except BaseException:
+        _slots.release()
+        raise
+    future.add_done_callback(lambda _: _slots.release())
+    return future
+
+
+def _verify(password, encoded):
+    if encoded is None:
+        # Hash anyway, so an unknown username takes as long as a wrong password
+        make_password(password)
+        return False
+    return check_password(password, encoded)
+
+
+def hash_password(password):
+    return _submit(make_password, password).result()
+
+
+async def ahash_password(password):
+    return await asyncio.wrap_future(_submit(make_password, password))
+
+
+# Pass encoded=None for an unknown user
+def verify_password(password, encoded):
+    return _submit(_verify, password, encoded).result()
+
+
+async def averify_password(password, encoded):
+    return await asyncio.wrap_future(_submit(_verify, password, encoded))
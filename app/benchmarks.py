@@ -0,0 +1,282 @@
+import random
+import threading
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from urllib.parse import urlencode
+from django.core.servers.basehttp import ThreadedWSGIServer
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.test import Client
+from django.test.testcases import QuietWSGIRequestHandler
+from django.test.utils import CaptureQueriesContext
+from .loadgen import percentile, run_load
+from .models import Address, Company, Customer, FireExtinguisher, Order, OrderItem
+from .rollups import refresh_day
+from .tokens import issue_token
+
+# Rows seeded per customer; --scale sets the number of customers
+ADDRESSES_PER_CUSTOMER = 2
+PRODUCTS_PER_CUSTOMER = 0.2
+ORDERS_PER_CUSTOMER = 5
+MAX_ITEMS_PER_ORDER = 4
+SEED_BATCH_SIZE = 1000
+ORDER_HISTORY_DAYS = 90
+
+CITIES = [
+    ("Athens", "Attica", "105"),
+    ("Thessaloniki", "Central Macedonia", "546"),
+    ("Patras", "Achaea", "262"),
+    ("Heraklion", "Crete", "712"),
+    ("Larissa", "Thessaly", "412"),
+    ("Volos", "Magnesia", "383"),
+]
+STREETS = ["Ermou", "Stadiou", "Panepistimiou", "Egnatia", "Tsimiski", "Agiou Nikolaou", "Kifisias", "Syngrou"]
+NAME_WORDS = ["Aegean", "Olympus", "Delta", "Hellas", "Atlas", "Pyrsos", "Safeguard", "Nova", "Poseidon", "Kronos"]
+NAME_SUFFIXES = ["Logistics", "Hotels", "Shipping", "Foods", "Construction", "Retail", "Clinics", "Schools"]
+
+# Throughput falls and latency and query counts rise when things get worse
+HIGHER_IS_WORSE = ("p50_ms", "p95_ms", "queries")
+LOWER_IS_WORSE = ("requests_per_second",)
+
+
+def _choice_values(choices):
+    return [value for value, _ in choices]
+
+
+def _bulk_create(model, objects):
+    manager = getattr(model, "all_objects", model.objects)
+    return manager.bulk_create(objects, batch_size=SEED_BATCH_SIZE)
+
+
+# Fill an empty database with `scale` customers and proportional addresses, products, orders and order
+# items, generated from a fixed seed so every run measures the same data
+def seed(scale, seed=0, today=None):
+    rng = random.Random(seed)
+    today = today or date.today()
+
+    company = Company.objects.create(name="Benchmark Fire Safety", email="benchmark@example.com")
+
+    addresses = _bulk_create(Address, [
+        Address(
+            street=f"{rng.randint(1, 200)} {rng.choice(STREETS)}",
+            city=city,
+            state=state,
+            postal_code=f"{prefix}{rng.randint(10, 99)}",
+            country="GR",
+        )
+        for city, state, prefix in (rng.choice(CITIES) for _ in range(scale * ADDRESSES_PER_CUSTOMER))
+    ])
+
+    customers = _bulk_create(Customer, [
+        Customer(
+            name=f"{rng.choice(NAME_WORDS)} {rng.choice(NAME_SUFFIXES)} {number}",
+            contact_email=f"customer{number}@example.com",
+            address=addresses[2 * number],
+            billing_address=addresses[2 * number],
+            shipping_address=addresses[2 * number + 1] if rng.random() < 0.5 else None,
+            account_status="active" if rng.random() < 0.9 else "inactive",
+            company=company,
+        )
+        for number in range(scale)
+    ])
+
+    types = _choice_values(FireExtinguisher.TYPE_CHOICES)
+    products = _bulk_create(FireExtinguisher, [
+        FireExtinguisher(
+            name=f"{fire_type} extinguisher {capacity}kg",
+            fire_extinguisher_type=fire_type,
+            fire_class=rng.choice(_choice_values(FireExtinguisher.FIRE_CLASS_CHOICES)),
+            certification=rng.choice(_choice_values(FireExtinguisher.CERTIFICATION_CHOICES)),
+            standards_compliance=rng.choice(_choice_values(FireExtinguisher.STANDARDS_COMPLIANCE_CHOICES)),
+            capacity=capacity,
+            inspection_date=today - timedelta(days=rng.randint(0, 400)),
+            service_date=today - timedelta(days=rng.randint(0, 400)),
+            expiry_date=today + timedelta(days=rng.randint(-30, 1500)),
+            manufacture_date=today - timedelta(days=rng.randint(100, 2000)),
+            inventory=rng.randint(0, 500),
+            batch_number=f"BENCH-{number:06d}",
+            warranty_period=rng.choice([12, 24, 36, 60]),
+            company=company,
+        )
+        for number, fire_type, capacity in (
+            (number, rng.choice(types), rng.choice([1, 2, 3, 6, 9, 12]))
+            for number in range(max(1, int(scale * PRODUCTS_PER_CUSTOMER)))
+        )
+    ])
+    prices = {product.id: Decimal(rng.randint(2000, 20000)) / 100 for product in products}
+
+    statuses = _choice_values(Order.STATUS_CHOICES)
+    orders = _bulk_create(Order, [
+        Order(customer=customer, status=rng.choice(statuses), total_amount=Decimal("0.00"), company=company)
+        for customer in customers
+        for _ in range(ORDERS_PER_CUSTOMER)
+    ])
+    # order_date is auto_now_add, so spread the history with an update that skips pre_save
+    for order in orders:
+        order.order_date = today - timedelta(days=rng.randint(0, ORDER_HISTORY_DAYS - 1))
+    Order.all_objects.bulk_update(orders, ["order_date"], batch_size=SEED_BATCH_SIZE)
+
+    items = []
+    for order in orders:
+        for product in rng.sample(products, min(len(products), rng.randint(1, MAX_ITEMS_PER_ORDER))):
+            items.append(OrderItem(
+                order=order, fire_extinguisher=product, quantity=rng.randint(1, 10), price_per_unit=prices[product.id]
+            ))
+    _bulk_create(OrderItem, items)
+    Order.all_objects.refresh_totals()
+
+    for offset in range(ORDER_HISTORY_DAYS):
+        refresh_day(today - timedelta(days=offset))
+
+    return {
+        # Requests run as an admin of the seeded company, so they take the tenant-scoped paths
+        "token": issue_token(0, "Company Admin", company.id),
+        "address_id": addresses[len(addresses) // 2].id,
+        "customer_id": customers[len(customers) // 2].id,
+        "order_id": orders[len(orders) // 2].id,
+        "month": today.strftime("%Y-%m"),
+        "from": (today - timedelta(days=ORDER_HISTORY_DAYS - 1)).isoformat(),
+        "to": today.isoformat(),
+        "counts": {
+            "addresses": len(addresses),
+            "customers": len(customers),
+            "fire_extinguishers": len(products),
+            "orders": len(orders),
+            "order_items": len(items),
+        },
+    }
+
+
+# name -> (path, query parameters); "{...}" placeholders are filled from the ids returned by seed()
+SCENARIOS = {
+    "addresses_page": ("/api/addresses/", {"limit": 50}),
+    "address_detail": ("/api/address/{address_id}/", {}),
+    "customers_page": ("/api/customers/", {"limit": 50}),
+    "customer_detail": ("/api/customers/{customer_id}/", {}),
+    "orders_page": ("/api/orders/", {"limit": 50}),
+    "order_detail": ("/api/orders/{order_id}/", {}),
+    "orders_export": ("/api/orders/export/", {"month": "{month}"}),
+    "compliance_sweep": ("/api/compliance/sweep/", {"days": 30}),
+    "sales_report": ("/api/reports/sales/", {"from": "{from}", "to": "{to}", "group_by": "type"}),
+    "search": ("/api/search/", {"q": "aeg"}),
+    "health": ("/health", {}),
+}
+
+
+def resolve(scenarios, context):
+    return {
+        name: (path.format(**context), {key: str(value).format(**context) for key, value in params.items()})
+        for name, (path, params) in scenarios.items()
+    }
+
+
+def _auth_headers(token):
+    return {"Authorization": f"Bearer {token}"} if token else {}
+
+
+def _get(client, path, params):
+    response = client.get(path, params)
+    if response.status_code >= 400:
+        raise RuntimeError(f"GET {path} answered {response.status_code}")
+    # Streaming responses only do their work while being consumed
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    return response
+
+
+# Time every scenario in-process through the test client; the query count comes from one extra
+# request so recording SQL does not skew the timings
+def run_client(scenarios, iterations, warmup=10, token=None):
+    client, results = Client(headers=_auth_headers(token)), {}
+    for name, (path, params) in scenarios.items():
+        for _ in range(warmup):
+            _get(client, path, params)
+        latencies = []
+        started = time.perf_counter()
+        for _ in range(iterations):
+            request_started = time.perf_counter()
+            _get(client, path, params)
+            latencies.append(time.perf_counter() - request_started)
+        elapsed = time.perf_counter() - started
+        with CaptureQueriesContext(connection) as queries:
+            _get(client, path, params)
+
+        latencies.sort()
+        results[name] = {
+            "requests": iterations,
+            "requests_per_second": iterations / elapsed if elapsed else 0.0,
+            "p50_ms": percentile(latencies, 0.50) * 1000,
+            "p95_ms": percentile(latencies, 0.95) * 1000,
+            "p99_ms": percentile(latencies, 0.99) * 1000,
+            "queries": len(queries),
+        }
+    return results
+
+
+# Responses go out as written rather than waiting on Nagle's algorithm for the client's ACK, as a
+# production server would send them
+class NoDelayRequestHandler(QuietWSGIRequestHandler):
+    disable_nagle_algorithm = True
+
+
+# Serve the project over HTTP on a free local port from a background thread
+class LocalServer:
+    def __init__(self, host="127.0.0.1"):
+        self.host = host
+
+    def __enter__(self):
+        self.server = ThreadedWSGIServer((self.host, 0), NoDelayRequestHandler, allow_reuse_address=False)
+        self.server.set_app(get_wsgi_application())
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return f"http://{self.host}:{self.server.server_address[1]}"
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+
+HTTP_METRICS = ("requests", "concurrency", "requests_per_second", "p50_ms", "p95_ms", "p99_ms")
+
+
+def run_http(base_url, scenarios, requests, concurrency, token=None):
+    results = {}
+    for name, (path, params) in scenarios.items():
+        query = urlencode(params)
+        url = f"{base_url}{path}{'?' + query if query else ''}"
+        result = run_load(url, requests, concurrency, _auth_headers(token))
+        if result["errors"]:
+            raise RuntimeError(f"{name}: {result['errors']} of {requests} requests failed")
+        results[name] = {key: result[key] for key in HTTP_METRICS}
+    return results
+
+
+# Compare a run against the recorded baseline; a metric regresses when it is worse by more than
+# `threshold` (relative) and by more than `min_delta_ms` of time per request, so sub-millisecond noise
+# passes. Query counts are deterministic and may never grow.
+def compare(results, baseline, threshold, min_delta_ms=1.0):
+    regressions = []
+    for mode, scenarios in results.items():
+        for name, current in scenarios.items():
+            previous = baseline.get(mode, {}).get(name)
+            if previous is None:
+                continue
+            for metric in HIGHER_IS_WORSE:
+                if metric not in current or metric not in previous:
+                    continue
+                was, now = previous[metric], current[metric]
+                if metric == "queries":
+                    regressed = now > was
+                else:
+                    regressed = now > was * (1 + threshold) and now - was > min_delta_ms
+                if regressed:
+                    regressions.append(f"{mode}/{name}: {metric} {was:g} -> {now:g}")
+            for metric in LOWER_IS_WORSE:
+                if metric in current and metric in previous:
+                    was, now = previous[metric], current[metric]
+                    if now < was * (1 - threshold) and 1000 / max(now, 1e-9) - 1000 / was > min_delta_ms:
+                        regressions.append(f"{mode}/{name}: {metric} {was:g} -> {now:g}")
+    return regressions
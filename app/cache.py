@@ -0,0 +1,115 @@
+import threading
+import time
+from collections import Counter
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+ADDRESS_KEY = "address:{}"
+ADDRESS_LIST_VERSION_KEY = "addresses:list:version"
+ADDRESS_LIST_KEY = "addresses:list:{}:{}:{}"
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _record(outcome):
+    with _stats_lock:
+        _stats[outcome] += 1
+
+
+def stats():
+    with _stats_lock:
+        hits, misses = _stats["hits"], _stats["misses"]
+    lookups = hits + misses
+    return {"hits": hits, "misses": misses, "hit_ratio": hits / lookups if lookups else 0.0}
+
+
+def _read_through(key, loader):
+    value = cache.get(key)
+    if value is not None:
+        _record("hits")
+        return value
+
+    _record("misses")
+    value = loader()
+    if value is not None:
+        cache.set(key, value, settings.ADDRESS_CACHE_TIMEOUT)
+    return value
+
+
+async def _aread_through(key, loader):
+    value = await cache.aget(key)
+    if value is not None:
+        _record("hits")
+        return value
+
+    _record("misses")
+    value = await loader()
+    if value is not None:
+        await cache.aset(key, value, settings.ADDRESS_CACHE_TIMEOUT)
+    return value
+
+
+# Every list page is keyed under the current version, so a single write drops all pages at once.
+# Versions start from a timestamp so an evicted counter can never bring back stale pages.
+def _list_version():
+    version = cache.get(ADDRESS_LIST_VERSION_KEY)
+    if version is None:
+        cache.add(ADDRESS_LIST_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(ADDRESS_LIST_VERSION_KEY, 0)
+    return version
+
+
+async def _alist_version():
+    version = await cache.aget(ADDRESS_LIST_VERSION_KEY)
+    if version is None:
+        await cache.aadd(ADDRESS_LIST_VERSION_KEY, time.time_ns(), None)
+        version = await cache.aget(ADDRESS_LIST_VERSION_KEY, 0)
+    return version
+
+
+def cached_address(address_id, loader):
+    return _read_through(ADDRESS_KEY.format(address_id), loader)
+
+
+def cached_address_page(after, limit, loader):
+    return _read_through(ADDRESS_LIST_KEY.format(_list_version(), after, limit), loader)
+
+
+async def acached_address(address_id, loader):
+    return await _aread_through(ADDRESS_KEY.format(address_id), loader)
+
+
+async def acached_address_page(after, limit, loader):
+    return await _aread_through(ADDRESS_LIST_KEY.format(await _alist_version(), after, limit), loader)
+
+
+def _bump_list_version():
+    try:
+        cache.incr(ADDRESS_LIST_VERSION_KEY)
+    except ValueError:
+        cache.add(ADDRESS_LIST_VERSION_KEY, time.time_ns(), None)
+
+
+# Invalidation runs once the surrounding transaction commits, so a concurrent reader cannot
+# re-cache the old row between the invalidation and the commit.
+def invalidate_address(*address_ids):
+    def invalidate():
+        cache.delete_many([ADDRESS_KEY.format(address_id) for address_id in address_ids])
+        _bump_list_version()
+
+    transaction.on_commit(invalidate)
+
+
+def invalidate_address_list():
+    transaction.on_commit(_bump_list_version)
+
+
+# The async views write in autocommit mode, so there is no transaction to wait for
+async def ainvalidate_address(*address_ids):
+    await cache.adelete_many([ADDRESS_KEY.format(address_id) for address_id in address_ids])
+    try:
+        await cache.aincr(ADDRESS_LIST_VERSION_KEY)
+    except ValueError:
+        await cache.aadd(ADDRESS_LIST_VERSION_KEY, time.time_ns(), None)
@@ -0,0 +1,178 @@
+import csv
+import json
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from django.db import connection, transaction
+from .models import FireExtinguisher
+
+IMPORT_FORMATS = ("csv", "ndjson")
+IMPORT_BATCH_SIZE = 1000
+
+# Allowed choice values, computed once instead of per row
+CHOICE_VALUES = {
+    "fire_extinguisher_type": frozenset(value for value, _ in FireExtinguisher.TYPE_CHOICES),
+    "fire_class": frozenset(value for value, _ in FireExtinguisher.FIRE_CLASS_CHOICES),
+    "certification": frozenset(value for value, _ in FireExtinguisher.CERTIFICATION_CHOICES),
+    "standards_compliance": frozenset(value for value, _ in FireExtinguisher.STANDARDS_COMPLIANCE_CHOICES),
+}
+TEXT_FIELDS = {"name": 255, "batch_number": 100}
+INTEGER_FIELDS = ("capacity", "inventory", "warranty_period")
+DATE_FIELDS = ("inspection_date", "service_date", "expiry_date", "manufacture_date")
+REQUIRED_FIELDS = (*TEXT_FIELDS, *CHOICE_VALUES, *INTEGER_FIELDS, *DATE_FIELDS)
+# Everything but the upsert key is overwritten when a batch number already exists
+UPDATE_FIELDS = [field for field in (*REQUIRED_FIELDS, "description", "discount") if field != "batch_number"]
+COPY_FIELDS = ["company_id", "batch_number", *UPDATE_FIELDS]
+CENTS = Decimal("0.01")
+MAX_DISCOUNT = Decimal("1000")
+# PositiveIntegerField's upper bound on every backend
+MAX_INTEGER = 2147483647
+# Field -> accepted JSON types; lists, objects and booleans are row errors, never str()-ed
+SCALAR_TYPES = {field: (str, int) for field in (*REQUIRED_FIELDS, "description")}
+SCALAR_TYPES["discount"] = (str, int, float)
+
+
+def read_csv(file):
+    for line, row in enumerate(csv.DictReader(file), start=2):
+        yield line, row
+
+
+def read_ndjson(file):
+    for line, text in enumerate(file, start=1):
+        if not text.strip():
+            continue
+        try:
+            row = json.loads(text)
+        except ValueError as e:
+            yield line, {"_raw": text.rstrip("\n"), "_error": f"Invalid JSON: {e}"}
+            continue
+        yield line, row if isinstance(row, dict) else {"_raw": text.rstrip("\n"), "_error": "Expected a JSON object"}
+
+
+READERS = {"csv": read_csv, "ndjson": read_ndjson}
+
+
+def _text(value):
+    return value.strip() if isinstance(value, str) else value
+
+
+# Build an unsaved FireExtinguisher from one input row, or return the list of problems with it
+def validate_row(row):
+    if "_error" in row:
+        return None, [row["_error"]]
+
+    errors = []
+    values = {}
+    for field, types in SCALAR_TYPES.items():
+        value = row.get(field)
+        if value is not None and (isinstance(value, bool) or not isinstance(value, types)):
+            errors.append(f"{field} must be a string or a number")
+    if errors:
+        return None, errors
+    for field in REQUIRED_FIELDS:
+        if _text(row.get(field)) in (None, ""):
+            errors.append(f"{field} is required")
+    if errors:
+        return None, errors
+
+    for field, max_length in TEXT_FIELDS.items():
+        values[field] = str(_text(row[field]))
+        if len(values[field]) > max_length:
+            errors.append(f"{field} is longer than {max_length} characters")
+    for field, allowed in CHOICE_VALUES.items():
+        values[field] = _text(row[field])
+        if values[field] not in allowed:
+            errors.append(f"{field} '{values[field]}' is not a valid choice")
+    for field in INTEGER_FIELDS:
+        try:
+            values[field] = int(_text(row[field]))
+        except (TypeError, ValueError):
+            errors.append(f"{field} must be an integer")
+            continue
+        if not 0 <= values[field] <= MAX_INTEGER:
+            errors.append(f"{field} must be between 0 and {MAX_INTEGER}")
+    for field in DATE_FIELDS:
+        try:
+            values[field] = date.fromisoformat(str(_text(row[field])))
+        except ValueError:
+            errors.append(f"{field} must be a YYYY-MM-DD date")
+
+    description = _text(row.get("description"))
+    values["description"] = str(description) if description not in (None, "") else None
+    discount = _text(row.get("discount"))
+    try:
+        values["discount"] = Decimal(str(discount)).quantize(CENTS) if discount not in (None, "") else Decimal("0.00")
+        if not 0 <= values["discount"] < MAX_DISCOUNT:
+            errors.append("discount must be between 0 and 999.99")
+    except InvalidOperation:
+        errors.append("discount must be a number")
+
+    if errors:
+        return None, errors
+    return FireExtinguisher(**values), []
+
+
+# PostgreSQL: COPY the batch into a session temp table, then upsert it with one INSERT ... SELECT
+def _copy_batch(batch):
+    table = FireExtinguisher._meta.db_table
+    columns = ", ".join(COPY_FIELDS)
+    updates = ", ".join(f"{field} = EXCLUDED.{field}" for field in UPDATE_FIELDS)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TEMP TABLE IF NOT EXISTS fireext_import ON COMMIT DELETE ROWS "
+            f"AS SELECT {columns} FROM {table} WITH NO DATA"
+        )
+        with cursor.copy(f"COPY fireext_import ({columns}) FROM STDIN") as copy:
+            for extinguisher in batch.values():
+                copy.write_row([getattr(extinguisher, field) for field in COPY_FIELDS])
+        cursor.execute(
+            f"INSERT INTO {table} ({columns}) SELECT {columns} FROM fireext_import "
+            f"ON CONFLICT (company_id, batch_number) DO UPDATE SET {updates}"
+        )
+
+
+def _write_batch(batch):
+    if connection.vendor == "postgresql":
+        _copy_batch(batch)
+        return
+
+    with transaction.atomic():
+        FireExtinguisher.objects.bulk_create(
+            batch.values(),
+            update_conflicts=True,
+            unique_fields=["company", "batch_number"],
+            update_fields=UPDATE_FIELDS,
+        )
+
+
+# Validate and upsert a stream of (line, row) pairs into the catalog of one company, in batches keyed
+# on batch_number. Rejected rows are passed to reject(line, row, errors); progress(written) is called
+# after each batch.
+def import_extinguishers(rows, reject, company_id, batch_size=IMPORT_BATCH_SIZE, progress=None):
+    read = written = rejected = 0
+    # Keyed by batch number: a later row in the same batch replaces an earlier one, since
+    # one INSERT ... ON CONFLICT cannot update the same row twice
+    batch = {}
+    for line, row in rows:
+        read += 1
+        extinguisher, errors = validate_row(row)
+        if errors:
+            rejected += 1
+            reject(line, row.get("_raw", row), errors)
+            continue
+
+        extinguisher.company_id = company_id
+        batch[extinguisher.batch_number] = extinguisher
+        if len(batch) >= batch_size:
+            _write_batch(batch)
+            written += len(batch)
+            batch = {}
+            if progress:
+                progress(written)
+
+    if batch:
+        _write_batch(batch)
+        written += len(batch)
+        if progress:
+            progress(written)
+
+    return read, written, rejected
@@ -0,0 +1,196 @@
+from django.db import connection
+from django.db.models import BigIntegerField, Value
+from django.db.models.expressions import RawSQL
+from .models import Address, Change, Customer, FireExtinguisher, Order, OrderItem
+
+# Feed name -> tracked model
+TRACKED_MODELS = {
+    "address": Address,
+    "customer": Customer,
+    "fire_extinguisher": FireExtinguisher,
+    "order": Order,
+    "order_item": OrderItem,
+}
+CHANGE_FIELDS = ("seq", "model", "id", "action", "changed_at", "data")
+CHANGE_COLUMNS = ("seq", "model", "object_id", "action", "changed_at")
+CHANGE_FEED_BATCH_SIZE = 1000
+
+# PostgreSQL: a BEFORE trigger draws the seq and stamps the row, and an AFTER trigger appends the
+# entry once the write has really happened, so an INSERT ... ON CONFLICT DO UPDATE logs one update
+# rather than a create that never took place (the seq its BEFORE INSERT drew is left as a gap). Both
+# run in the writing transaction, without locking, so concurrent writers can commit out of sequence
+# order. Each entry records as its horizon the next transaction id as seen after its seq was drawn;
+# the writer takes its own transaction id before drawing, so every transaction holding a lower seq
+# is below the horizon. Once the oldest running transaction is past an entry's horizon, no lower seq
+# can still commit (the statement snapshot is fresh in READ COMMITTED, which writers must use).
+POSTGRES_FUNCTIONS = [
+    """
+CREATE OR REPLACE FUNCTION app_stamp_change() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_current_xact_id();
+    NEW.change_seq := nextval(pg_get_serial_sequence('app_change', 'seq'));
+    NEW.updated_at := now();
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql
+""",
+    """
+CREATE OR REPLACE FUNCTION app_record_change() RETURNS trigger AS $$
+DECLARE
+    next_seq bigint;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM pg_current_xact_id();
+        next_seq := nextval(pg_get_serial_sequence('app_change', 'seq'));
+    ELSE
+        next_seq := NEW.change_seq;
+    END IF;
+    INSERT INTO app_change (seq, model, object_id, action, changed_at, horizon)
+    VALUES (
+        next_seq,
+        TG_ARGV[0],
+        CASE TG_OP WHEN 'DELETE' THEN OLD.id ELSE NEW.id END,
+        CASE TG_OP WHEN 'INSERT' THEN 'create' WHEN 'UPDATE' THEN 'update' ELSE 'delete' END,
+        now(),
+        pg_snapshot_xmax(pg_current_snapshot())::text::bigint
+    );
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+""",
+]
+POSTGRES_TRIGGERS = {
+    "stamp": """
+CREATE OR REPLACE TRIGGER {table}_change_stamp BEFORE INSERT OR UPDATE ON {table}
+FOR EACH ROW EXECUTE FUNCTION app_stamp_change()
+""",
+    "log": """
+CREATE OR REPLACE TRIGGER {table}_change_log AFTER INSERT OR UPDATE OR DELETE ON {table}
+FOR EACH ROW EXECUTE FUNCTION app_record_change('{name}')
+""",
+}
+
+# SQLite has no BEFORE-row assignment, so AFTER triggers log the write and stamp the row. The update
+# trigger only watches the model's own columns, so the stamping UPDATE does not log again. Writes are
+# serialized by the database lock.
+SQLITE_NOW = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+SQLITE_TRIGGERS = {
+    "insert": f"""
+CREATE TRIGGER IF NOT EXISTS {{table}}_change_insert AFTER INSERT ON {{table}}
+BEGIN
+    INSERT INTO app_change (model, object_id, action, changed_at) VALUES ('{{name}}', NEW.id, 'create', {SQLITE_NOW});
+    UPDATE {{table}} SET change_seq = last_insert_rowid(), updated_at = {SQLITE_NOW} WHERE id = NEW.id;
+END
+""",
+    "update": f"""
+CREATE TRIGGER IF NOT EXISTS {{table}}_change_update AFTER UPDATE OF {{columns}} ON {{table}}
+BEGIN
+    INSERT INTO app_change (model, object_id, action, changed_at) VALUES ('{{name}}', NEW.id, 'update', {SQLITE_NOW});
+    UPDATE {{table}} SET change_seq = last_insert_rowid(), updated_at = {SQLITE_NOW} WHERE id = NEW.id;
+END
+""",
+    "delete": f"""
+CREATE TRIGGER IF NOT EXISTS {{table}}_change_delete AFTER DELETE ON {{table}}
+BEGIN
+    INSERT INTO app_change (model, object_id, action, changed_at) VALUES ('{{name}}', OLD.id, 'delete', {SQLITE_NOW});
+END
+""",
+}
+
+
+# (Re)create the change triggers; run after every migrate, since SQLite drops the triggers of a table
+# whenever a migration rebuilds it
+def install_triggers(connection):
+    if Change._meta.db_table not in connection.introspection.table_names():
+        return
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            for sql in POSTGRES_FUNCTIONS:
+                cursor.execute(sql)
+        for name, model in TRACKED_MODELS.items():
+            table = model._meta.db_table
+            if connection.vendor == "postgresql":
+                # The single BEFORE trigger of earlier releases also logged, and would log twice
+                cursor.execute(f"DROP TRIGGER IF EXISTS {table}_change ON {table}")
+                for sql in POSTGRES_TRIGGERS.values():
+                    cursor.execute(sql.format(table=table, name=name))
+            elif connection.vendor == "sqlite":
+                columns = ", ".join(
+                    connection.ops.quote_name(field.column)
+                    for field in model._meta.concrete_fields
+                    if field.name not in ("change_seq", "updated_at")
+                )
+                for sql in SQLITE_TRIGGERS.values():
+                    cursor.execute(sql.format(table=table, name=name, columns=columns))
+
+
+def drop_triggers(connection):
+    with connection.cursor() as cursor:
+        for model in TRACKED_MODELS.values():
+            table = model._meta.db_table
+            if connection.vendor == "postgresql":
+                for trigger in ("change", *(f"change_{kind}" for kind in POSTGRES_TRIGGERS)):
+                    cursor.execute(f"DROP TRIGGER IF EXISTS {table}_{trigger} ON {table}")
+            elif connection.vendor == "sqlite":
+                for action in SQLITE_TRIGGERS:
+                    cursor.execute(f"DROP TRIGGER IF EXISTS {table}_change_{action}")
+        if connection.vendor == "postgresql":
+            cursor.execute("DROP FUNCTION IF EXISTS app_record_change()")
+            cursor.execute("DROP FUNCTION IF EXISTS app_stamp_change()")
+
+
+# The oldest transaction still running, read in the same snapshot as the entries; SQLite serializes
+# writers, so its entries are final as soon as they are visible
+def _oldest_running():
+    if connection.vendor == "postgresql":
+        return RawSQL("pg_snapshot_xmin(pg_current_snapshot())::text::bigint", ())
+    return Value(None, output_field=BigIntegerField())
+
+
+# Changes after sequence number `since`, oldest first, read a batch at a time. Only the final prefix
+# of the log is returned: entries up to the last one whose horizon every running transaction is past
+# (entries without a horizon predate it), so a later commit can never land below a consumer's cursor.
+# `data` is the row as it is when the batch is read (None once deleted), fetched with one query per
+# model per batch; consumers apply entries as upserts and deletes and keep the last seq as their cursor.
+def change_rows(since, limit, batch_size=CHANGE_FEED_BATCH_SIZE):
+    while limit > 0:
+        entries = list(
+            Change.objects.filter(seq__gt=since)
+            .annotate(oldest_running=_oldest_running())
+            .order_by("seq")
+            .values_list(*CHANGE_COLUMNS, "horizon", "oldest_running")[:min(batch_size, limit)]
+        )
+        final = max(
+            (
+                position + 1
+                for position, (*_, horizon, oldest_running) in enumerate(entries)
+                if horizon is None or horizon <= oldest_running
+            ),
+            default=0,
+        )
+        batch = [entry[:len(CHANGE_COLUMNS)] for entry in entries[:final]]
+        if not batch:
+            return
+
+        ids_by_model = {}
+        for _, name, object_id, action, _ in batch:
+            if action != "delete":
+                ids_by_model.setdefault(name, set()).add(object_id)
+        rows = {
+            (name, row["id"]): row
+            for name, ids in ids_by_model.items()
+            for row in TRACKED_MODELS[name]._base_manager.filter(pk__in=ids).values()
+        }
+
+        for seq, name, object_id, action, changed_at in batch:
+            yield {
+                "seq": seq,
+                "model": name,
+                "id": object_id,
+                "action": action,
+                "changed_at": changed_at,
+                "data": rows.get((name, object_id)),
+            }
+        if final < len(entries):
+            return
+        since, limit = batch[-1][0], limit - len(batch)
@@ -0,0 +1,50 @@
+import heapq
+from datetime import timedelta
+from django.db.models import F
+from django.utils import timezone
+from .models import FireExtinguisher, inspection_due_date, service_due_date, warranty_expiry_date
+from .serializers import encode_rows
+
+SWEEP_FIELDS = ("id", "name", "batch_number", "fire_extinguisher_type", "inventory")
+SWEEP_COLUMNS = ("reason", "status", "due_date", *SWEEP_FIELDS)
+SWEEP_FORMATS = ("ndjson", "csv")
+SWEEP_CHUNK_SIZE = 2000
+
+# Due date of each reason; each is answered by a range scan over an index on the same expression
+SWEEP_REASONS = {
+    "inspection": inspection_due_date,
+    "service": service_due_date,
+    "expiry": lambda: F("expiry_date"),
+    "warranty": warranty_expiry_date,
+}
+
+
+def _reason_rows(reason, horizon, chunk_size):
+    rows = (
+        FireExtinguisher.objects.annotate(due_date=SWEEP_REASONS[reason]())
+        .filter(due_date__lte=horizon)
+        .order_by("due_date", "id")
+        .values_list("due_date", *SWEEP_FIELDS)
+        .iterator(chunk_size=chunk_size)
+    )
+    for due_date, *values in rows:
+        yield due_date, reason, values
+
+
+# Everything due on or before today + days, across all requested reasons, in due-date order.
+# Every reason keeps its own server-side cursor and the ordered streams are merged lazily.
+def sweep(days, reasons=None, today=None, chunk_size=SWEEP_CHUNK_SIZE):
+    today = today or timezone.localdate()
+    horizon = today + timedelta(days=days)
+    streams = [_reason_rows(reason, horizon, chunk_size) for reason in reasons or SWEEP_REASONS]
+    for due_date, reason, values in heapq.merge(*streams, key=lambda row: row[0]):
+        yield {
+            "reason": reason,
+            "status": "overdue" if due_date < today else "due",
+            "due_date": due_date.isoformat(),
+            **dict(zip(SWEEP_FIELDS, values)),
+        }
+
+
+def render(rows, output_format, chunk_size=SWEEP_CHUNK_SIZE):
+    return encode_rows(rows, output_format, SWEEP_COLUMNS, chunk_size)
@@ -0,0 +1,30 @@
+import calendar
+from datetime import date
+from django.utils.text import compress_sequence
+from .models import Order
+from .serializers import ORDER_EXPORT, encode_rows
+
+EXPORT_FORMATS = ("csv", "ndjson")
+EXPORT_CHUNK_SIZE = 2000
+
+
+# "2026-09" -> (2026-09-01, 2026-09-30)
+def month_range(month):
+    start = date.fromisoformat(f"{month}-01")
+    return start, start.replace(day=calendar.monthrange(start.year, start.month)[1])
+
+
+# One row per order line (orders without items get a single row with empty item columns), read
+# as a single joined values query through a server-side cursor, so memory stays flat for any range
+def order_rows(start=None, end=None, chunk_size=EXPORT_CHUNK_SIZE):
+    orders = Order.objects.order_by("id", "items__id")
+    if start is not None:
+        orders = orders.filter(order_date__gte=start)
+    if end is not None:
+        orders = orders.filter(order_date__lte=end)
+    return ORDER_EXPORT.rows(orders, chunk_size=chunk_size)
+
+
+def export_orders(start=None, end=None, output_format="csv", compress=False, chunk_size=EXPORT_CHUNK_SIZE):
+    chunks = encode_rows(order_rows(start, end, chunk_size), output_format, ORDER_EXPORT.keys, chunk_size)
+    return compress_sequence(chunks) if compress else chunks
@@ -0,0 +1,29 @@
+from django.db import NotSupportedError
+from django.db.models import DateField, Func, Value
+
+
+# date + N months, computed by the database so it can be filtered, ordered and indexed
+class AddMonths(Func):
+    arity = 2
+    output_field = DateField()
+
+    def as_sql(self, compiler, connection, **extra_context):
+        raise NotSupportedError(f"AddMonths is not implemented for {connection.vendor}")
+
+    def _compile_arguments(self, compiler):
+        date_sql, date_params = compiler.compile(self.source_expressions[0])
+        months = self.source_expressions[1]
+        if isinstance(months, Value) and isinstance(months.value, int):
+            # A constant interval is inlined, not bound, so the query text matches an index on the expression
+            months_sql, months_params = str(months.value), ()
+        else:
+            months_sql, months_params = compiler.compile(months)
+        return date_sql, months_sql, (*date_params, *months_params)
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        date_sql, months_sql, params = self._compile_arguments(compiler)
+        return f"(({date_sql}) + make_interval(months => ({months_sql})::integer))::date", params
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        date_sql, months_sql, params = self._compile_arguments(compiler)
+        return f"date({date_sql}, '+' || ({months_sql}) || ' months')", params
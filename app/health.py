@@ -0,0 +1,119 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from datetime import datetime, timezone
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections, transaction
+from django.db.migrations.executor import MigrationExecutor
+
+# One probe thread per process, so however often the load balancer polls,
+# at most one set of probes is in flight against the database
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="health-probe")
+_lock = threading.Lock()
+_latest = None
+_pending = None
+_pending_since = None
+
+
+def _check_database(connection):
+    start = time.perf_counter()
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(f"SET LOCAL statement_timeout = {int(settings.HEALTH_PROBE_TIMEOUT * 1000)}")
+        cursor.execute("SELECT 1")
+    return {"ok": True, "latency_ms": round((time.perf_counter() - start) * 1000, 2)}
+
+
+def _check_pool(connection):
+    pool = getattr(connection, "pool", None)
+    if pool is None:
+        return {"ok": True, "pooled": False}
+
+    stats = pool.get_stats()
+    in_use = stats.get("pool_size", 0) - stats.get("pool_available", 0)
+    saturation = in_use / stats["pool_max"] if stats.get("pool_max") else 0.0
+    waiting = stats.get("requests_waiting", 0)
+    return {
+        "ok": saturation < settings.HEALTH_POOL_MAX_SATURATION or not waiting,
+        "pooled": True,
+        "in_use": in_use,
+        "max_size": stats.get("pool_max"),
+        "waiting": waiting,
+        "saturation": round(saturation, 3),
+    }
+
+
+def _check_migrations(connection):
+    executor = MigrationExecutor(connection)
+    plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+    unapplied = [f"{migration.app_label}.{migration.name}" for migration, backwards in plan if not backwards]
+    return {"ok": not unapplied, "unapplied": unapplied}
+
+
+PROBES = {
+    "database": _check_database,
+    "pool": _check_pool,
+    "migrations": _check_migrations,
+}
+
+
+def _run_probes():
+    global _latest
+
+    connection = connections[DEFAULT_DB_ALIAS]
+    checks = {}
+    try:
+        for name, probe in PROBES.items():
+            try:
+                checks[name] = probe(connection)
+            except Exception as exc:
+                checks[name] = {"ok": False, "error": str(exc)}
+                # Without a database connection the remaining probes can only fail the same way
+                if name == "database":
+                    break
+    finally:
+        # Respects CONN_MAX_AGE / hands pooled connections back, like the end of a request would
+        close_old_connections()
+
+    result = {
+        "status": "OK" if all(check["ok"] for check in checks.values()) else "Unavailable",
+        "checks": checks,
+        "checked_at": datetime.now(timezone.utc).isoformat(),
+    }
+    with _lock:
+        _latest = (time.monotonic(), result)
+    return result
+
+
+def _clear_pending(future):
+    global _pending
+
+    with _lock:
+        if _pending is future:
+            _pending = None
+
+
+def readiness():
+    # Serve the cached result while it is fresh; once stale, serve it anyway and refresh in the
+    # background, but only for HEALTH_PROBE_TIMEOUT longer. Past that the caller waits for the running
+    # probe until HEALTH_PROBE_TIMEOUT after it started, so a hung database reports Unavailable.
+    global _pending, _pending_since
+
+    with _lock:
+        latest, pending = _latest, _pending
+        now = time.monotonic()
+        age = now - latest[0] if latest is not None else None
+        if age is not None and age < settings.HEALTH_CHECK_TTL:
+            return latest[1]
+        if pending is None:
+            pending = _pending = _executor.submit(_run_probes)
+            _pending_since = now
+            pending.add_done_callback(_clear_pending)
+        pending_since = _pending_since
+
+    if age is not None and age < settings.HEALTH_CHECK_TTL + settings.HEALTH_PROBE_TIMEOUT:
+        return latest[1]
+    try:
+        return pending.result(timeout=max(0.0, pending_since + settings.HEALTH_PROBE_TIMEOUT - time.monotonic()))
+    except FutureTimeoutError:
+        return {"status": "Unavailable", "checks": {}, "error": "Health probes timed out"}
@@ -0,0 +1,117 @@
+import hashlib
+import io
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps, UnidentifiedImageError
+from .models import Company
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp", "GIF": "gif"}
+# Names derive from the original's content hash (and the variant size), so a stored file never
+# changes and can be cached forever; a new upload gets new names
+ORIGINAL_NAME = "company_images/{digest}.{extension}"
+VARIANT_NAME = "company_images/{digest}-{size}.webp"
+DIGEST_LENGTH = 20
+# Only variants are public; originals are kept for re-rendering but never served. Storage may add a
+# random suffix when two workers render the same variant at once.
+VARIANT_PATH = re.compile(rf"company_images/[0-9a-f]{{{DIGEST_LENGTH}}}-[0-9]+(_[0-9A-Za-z]{{7}})?\.webp")
+# Stored in image_variants when rendering fails, so the API stops reporting "processing"
+FAILED_VARIANTS = {"status": "failed"}
+
+# Decoding and resizing happen here rather than in the request; Pillow releases the GIL for most of it
+_pool = ThreadPoolExecutor(max_workers=settings.IMAGE_WORKERS, thread_name_prefix="image-variants")
+
+
+class InvalidImage(Exception):
+    pass
+
+
+def _digest(upload):
+    digest = hashlib.sha256()
+    for chunk in upload.chunks():
+        digest.update(chunk)
+    upload.seek(0)
+    return digest.hexdigest()[:DIGEST_LENGTH]
+
+
+# Check the header (format and pixel count, nothing is decoded) and copy the upload to storage
+# chunk by chunk. Returns (name, digest).
+def store_original(upload):
+    if upload.size > settings.COMPANY_IMAGE_MAX_BYTES:
+        raise InvalidImage(f"Images must be at most {settings.COMPANY_IMAGE_MAX_BYTES} bytes")
+    try:
+        with Image.open(upload) as image:
+            image_format, (width, height) = image.format, image.size
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+        raise InvalidImage("Not a supported image file")
+    if image_format not in IMAGE_EXTENSIONS:
+        raise InvalidImage(f"Unsupported image format, use one of {', '.join(IMAGE_EXTENSIONS)}")
+    if width * height > Image.MAX_IMAGE_PIXELS:
+        raise InvalidImage("Image has too many pixels")
+
+    upload.seek(0)
+    digest = _digest(upload)
+    name = ORIGINAL_NAME.format(digest=digest, extension=IMAGE_EXTENSIONS[image_format])
+    if not default_storage.exists(name):
+        name = default_storage.save(name, upload)
+    return name, digest
+
+
+def _build_variants(company_id, original, digest):
+    try:
+        variants = {}
+        sizes = sorted(settings.COMPANY_IMAGE_VARIANTS.items(), key=lambda item: -item[1])
+        with default_storage.open(original) as file, Image.open(file) as image:
+            # JPEGs decode straight at a reduced scale no smaller than the largest variant
+            image.draft("RGB", (sizes[0][1], sizes[0][1]))
+            image = ImageOps.exif_transpose(image)
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA" if image.has_transparency_data else "RGB")
+            # Largest first, each variant shrinking the previous one in place
+            for variant, size in sizes:
+                name = VARIANT_NAME.format(digest=digest, size=size)
+                if not default_storage.exists(name):
+                    image.thumbnail((size, size), Image.Resampling.LANCZOS)
+                    buffer = io.BytesIO()
+                    image.save(buffer, "WEBP", quality=settings.COMPANY_IMAGE_QUALITY)
+                    name = default_storage.save(name, ContentFile(buffer.getvalue()))
+                variants[variant] = name
+        # Only if the company still shows this image; a newer upload has its own job
+        Company.objects.filter(id=company_id, image=original).update(image_variants=variants)
+    except Exception:
+        logger.exception("Could not build image variants for company %s from %s", company_id, original)
+        try:
+            Company.objects.filter(id=company_id, image=original).update(image_variants=FAILED_VARIANTS)
+        except Exception:
+            logger.exception("Could not record the failed image variants of company %s", company_id)
+    finally:
+        close_old_connections()
+
+
+def set_company_image(company_id, upload):
+    name, digest = store_original(upload)
+    with transaction.atomic():
+        found = Company.objects.filter(id=company_id).update(image=name, image_variants={})
+        if found:
+            transaction.on_commit(lambda: _pool.submit(_build_variants, company_id, name, digest))
+    return found
+
+
+def is_variant(path):
+    return VARIANT_PATH.fullmatch(path) is not None
+
+
+def image_urls(image, variants):
+    if not image:
+        return None
+    if not variants:
+        return {"status": "processing"}
+    if variants == FAILED_VARIANTS:
+        return FAILED_VARIANTS
+    return {"status": "ready", **{variant: default_storage.url(name) for variant, name in variants.items()}}
@@ -0,0 +1,94 @@
+import asyncio
+import math
+import time
+from urllib.parse import urlsplit
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
+
+
+async def _read_response(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("Connection closed by server")
+    status = int(status_line.split()[1])
+
+    headers = {}
+    while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    if "content-length" in headers:
+        await reader.readexactly(int(headers["content-length"]))
+    elif headers.get("transfer-encoding", "").lower() == "chunked":
+        while size := int((await reader.readline()).split(b";")[0], 16):
+            await reader.readexactly(size + 2)
+        await reader.readline()
+    else:
+        # Body delimited by the server closing the connection
+        await reader.read()
+        return status, False
+    return status, headers.get("connection", "").lower() != "close"
+
+
+# One client: a keep-alive connection issuing requests back to back until the shared budget is spent
+async def _client(host, port, request, budget, latencies, errors):
+    reader = writer = None
+    while budget[0] > 0:
+        budget[0] -= 1
+        started = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            writer.write(request)
+            await writer.drain()
+            status, keep_alive = await _read_response(reader)
+            latencies.append(time.perf_counter() - started)
+            if status >= 400:
+                errors.append(status)
+            if not keep_alive:
+                writer.close()
+                reader = writer = None
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError) as e:
+            errors.append(type(e).__name__)
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def _run(url, requests, concurrency, headers):
+    parts = urlsplit(url)
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+    extra = "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+    request = f"GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\nConnection: keep-alive\r\n{extra}\r\n".encode()
+    budget, latencies, errors = [requests], [], []
+
+    started = time.perf_counter()
+    await asyncio.gather(*[
+        _client(parts.hostname, parts.port or 80, request, budget, latencies, errors) for _ in range(concurrency)
+    ])
+    return time.perf_counter() - started, latencies, errors
+
+
+# Drive GET url with `concurrency` concurrent keep-alive clients until `requests` responses were read;
+# any 4xx or 5xx answer counts as an error
+def run_load(url, requests, concurrency, headers=None):
+    elapsed, latencies, errors = asyncio.run(_run(url, requests, concurrency, headers or {}))
+    latencies.sort()
+    return {
+        "url": url,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "concurrency": concurrency,
+        "requests_per_second": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
@@ -0,0 +1,87 @@
+import json
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    override_settings,
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+from app.benchmarks import SCENARIOS, LocalServer, compare, resolve, run_client, run_http, seed
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway test database, benchmark the API through the test client (and optionally over HTTP) "
+        "and compare latency percentiles, throughput and query counts against a recorded JSON baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", type=int, default=1000, help="Customers to seed; other tables scale with it.")
+        parser.add_argument("--iterations", type=int, default=200, help="Timed test-client requests per scenario.")
+        parser.add_argument("--warmup", type=int, default=20)
+        parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="Repeat to pick scenarios.")
+        parser.add_argument("--http", action="store_true", help="Also load-test a local HTTP server.")
+        parser.add_argument("--requests", type=int, default=2000, help="HTTP requests per scenario with --http.")
+        parser.add_argument("--concurrency", type=int, default=20)
+        parser.add_argument("--baseline", type=Path, help="Baseline file (default benchmarks/<database vendor>.json).")
+        parser.add_argument("--record", action="store_true", help="Write this run as the new baseline.")
+        parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative slowdown (0.25 = 25%%).")
+
+    def handle(self, *args, **options):
+        baseline_path = options["baseline"] or Path(settings.BASE_DIR) / "benchmarks" / f"{connection.vendor}.json"
+        scenarios = {name: SCENARIOS[name] for name in options["scenario"] or SCENARIOS}
+        # A gate without a baseline would pass every run
+        if not options["record"] and not baseline_path.exists():
+            raise CommandError(f"No baseline at {baseline_path}; run with --record to create one")
+
+        setup_test_environment(debug=False)
+        old_config = setup_databases(verbosity=0, interactive=False, aliases=["default"])
+        try:
+            context = seed(options["scale"])
+            self.stdout.write(
+                f"Seeded {connection.vendor}: " + ", ".join(f"{count} {table}" for table, count in context["counts"].items())
+            )
+            scenarios = resolve(scenarios, context)
+
+            results = {"client": run_client(scenarios, options["iterations"], options["warmup"], context["token"])}
+            if options["http"]:
+                with LocalServer() as base_url, override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "127.0.0.1"]):
+                    results["http"] = run_http(
+                        base_url, scenarios, options["requests"], options["concurrency"], context["token"]
+                    )
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        for mode, mode_results in results.items():
+            self.write_table(mode, mode_results)
+
+        run = {"database": connection.vendor, "scale": options["scale"], **results}
+        if options["record"]:
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            baseline_path.write_text(json.dumps(run, indent=2, sort_keys=True) + "\n")
+            self.stdout.write(f"Recorded baseline {baseline_path}")
+            return
+
+        baseline = json.loads(baseline_path.read_text())
+        if (baseline["database"], baseline["scale"]) != (run["database"], run["scale"]):
+            raise CommandError(
+                f"Baseline {baseline_path} was recorded on {baseline['database']} at scale {baseline['scale']}; "
+                f"this run is {run['database']} at scale {run['scale']}"
+            )
+        regressions = compare(results, baseline, options["threshold"])
+        if regressions:
+            raise CommandError("Performance regressions:\n  " + "\n  ".join(regressions))
+        self.stdout.write(self.style.SUCCESS(f"No regressions against {baseline_path}"))
+
+    def write_table(self, mode, results):
+        self.stdout.write(f"\n{mode:<18} {'req/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'queries':>8}")
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<18} {result['requests_per_second']:>10.1f} {result['p50_ms']:>9.2f} "
+                f"{result['p95_ms']:>9.2f} {result['p99_ms']:>9.2f} {result.get('queries', ''):>8}"
+            )
@@ -0,0 +1,59 @@
+import json
+import time
+from datetime import date
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+from app.models import Order
+from app.serializers import ORDER, dumps, orjson
+
+
+class Command(BaseCommand):
+    help = "Compare row building and JSON encoding throughput of the serializer layer against the hand-built path."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def measure(self, label, function, rows):
+        best = min(self.time_once(function) for _ in range(self.repeat))
+        self.stdout.write(f"{label:<40} {rows / best:>14,.0f} rows/s")
+
+    @staticmethod
+    def time_once(function):
+        started = time.perf_counter()
+        function()
+        return time.perf_counter() - started
+
+    def handle(self, *args, **options):
+        self.repeat = options["repeat"]
+        rows = options["rows"]
+        values = [
+            (number, number % 500, f"Customer {number % 500}", date(2024, 1, 1), "Pending", Decimal("125.50"), Decimal("125.50"), 3)
+            for number in range(rows)
+        ]
+        field_names = ["id", "customer_id", "order_date", "status", "total_amount"]
+
+        # What the ORM does per row when a view iterates model instances, followed by the hand-built dict
+        def build_from_instances():
+            orders = (Order.from_db("default", field_names, (row[0], row[1], row[3], row[4], row[5])) for row in values)
+            return [
+                {
+                    "id": order.id,
+                    "customer_id": order.customer_id,
+                    "order_date": order.order_date,
+                    "status": order.status,
+                    "total_amount": order.total_amount,
+                }
+                for order in orders
+            ]
+
+        def build_from_tuples():
+            return [ORDER.row(row) for row in values]
+
+        self.measure("rows: model instances, per field", build_from_instances, rows)
+        self.measure("rows: values tuples, FieldSpec", build_from_tuples, rows)
+
+        payload = {"orders": build_from_tuples()}
+        self.measure("encode: json + DjangoJSONEncoder", lambda: json.dumps(payload, cls=DjangoJSONEncoder), rows)
+        self.measure(f"encode: serializers.dumps ({'orjson' if orjson else 'stdlib'})", lambda: dumps(payload), rows)
@@ -0,0 +1,32 @@
+import os
+import socket
+from django.core.management.base import BaseCommand, CommandError
+from app.models import Company
+from app.services import MAX_CLAIM_BATCH, claim_orders
+from app.tenancy import tenant
+
+
+class Command(BaseCommand):
+    help = (
+        "Claim a batch of the oldest pending orders for a fulfilment worker (moving them to Processing) and print "
+        "their ids, one per line. Any number of workers can run this at once without blocking each other."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--worker", default=f"{socket.gethostname()}:{os.getpid()}", help="Name recorded on the claim.")
+        parser.add_argument("--limit", type=int, default=10, help=f"Orders to claim (at most {MAX_CLAIM_BATCH}).")
+        parser.add_argument("--company", type=int, help="Only claim orders of this company.")
+
+    def handle(self, *args, **options):
+        if options["company"] is not None and not Company.objects.filter(id=options["company"]).exists():
+            raise CommandError(f"Company {options['company']} does not exist")
+        try:
+            with tenant(options["company"]):
+                ids = claim_orders(options["worker"], options["limit"])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        for order_id in ids:
+            self.stdout.write(str(order_id))
+        if options["verbosity"] >= 2:
+            self.stderr.write(f"{options['worker']} claimed {len(ids)} order(s)")
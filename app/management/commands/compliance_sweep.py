@@ -0,0 +1,29 @@
+import sys
+from django.core.management.base import BaseCommand
+from app.compliance import SWEEP_CHUNK_SIZE, SWEEP_FORMATS, SWEEP_REASONS, render, sweep
+
+
+class Command(BaseCommand):
+    help = "Stream every fire extinguisher that is overdue or due within the next N days as NDJSON or CSV."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=30, help="Look-ahead window in days (default 30).")
+        parser.add_argument(
+            "--reason",
+            action="append",
+            choices=list(SWEEP_REASONS),
+            help="Only sweep this reason; repeat for several (default: all).",
+        )
+        parser.add_argument("--format", choices=SWEEP_FORMATS, default="ndjson")
+        parser.add_argument("--output", help="Write to this file instead of stdout.")
+        parser.add_argument("--chunk-size", type=int, default=SWEEP_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        rows = sweep(options["days"], options["reason"], chunk_size=options["chunk_size"])
+        chunks = render(rows, options["format"], options["chunk_size"])
+
+        if options["output"]:
+            with open(options["output"], "wb") as output:
+                output.writelines(chunks)
+        else:
+            sys.stdout.buffer.writelines(chunks)
@@ -0,0 +1,33 @@
+import sys
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from app.exports import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, export_orders, month_range
+
+
+class Command(BaseCommand):
+    help = "Stream every order with its line items, customer and billing address as CSV or NDJSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--month", help="Export the orders of this month (YYYY-MM).")
+        parser.add_argument("--from", dest="start", type=date.fromisoformat, help="First order date (YYYY-MM-DD).")
+        parser.add_argument("--to", dest="end", type=date.fromisoformat, help="Last order date (YYYY-MM-DD).")
+        parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv")
+        parser.add_argument("--gzip", action="store_true", help="Gzip the output.")
+        parser.add_argument("--output", help="Write to this file instead of stdout.")
+        parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        start, end = options["start"], options["end"]
+        if options["month"]:
+            try:
+                start, end = month_range(options["month"])
+            except ValueError as e:
+                raise CommandError(f"Invalid --month: {e}")
+
+        chunks = export_orders(start, end, options["format"], options["gzip"], options["chunk_size"])
+
+        if options["output"]:
+            with open(options["output"], "wb") as output:
+                output.writelines(chunks)
+        else:
+            sys.stdout.buffer.writelines(chunks)
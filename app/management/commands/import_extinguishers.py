@@ -0,0 +1,59 @@
+import json
+import time
+from django.core.management.base import BaseCommand, CommandError
+from app.catalog import IMPORT_BATCH_SIZE, IMPORT_FORMATS, READERS, import_extinguishers
+from app.models import Company
+
+
+class Command(BaseCommand):
+    help = "Stream a supplier catalog (CSV or NDJSON) into the fire extinguisher table, upserting on batch number."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Catalog file to import.")
+        parser.add_argument("--company", type=int, required=True, help="ID of the company that owns the catalog.")
+        parser.add_argument("--format", choices=IMPORT_FORMATS, help="File format (default: from the extension).")
+        parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument("--errors", help="Write rejected rows here as NDJSON (default: <path>.rejected.ndjson).")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or ("csv" if path.lower().endswith(".csv") else "ndjson")
+        errors_path = options["errors"] or f"{path}.rejected.ndjson"
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1")
+        if not Company.objects.filter(id=options["company"]).exists():
+            raise CommandError(f"Company {options['company']} does not exist")
+
+        error_file = None
+
+        def reject(line, row, errors):
+            nonlocal error_file
+            # Only create the error file once there is something to put in it
+            if error_file is None:
+                error_file = open(errors_path, "w", encoding="utf-8")
+            error_file.write(json.dumps({"line": line, "errors": errors, "row": row}, default=str) + "\n")
+
+        start = time.perf_counter()
+
+        def progress(written):
+            if options["verbosity"] >= 2:
+                self.stdout.write(f"  {written} rows written ({written / (time.perf_counter() - start):.0f} rows/sec)")
+
+        try:
+            with open(path, newline="" if file_format == "csv" else None, encoding="utf-8") as catalog:
+                read, written, rejected = import_extinguishers(
+                    READERS[file_format](catalog), reject, options["company"], options["batch_size"], progress
+                )
+        except OSError as e:
+            raise CommandError(str(e))
+        finally:
+            if error_file is not None:
+                error_file.close()
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f"Read {read} rows in {elapsed:.2f}s ({read / elapsed if elapsed else 0:.0f} rows/sec): "
+            f"{written} written, {rejected} rejected"
+        )
+        if rejected:
+            self.stdout.write(f"Rejected rows written to {errors_path}")
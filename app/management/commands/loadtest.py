@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+from app.loadgen import run_load
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test running deployments of the API and compare requests/sec and latency percentiles, "
+        "e.g. --target wsgi=http://127.0.0.1:8000 --target asgi=http://127.0.0.1:8001"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--target", action="append", required=True, help="name=base URL; repeat to compare.")
+        parser.add_argument("--path", default="/api/addresses/", help="Path to request on every target.")
+        parser.add_argument("--requests", type=int, default=5000)
+        parser.add_argument("--concurrency", type=int, default=100)
+        parser.add_argument("--header", action="append", default=[], help="'Name: value' sent with every request.")
+
+    def handle(self, *args, **options):
+        targets = []
+        for target in options["target"]:
+            name, separator, base_url = target.partition("=")
+            if not separator:
+                raise CommandError(f"Expected name=url, got '{target}'")
+            targets.append((name, base_url.rstrip("/") + options["path"]))
+        headers = {}
+        for header in options["header"]:
+            name, separator, value = header.partition(":")
+            if not separator:
+                raise CommandError(f"Expected 'Name: value', got '{header}'")
+            headers[name.strip()] = value.strip()
+
+        self.stdout.write(f"{'target':<10} {'req/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+        for name, url in targets:
+            result = run_load(url, options["requests"], options["concurrency"], headers)
+            self.stdout.write(
+                f"{name:<10} {result['requests_per_second']:>10.1f} {result['p50_ms']:>9.2f} "
+                f"{result['p95_ms']:>9.2f} {result['p99_ms']:>9.2f} {result['errors']:>7}"
+            )
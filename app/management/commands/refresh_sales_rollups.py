@@ -0,0 +1,22 @@
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand
+from app.rollups import refresh_day, refresh_dirty_days
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily sales rollups for every day whose orders changed since the last run."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", type=date.fromisoformat, help="Rebuild every day from this date (YYYY-MM-DD).")
+        parser.add_argument("--until", type=date.fromisoformat, help="Last day to rebuild with --since (default today).")
+
+    def handle(self, *args, **options):
+        if options["since"]:
+            day, until = options["since"], options["until"] or date.today()
+            while day <= until:
+                refresh_day(day)
+                day += timedelta(days=1)
+            self.stdout.write(f"Rebuilt rollups from {options['since']} to {until}")
+        else:
+            days = refresh_dirty_days()
+            self.stdout.write(f"Rebuilt rollups for {len(days)} changed day(s)")
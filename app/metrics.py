@@ -0,0 +1,96 @@
+import threading
+from bisect import bisect_left
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, documentation, labels=()):
+        self.name, self.documentation, self.labels = name, documentation, labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def expose(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        for label_values, value in values:
+            yield f"{self.name}{_format_labels(self.labels, label_values)} {_format_number(value)}"
+
+
+class Histogram:
+    def __init__(self, name, documentation, labels=(), buckets=DURATION_BUCKETS):
+        self.name, self.documentation, self.labels, self.buckets = name, documentation, labels, buckets
+        # label values -> [per-bucket counts (last one is +Inf), sum]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._values.get(label_values)
+            if series is None:
+                series = self._values[label_values] = [[0] * (len(self.buckets) + 1), 0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    def expose(self):
+        with self._lock:
+            values = sorted((label_values, (list(counts), total)) for label_values, (counts, total) in self._values.items())
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        for label_values, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                labels = _format_labels(self.labels, label_values, [("le", bound)])
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labels, label_values)
+            yield f"{self.name}_sum{labels} {_format_number(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+REQUESTS = Counter("http_requests_total", "Requests handled, by view, method and status.", ("view", "method", "status"))
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Wall time spent producing the response.", ("view", "method")
+)
+DB_DURATION = Histogram("http_request_db_seconds", "Time spent executing SQL per request.", ("view",))
+QUERIES = Histogram("http_request_queries", "SQL queries executed per request.", ("view",), QUERY_BUCKETS)
+DUPLICATE_QUERIES = Counter(
+    "http_request_duplicate_queries_total", "Queries repeating SQL already run by the same request.", ("view",)
+)
+RESPONSE_SIZE = Histogram("http_response_size_bytes", "Size of non-streaming response bodies.", ("view",), SIZE_BUCKETS)
+
+REGISTRY = [REQUESTS, REQUEST_DURATION, DB_DURATION, QUERIES, DUPLICATE_QUERIES, RESPONSE_SIZE]
+
+
+def expose():
+    from .cache import stats as cache_stats
+
+    lines = [line for metric in REGISTRY for line in metric.expose()]
+    cache = cache_stats()
+    lines += [
+        "# HELP address_cache_requests_total Address cache lookups, by result.",
+        "# TYPE address_cache_requests_total counter",
+        f'address_cache_requests_total{{result="hit"}} {cache["hits"]}',
+        f'address_cache_requests_total{{result="miss"}} {cache["misses"]}',
+    ]
+    return "\n".join(lines) + "\n"
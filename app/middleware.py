@@ -0,0 +1,223 @@
+import logging
+import time
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from .metrics import DB_DURATION, DUPLICATE_QUERIES, QUERIES, REQUEST_DURATION, REQUESTS, RESPONSE_SIZE
+from .serializers import JsonResponse
+from .tenancy import tenant
+from .tokens import InvalidToken, verify_token
+
+logger = logging.getLogger("app.requests")
+
+# The query log of the request being served; sync_to_async copies the context, so ORM calls made
+# from async views in the executor thread still report to the right request
+_current_queries = ContextVar("current_queries", default=None)
+
+
+class QueryLog:
+    def __init__(self, max_statements):
+        self.count = 0
+        self.duplicates = 0
+        self.duration = 0.0
+        self.statements = []
+        self._seen = set()
+        self._max_statements = max_statements
+
+    def add(self, sql, duration):
+        self.count += 1
+        self.duration += duration
+        if sql in self._seen:
+            self.duplicates += 1
+        else:
+            self._seen.add(sql)
+        if len(self.statements) < self._max_statements:
+            self.statements.append((sql, duration))
+
+
+def record_query(execute, sql, params, many, context):
+    log = _current_queries.get()
+    if log is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        log.add(sql, time.perf_counter() - start)
+
+
+def install_query_recorder(connection):
+    # Installed once per connection (see signals.py) rather than per request, because the
+    # connection async views query through lives in another thread
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_request_seconds = settings.SLOW_REQUEST_MS / 1000
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        log = QueryLog(settings.SLOW_REQUEST_SQL_LIMIT)
+        token = _current_queries.set(log)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_queries.reset(token)
+        self.record(request, response, log, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        log = QueryLog(settings.SLOW_REQUEST_SQL_LIMIT)
+        token = _current_queries.set(log)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_queries.reset(token)
+        self.record(request, response, log, time.perf_counter() - start)
+        return response
+
+    def record(self, request, response, log, duration):
+        # Unmatched paths share one label so 404 scans can't blow up the series count
+        match = request.resolver_match
+        view = match.view_name if match else "unmatched"
+
+        REQUESTS.inc(view, request.method, response.status_code)
+        REQUEST_DURATION.observe(duration, view, request.method)
+        DB_DURATION.observe(log.duration, view)
+        QUERIES.observe(log.count, view)
+        if log.duplicates:
+            DUPLICATE_QUERIES.inc(view, amount=log.duplicates)
+        if not response.streaming:
+            RESPONSE_SIZE.observe(len(response.content), view)
+
+        response["Server-Timing"] = (
+            f"total;dur={duration * 1000:.1f}, "
+            f'db;dur={log.duration * 1000:.1f};desc="{log.count} queries, {log.duplicates} duplicates"'
+        )
+
+        if duration >= self.slow_request_seconds:
+            statements = "\n".join(f"  [{sql_duration * 1000:.1f} ms] {sql}" for sql, sql_duration in log.statements)
+            logger.warning(
+                "Slow request %s %s (%s): %.1f ms total, %.1f ms in %d queries (%d duplicates)\n%s",
+                request.method,
+                request.path,
+                view,
+                duration * 1000,
+                log.duration * 1000,
+                log.count,
+                log.duplicates,
+                statements,
+            )
+
+
+# Sets request.claims from an "Authorization: Bearer <jwt>" header (None without one) and answers
+# 401 straight away for a bad or expired token. Stateless: no session or user query per request.
+class JWTAuthenticationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.authenticate(request) or self.get_response(request)
+
+    async def __acall__(self, request):
+        return self.authenticate(request) or await self.get_response(request)
+
+    def authenticate(self, request):
+        request.claims = None
+        scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not token.strip():
+            return None
+        try:
+            request.claims = verify_token(token.strip())
+        except InvalidToken as e:
+            return JsonResponse(
+                {"error": str(e)}, status=401, headers={"WWW-Authenticate": 'Bearer error="invalid_token"'}
+            )
+        return None
+
+
+# Scopes every tenant-owned query of the request to the caller's company (taken from the JWT claims,
+# so after JWTAuthenticationMiddleware). System admins stay unscoped; anonymous calls do too, so every
+# view over tenant-owned data must be behind jwt_required.
+class TenantMiddleware:
+    sync_capable = True
+    async_capable = True
+    UNSCOPED_ROLES = ("System Admin",)
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def company_for(self, request):
+        claims = request.claims
+        if claims is None or claims.role in self.UNSCOPED_ROLES:
+            return None
+        return claims.company_id
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        company_id = self.company_for(request)
+        with tenant(company_id):
+            response = self.get_response(request)
+        return self.scope_stream(response, company_id)
+
+    async def __acall__(self, request):
+        company_id = self.company_for(request)
+        with tenant(company_id):
+            response = await self.get_response(request)
+        return self.scope_stream(response, company_id)
+
+    # Streaming bodies run their queries after the view has returned, so each chunk is produced
+    # inside the tenant scope again
+    def scope_stream(self, response, company_id):
+        if response.streaming and company_id is not None:
+            chunks = response.streaming_content
+            if response.is_async:
+                response.streaming_content = _ascoped_chunks(chunks, company_id)
+            else:
+                response.streaming_content = _scoped_chunks(chunks, company_id)
+        return response
+
+
+def _scoped_chunks(chunks, company_id):
+    chunks = iter(chunks)
+    while True:
+        # Set and reset around each step, never across a yield
+        with tenant(company_id):
+            chunk = next(chunks, None)
+        if chunk is None:
+            return
+        yield chunk
+
+
+async def _ascoped_chunks(chunks, company_id):
+    chunks = aiter(chunks)
+    while True:
+        with tenant(company_id):
+            chunk = await anext(chunks, None)
+        if chunk is None:
+            return
+        yield chunk
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="address",
+            index=models.Index(fields=["city"], name="address_city_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="address",
+            index=models.Index(fields=["postal_code"], name="address_postal_code_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="customer",
+            index=models.Index(
+                fields=["account_status"], name="customer_account_status_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="fireextinguisher",
+            index=models.Index(fields=["expiry_date"], name="fireext_expiry_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="fireextinguisher",
+            index=models.Index(
+                fields=["inspection_date"], name="fireext_inspection_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["status", "order_date"], name="order_status_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                condition=models.Q(("status", "Pending")),
+                fields=["order_date"],
+                name="order_pending_date_idx",
+            ),
+        ),
+    ]
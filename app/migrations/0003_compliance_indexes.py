@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:55
+
+import app.expressions
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0002_planned_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="fireextinguisher",
+            index=models.Index(
+                fields=["service_date"], name="fireext_service_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="fireextinguisher",
+            index=models.Index(
+                app.expressions.AddMonths("manufacture_date", "warranty_period"),
+                name="fireext_warranty_expiry_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0003_compliance_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SalesRollupDirtyDay",
+            fields=[
+                ("day", models.DateField(primary_key=True, serialize=False)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="DailySalesRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                (
+                    "fire_extinguisher_type",
+                    models.CharField(
+                        choices=[
+                            ("Water", "Water"),
+                            ("Water Mist", "Water Mist"),
+                            ("Foam", "Foam"),
+                            ("CO2", "CO2"),
+                            ("Powder", "Powder"),
+                            ("Wet Chemical", "Wet Chemical"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("Pending", "Pending"),
+                            ("Completed", "Completed"),
+                            ("Cancelled", "Cancelled"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("revenue", models.DecimalField(decimal_places=2, max_digits=14)),
+                ("units", models.PositiveIntegerField()),
+                ("order_count", models.PositiveIntegerField()),
+                (
+                    "customer",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="sales_rollups",
+                        to="app.customer",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["customer", "day"], name="sales_rollup_customer_day_idx"
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("day", "customer", "fire_extinguisher_type", "status"),
+                        name="sales_rollup_unique_key",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,71 @@
+from django.db import migrations
+
+# Weighted tsvector columns maintained by PostgreSQL itself (STORED generated columns),
+# so every write path, including bulk_create/update() and raw SQL, keeps them current
+SEARCH_VECTORS = {
+    "app_customer": (
+        "customer_search_idx",
+        ("name", "contact_person", "contact_email"),
+    ),
+    "app_fireextinguisher": (
+        "fireext_search_idx",
+        ("name", "batch_number", "description"),
+    ),
+}
+
+TRIGRAM_INDEXES = {
+    "customer_name_trgm_idx": ("app_customer", "name"),
+    "customer_email_trgm_idx": ("app_customer", "contact_email"),
+    "fireext_name_trgm_idx": ("app_fireextinguisher", "name"),
+    "fireext_batch_trgm_idx": ("app_fireextinguisher", "batch_number"),
+}
+
+
+def _vector_sql(columns):
+    return " || ".join(
+        f"setweight(to_tsvector('simple', coalesce({column}, '')), '{weight}')"
+        for column, weight in zip(columns, "ABC")
+    )
+
+
+def create_search_indexes(apps, schema_editor):
+    # SQLite dev databases use the in-process index in app/search.py instead
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for table, (index_name, columns) in SEARCH_VECTORS.items():
+        schema_editor.execute(
+            f"ALTER TABLE {table} ADD COLUMN search_vector tsvector "
+            f"GENERATED ALWAYS AS ({_vector_sql(columns)}) STORED"
+        )
+        schema_editor.execute(
+            f"CREATE INDEX {index_name} ON {table} USING gin (search_vector)"
+        )
+    for index_name, (table, column) in TRIGRAM_INDEXES.items():
+        schema_editor.execute(
+            f"CREATE INDEX {index_name} ON {table} USING gin ({column} gin_trgm_ops)"
+        )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    for index_name in TRIGRAM_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {index_name}")
+    for table in SEARCH_VECTORS:
+        schema_editor.execute(
+            f"ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0004_sales_rollups"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
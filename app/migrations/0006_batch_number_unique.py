@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0005_search_indexes"),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="fireextinguisher",
+            constraint=models.UniqueConstraint(
+                fields=("batch_number",), name="fireext_batch_number_uniq"
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0006_batch_number_unique"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="company",
+            name="image_variants",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
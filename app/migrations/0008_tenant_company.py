@@ -0,0 +1,129 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0007_company_image_variants"),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name="fireextinguisher",
+            name="fireext_batch_number_uniq",
+        ),
+        migrations.AddField(
+            model_name="customer",
+            name="company",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="customers",
+                to="app.company",
+            ),
+        ),
+        migrations.AddField(
+            model_name="dailysalesrollup",
+            name="company",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="sales_rollups",
+                to="app.company",
+            ),
+        ),
+        migrations.AddField(
+            model_name="fireextinguisher",
+            name="company",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="fire_extinguishers",
+                to="app.company",
+            ),
+        ),
+        migrations.AddField(
+            model_name="order",
+            name="company",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="orders",
+                to="app.company",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="customer",
+            index=models.Index(
+                fields=["company", "id"], name="customer_company_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="customer",
+            index=models.Index(
+                fields=["company", "account_status", "id"],
+                name="customer_company_status_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="dailysalesrollup",
+            index=models.Index(
+                fields=["company", "day"], name="sales_rollup_company_day_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="fireextinguisher",
+            index=models.Index(
+                fields=["company", "expiry_date"], name="fireext_company_expiry_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="fireextinguisher",
+            index=models.Index(
+                fields=["company", "inspection_date"],
+                name="fireext_company_inspection_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="fireextinguisher",
+            index=models.Index(
+                fields=["company", "service_date"], name="fireext_company_service_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(fields=["company", "id"], name="order_company_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["company", "status", "order_date"],
+                name="order_company_status_date_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                condition=models.Q(("status", "Pending")),
+                fields=["company", "order_date"],
+                name="order_company_pending_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="fireextinguisher",
+            constraint=models.UniqueConstraint(
+                fields=("company", "batch_number"), name="fireext_company_batch_uniq"
+            ),
+        ),
+    ]
@@ -0,0 +1,114 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:26
+
+from django.db import migrations, models
+
+# Feed name -> table, as in app.changes.TRACKED_MODELS
+TRACKED_TABLES = {
+    "address": "app_address",
+    "customer": "app_customer",
+    "fire_extinguisher": "app_fireextinguisher",
+    "order": "app_order",
+    "order_item": "app_orderitem",
+}
+
+
+# Existing rows enter the log as creates, so a consumer starting from seq 0 sees every row once.
+# The triggers themselves are installed after migrate (app.changes.install_triggers).
+def backfill_change_log(apps, schema_editor):
+    quote = schema_editor.quote_name
+    for name, table in TRACKED_TABLES.items():
+        schema_editor.execute(
+            f"INSERT INTO app_change (model, object_id, action, changed_at) "
+            f"SELECT '{name}', id, 'create', CURRENT_TIMESTAMP FROM {quote(table)} ORDER BY id"
+        )
+        schema_editor.execute(
+            f"UPDATE {quote(table)} SET change_seq = app_change.seq FROM app_change "
+            f"WHERE app_change.model = '{name}' AND app_change.object_id = {quote(table)}.id"
+        )
+
+
+def remove_change_triggers(apps, schema_editor):
+    from app.changes import drop_triggers
+
+    drop_triggers(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0009_order_claims"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Change",
+            fields=[
+                ("seq", models.BigAutoField(primary_key=True, serialize=False)),
+                ("model", models.CharField(max_length=50)),
+                ("object_id", models.BigIntegerField()),
+                (
+                    "action",
+                    models.CharField(
+                        choices=[
+                            ("create", "create"),
+                            ("update", "update"),
+                            ("delete", "delete"),
+                        ],
+                        max_length=6,
+                    ),
+                ),
+                ("changed_at", models.DateTimeField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name="address",
+            name="change_seq",
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="address",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="customer",
+            name="change_seq",
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="customer",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="fireextinguisher",
+            name="change_seq",
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="fireextinguisher",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="order",
+            name="change_seq",
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="order",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="orderitem",
+            name="change_seq",
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="orderitem",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(backfill_change_log, remove_change_triggers),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:35
+
+import app.expressions
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0010_change_log"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="fireextinguisher",
+            name="fireext_inspection_date_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="fireextinguisher",
+            name="fireext_service_date_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="fireextinguisher",
+            name="fireext_company_inspection_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="fireextinguisher",
+            name="fireext_company_service_idx",
+        ),
+        migrations.AddIndex(
+            model_name="fireextinguisher",
+            index=models.Index(
+                app.expressions.AddMonths("inspection_date", 12),
+                name="fireext_inspection_due_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="fireextinguisher",
+            index=models.Index(
+                app.expressions.AddMonths("service_date", 60),
+                name="fireext_service_due_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="fireextinguisher",
+            index=models.Index(
+                models.F("company"),
+                app.expressions.AddMonths("inspection_date", 12),
+                name="fireext_company_inspection_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="fireextinguisher",
+            index=models.Index(
+                models.F("company"),
+                app.expressions.AddMonths("service_date", 60),
+                name="fireext_company_service_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,35 @@
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+# Rows written before 0008 have no company and are visible to system admins only. A single-company
+# install gets all of them; orders and sales rollups follow their customer. On a multi-company
+# install, customers and fire extinguishers left without a company must be assigned by hand
+# (UPDATE app_customer / app_fireextinguisher SET company_id = ...) and this migration re-run
+# (migrate app 0011 && migrate app) so their orders and rollups follow.
+def backfill_company(apps, schema_editor):
+    Company = apps.get_model("app", "Company")
+    Customer = apps.get_model("app", "Customer")
+    FireExtinguisher = apps.get_model("app", "FireExtinguisher")
+    Order = apps.get_model("app", "Order")
+    DailySalesRollup = apps.get_model("app", "DailySalesRollup")
+
+    companies = list(Company.objects.values_list("id", flat=True)[:2])
+    if len(companies) == 1:
+        for model in (Customer, FireExtinguisher):
+            model.objects.filter(company=None).update(company_id=companies[0])
+
+    customer_company = Subquery(Customer.objects.filter(id=OuterRef("customer_id")).values("company_id"))
+    for model in (Order, DailySalesRollup):
+        model.objects.filter(company=None).exclude(customer__company=None).update(company_id=customer_company)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0011_compliance_due_dates"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_company, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0012_backfill_company"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="change",
+            name="horizon",
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -1,5 +1,11 @@
+from django.conf import settings
 from django.db import models
+from django.db.models import Count, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from datetime import date
+from decimal import Decimal
+from .expressions import AddMonths
+from .tenancy import TenantManager, TenantQuerySet
 
 
 
@@ -10,6 +16,15 @@ class Address(models.Model):
     state = models.CharField(max_length=100)
     postal_code = models.CharField(max_length=20)
     country = models.CharField(max_length=100)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Sequence number of the row's latest entry in the change log, set by the database (see app/changes.py)
+    change_seq = models.BigIntegerField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['city'], name='address_city_idx'),
+            models.Index(fields=['postal_code'], name='address_postal_code_idx'),
+        ]
 
     def __str__(self):
         return f"{self.street}, {self.city}, {self.state}, {self.country}"
@@ -21,6 +36,8 @@ class Company(models.Model):
     email = models.EmailField(blank=True, null=True)
     location = models.ForeignKey(Address, on_delete=models.SET_NULL, null=True)
     image = models.ImageField(upload_to='company_images/', blank=True, null=True)
+    # Variant name -> stored WebP file, filled in by the background resize job (see app/images.py)
+    image_variants = models.JSONField(default=dict, blank=True)
 
     def __str__(self):
         return self.name
@@ -53,11 +70,39 @@ class Customer(models.Model):
     shipping_address = models.ForeignKey(Address, related_name="shipping_address", on_delete=models.SET_NULL, null=True)
     account_status = models.CharField(max_length=10, choices=[('active', 'Active'), ('inactive', 'Inactive')], default='active')
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    change_seq = models.BigIntegerField(null=True, blank=True, editable=False)
+    # Owning tenant; indexed through the composite (company, ...) indexes below
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='customers', null=True, blank=True, db_index=False)
+
+    objects = TenantManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['account_status'], name='customer_account_status_idx'),
+            models.Index(fields=['company', 'id'], name='customer_company_id_idx'),
+            models.Index(fields=['company', 'account_status', 'id'], name='customer_company_status_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
 
+# Next due dates of a fire extinguisher, computed by the database. The compliance sweep filters and
+# orders on them, and each one has an index over the same expression.
+def inspection_due_date():
+    return AddMonths('inspection_date', settings.INSPECTION_INTERVAL_MONTHS)
+
+
+def service_due_date():
+    return AddMonths('service_date', settings.SERVICE_INTERVAL_MONTHS)
+
+
+def warranty_expiry_date():
+    return AddMonths('manufacture_date', 'warranty_period')
+
+
 # Fire Extinguisher Model
 class FireExtinguisher(models.Model):
     TYPE_CHOICES = [
@@ -120,15 +165,60 @@ class FireExtinguisher(models.Model):
     batch_number = models.CharField(max_length=100, blank=True, null=True)
     warranty_period = models.PositiveIntegerField(help_text="Warranty period in months")
     discount = models.DecimalField(max_digits=5, decimal_places=2, default=0.0)
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='fire_extinguishers', null=True, blank=True, db_index=False)
+    updated_at = models.DateTimeField(auto_now=True)
+    change_seq = models.BigIntegerField(null=True, blank=True, editable=False)
+
+    objects = TenantManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['expiry_date'], name='fireext_expiry_date_idx'),
+            models.Index(inspection_due_date(), name='fireext_inspection_due_idx'),
+            models.Index(service_due_date(), name='fireext_service_due_idx'),
+            models.Index(warranty_expiry_date(), name='fireext_warranty_expiry_idx'),
+            models.Index(fields=['company', 'expiry_date'], name='fireext_company_expiry_idx'),
+            models.Index(F('company'), inspection_due_date(), name='fireext_company_inspection_idx'),
+            models.Index(F('company'), service_due_date(), name='fireext_company_service_idx'),
+        ]
+        constraints = [
+            # Supplier catalogs are upserted on their batch number within a company (see app/catalog.py);
+            # the index also serves every per-company product lookup
+            models.UniqueConstraint(fields=['company', 'batch_number'], name='fireext_company_batch_uniq'),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.type})"
 
 
+# Order QuerySet computing totals from the order items in the database
+class OrderQuerySet(TenantQuerySet):
+    def with_totals(self):
+        return self.annotate(
+            computed_total=Coalesce(
+                Sum(F('items__quantity') * F('items__price_per_unit')),
+                Value(Decimal('0.00')),
+                output_field=models.DecimalField(max_digits=12, decimal_places=2),
+            ),
+            line_count=Count('items'),
+        )
+
+    def refresh_totals(self):
+        item_totals = (
+            OrderItem.objects.filter(order=OuterRef('pk'))
+            .values('order')
+            .annotate(total=Sum(F('quantity') * F('price_per_unit')))
+            .values('total')
+        )
+        return self.update(total_amount=Coalesce(Subquery(item_totals), Value(Decimal('0.00'))))
+
+
 # Order Model
 class Order(models.Model):
     STATUS_CHOICES = [
         ('Pending', 'Pending'),
+        ('Processing', 'Processing'),
         ('Completed', 'Completed'),
         ('Cancelled', 'Cancelled'),
     ]
@@ -136,6 +226,28 @@ class Order(models.Model):
     order_date = models.DateField(auto_now_add=True)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='Pending')
     total_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='orders', null=True, blank=True, db_index=False)
+    # Set when a fulfilment worker claims the order (see app/services.py)
+    claimed_by = models.CharField(max_length=100, blank=True, null=True)
+    claimed_at = models.DateTimeField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    change_seq = models.BigIntegerField(null=True, blank=True, editable=False)
+
+    objects = TenantManager.from_queryset(OrderQuerySet)()
+    all_objects = OrderQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'order_date'], name='order_status_date_idx'),
+            # Only pending orders are polled by dashboards and claimed oldest first by fulfilment workers,
+            # so keep that index small
+            models.Index(fields=['order_date', 'id'], condition=models.Q(status='Pending'), name='order_pending_date_idx'),
+            models.Index(fields=['company', 'id'], name='order_company_id_idx'),
+            models.Index(fields=['company', 'status', 'order_date'], name='order_company_status_date_idx'),
+            models.Index(
+                fields=['company', 'order_date', 'id'], condition=models.Q(status='Pending'), name='order_company_pending_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"Order {self.order_id} - {self.status}"
@@ -146,6 +258,65 @@ class OrderItem(models.Model):
     fire_extinguisher = models.ForeignKey(FireExtinguisher, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField()
     price_per_unit = models.DecimalField(max_digits=10, decimal_places=2)
+    updated_at = models.DateTimeField(auto_now=True)
+    change_seq = models.BigIntegerField(null=True, blank=True, editable=False)
 
     def __str__(self):
         return f"{self.quantity} x {self.fire_extinguisher.name}"
+
+
+# Daily sales rollup: one row per day, customer, fire extinguisher type and order status
+class DailySalesRollup(models.Model):
+    day = models.DateField()
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='sales_rollups')
+    fire_extinguisher_type = models.CharField(max_length=20, choices=FireExtinguisher.TYPE_CHOICES)
+    status = models.CharField(max_length=10, choices=Order.STATUS_CHOICES)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2)
+    units = models.PositiveIntegerField()
+    order_count = models.PositiveIntegerField()
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='sales_rollups', null=True, blank=True, db_index=False)
+
+    objects = TenantManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'customer', 'fire_extinguisher_type', 'status'], name='sales_rollup_unique_key'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['customer', 'day'], name='sales_rollup_customer_day_idx'),
+            models.Index(fields=['company', 'day'], name='sales_rollup_company_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.customer_id} {self.fire_extinguisher_type} {self.status}"
+
+
+# Days whose orders changed since their rollup rows were last rebuilt
+class SalesRollupDirtyDay(models.Model):
+    day = models.DateField(primary_key=True)
+
+    def __str__(self):
+        return str(self.day)
+
+
+# Append-only change log of Address, Customer, FireExtinguisher, Order and OrderItem writes. Rows are
+# written by database triggers in the writing transaction, so every write path is covered (see app/changes.py)
+class Change(models.Model):
+    ACTION_CHOICES = [
+        ('create', 'create'),
+        ('update', 'update'),
+        ('delete', 'delete'),
+    ]
+    seq = models.BigAutoField(primary_key=True)
+    model = models.CharField(max_length=50)
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=6, choices=ACTION_CHOICES)
+    changed_at = models.DateTimeField()
+    # PostgreSQL only: the next transaction id when the entry was written (see app/changes.py)
+    horizon = models.BigIntegerField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.seq} {self.action} {self.model} {self.object_id}"
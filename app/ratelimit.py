@@ -0,0 +1,51 @@
+import hashlib
+import math
+import time
+from django.conf import settings
+from django.core.cache import cache
+
+RATE_LIMIT_KEY = "ratelimit:{}:{}"
+
+
+# Token bucket kept in the shared cache as (tokens, updated_at): up to `capacity` attempts in a burst,
+# refilled at `per_minute` attempts a minute. The read-modify-write is not atomic, so concurrent
+# requests for the same key may each get a token they would not have got one by one; good enough
+# to stop bursts, which is all this is for.
+class TokenBucket:
+    def __init__(self, scope, capacity, per_minute):
+        self.scope = scope
+        self.capacity = capacity
+        self.rate = per_minute / 60
+
+    def _key(self, identity):
+        # Usernames and IPs are hashed so any input makes a valid, fixed-length cache key
+        return RATE_LIMIT_KEY.format(self.scope, hashlib.sha256(identity.encode()).hexdigest()[:32])
+
+    def _take(self, state, now):
+        tokens, updated_at = state or (self.capacity, now)
+        tokens = min(self.capacity, tokens + (now - updated_at) * self.rate)
+        if tokens >= 1:
+            return (tokens - 1, now), 0
+        return (tokens, now), math.ceil((1 - tokens) / self.rate)
+
+    # Spend one token; returns 0 when allowed, otherwise the seconds until the next token
+    def take(self, identity):
+        key, now = self._key(identity), time.time()
+        state, retry_after = self._take(cache.get(key), now)
+        cache.set(key, state, math.ceil(self.capacity / self.rate))
+        return retry_after
+
+    async def atake(self, identity):
+        key, now = self._key(identity), time.time()
+        state, retry_after = self._take(await cache.aget(key), now)
+        await cache.aset(key, state, math.ceil(self.capacity / self.rate))
+        return retry_after
+
+
+def client_ip(request):
+    # Behind a trusted proxy the client is the last address that proxy appended
+    if settings.RATE_LIMIT_TRUST_X_FORWARDED_FOR:
+        forwarded = request.headers.get("X-Forwarded-For", "").rsplit(",", 1)[-1].strip()
+        if forwarded:
+            return forwarded
+    return request.META.get("REMOTE_ADDR", "")
@@ -0,0 +1,81 @@
+from decimal import Decimal
+from django.db import connection, transaction
+from django.db.models import Count, F, Sum
+from .models import DailySalesRollup, OrderItem, SalesRollupDirtyDay
+
+ROLLUP_DIMENSIONS = {
+    "day": "day",
+    "customer": "customer_id",
+    "type": "fire_extinguisher_type",
+    "status": "status",
+}
+CENTS = Decimal("0.01")
+
+
+def _insert_markers(days):
+    SalesRollupDirtyDay.objects.bulk_create([SalesRollupDirtyDay(day=day) for day in days], ignore_conflicts=True)
+
+
+# The insert can find a marker that a running refresh_day is about to delete, and that refresh cannot see
+# this transaction's rows yet; marking the days again once they are committed keeps them for the next refresh
+def mark_days_dirty(*days):
+    days = set(days)
+    _insert_markers(days)
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: _insert_markers(days))
+
+
+# Rebuild the rollup rows of one day, for every company, from its order items in a single aggregate query.
+# The dirty marker is cleared first, so a write that lands while the day is rebuilt marks it again.
+def refresh_day(day):
+    with transaction.atomic():
+        SalesRollupDirtyDay.objects.filter(day=day).delete()
+        DailySalesRollup.all_objects.filter(day=day).delete()
+        totals = (
+            OrderItem.objects.filter(order__order_date=day)
+            .values(
+                "order__company_id", "order__customer_id", "fire_extinguisher__fire_extinguisher_type", "order__status"
+            )
+            .annotate(
+                revenue=Sum(F("quantity") * F("price_per_unit")),
+                units=Sum("quantity"),
+                order_count=Count("order_id", distinct=True),
+            )
+        )
+        return len(DailySalesRollup.all_objects.bulk_create([
+            DailySalesRollup(
+                day=day,
+                company_id=row["order__company_id"],
+                customer_id=row["order__customer_id"],
+                fire_extinguisher_type=row["fire_extinguisher__fire_extinguisher_type"],
+                status=row["order__status"],
+                revenue=row["revenue"],
+                units=row["units"],
+                order_count=row["order_count"],
+            )
+            for row in totals
+        ]))
+
+
+def refresh_dirty_days():
+    days = list(SalesRollupDirtyDay.objects.order_by("day").values_list("day", flat=True))
+    for day in days:
+        refresh_day(day)
+    return days
+
+
+# Totals over a date range, answered from the rollup rows alone. Summed across types, order_count
+# counts an order once for each fire extinguisher type it contains.
+def sales_report(start, end, group_by=("day",), customer_id=None):
+    rollups = DailySalesRollup.objects.filter(day__range=(start, end))
+    if customer_id is not None:
+        rollups = rollups.filter(customer_id=customer_id)
+    columns = [ROLLUP_DIMENSIONS[dimension] for dimension in group_by]
+    rows = list(
+        rollups.values(*columns)
+        .annotate(revenue=Sum("revenue"), units=Sum("units"), order_count=Sum("order_count"))
+        .order_by(*columns)
+    )
+    for row in rows:
+        row["revenue"] = row["revenue"].quantize(CENTS)
+    return rows
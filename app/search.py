@@ -0,0 +1,106 @@
+import re
+import threading
+from bisect import bisect_left
+from django.db import connection
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+from .models import Change, Customer, FireExtinguisher
+from .serializers import CUSTOMER_SUGGESTION, PRODUCT_SUGGESTION
+from .tenancy import current_company
+
+# target -> (model, row spec, searched fields in weight order); must match migration 0005
+SEARCH_TARGETS = {
+    "customers": (Customer, CUSTOMER_SUGGESTION, ("name", "contact_person", "contact_email")),
+    "products": (FireExtinguisher, PRODUCT_SUGGESTION, ("name", "batch_number", "description")),
+}
+MAX_SEARCH_TERMS = 8
+
+_TERM = re.compile(r"\w+")
+
+
+def search_terms(query):
+    return _TERM.findall(query.lower())[:MAX_SEARCH_TERMS]
+
+
+def _postgres_ids(model, terms, query, limit):
+    # Every term is a prefix (typeahead); the trigram match on name catches typos and partial words
+    table = connection.ops.quote_name(model._meta.db_table)
+    tsquery = " & ".join(f"{term}:*" for term in terms)
+    name_prefix = re.sub(r"([\\%_])", r"\\\1", query) + "%"
+    matches = RawSQL(
+        f"{table}.search_vector @@ to_tsquery('simple', %s) OR {table}.name ILIKE %s OR {table}.name %% %s",
+        (tsquery, name_prefix, query),
+        output_field=BooleanField(),
+    )
+    rank = RawSQL(
+        f"ts_rank({table}.search_vector, to_tsquery('simple', %s)) + similarity({table}.name, %s)",
+        (tsquery, query),
+        output_field=FloatField(),
+    )
+    ranked = model.objects.filter(matches).alias(rank=rank).order_by("-rank", "id")
+    return list(ranked.values_list("id", flat=True)[:limit])
+
+
+# In-process prefix index for SQLite dev runs: one sorted (token, weight, id) list per model,
+# rebuilt on the first search after any write
+class PrefixIndex:
+    def __init__(self, rows):
+        entries = set()
+        for pk, *texts in rows:
+            for weight, text in enumerate(texts):
+                for token in _TERM.findall((text or "").lower()):
+                    entries.add((token, weight, pk))
+        self.entries = sorted(entries)
+        self.tokens = [token for token, _, _ in self.entries]
+
+    def _prefix_matches(self, term):
+        best = {}
+        start, end = bisect_left(self.tokens, term), bisect_left(self.tokens, term + "\U0010ffff")
+        for _, weight, pk in self.entries[start:end]:
+            if weight < best.get(pk, len(self.entries)):
+                best[pk] = weight
+        return best
+
+    def search(self, terms, limit):
+        scores = None
+        for term in terms:
+            matches = self._prefix_matches(term)
+            if scores is None:
+                scores = matches
+            else:
+                scores = {pk: score + matches[pk] for pk, score in scores.items() if pk in matches}
+            if not scores:
+                return []
+        return [pk for pk, _ in sorted(scores.items(), key=lambda item: (item[1], item[0]))[:limit]]
+
+
+# (model, company id) -> (change log position, PrefixIndex), one per tenant since model.objects is
+# tenant-scoped. Every write reaches the change log through its triggers, including queryset
+# update(), bulk_create() and bulk_update(), so an index built before the latest entry is rebuilt.
+_fallback_indexes = {}
+_fallback_lock = threading.Lock()
+
+
+def _fallback_ids(model, fields, terms, limit):
+    key = (model, current_company())
+    position = Change.objects.order_by("-seq").values_list("seq", flat=True).first()
+    with _fallback_lock:
+        built_at, index = _fallback_indexes.get(key, (None, None))
+        if index is None or built_at != position:
+            index = PrefixIndex(model.objects.values_list("id", *fields).iterator())
+            _fallback_indexes[key] = (position, index)
+    return index.search(terms, limit)
+
+
+def search(target, query, limit):
+    model, spec, fields = SEARCH_TARGETS[target]
+    terms = search_terms(query)
+    if not terms:
+        return []
+
+    if connection.vendor == "postgresql":
+        ids = _postgres_ids(model, terms, query.strip(), limit)
+    else:
+        ids = _fallback_ids(model, fields, terms, limit)
+    rows = {row["id"]: row for row in spec.rows(model.objects.filter(id__in=ids))}
+    return [rows[pk] for pk in ids if pk in rows]
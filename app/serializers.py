@@ -0,0 +1,182 @@
+import csv
+import datetime
+import io
+import json
+from itertools import islice
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+
+# Declarative row spec: the ORM lookups to read with values_list(), in output order.
+# Related lookups become flat keys, e.g. customer__name is emitted as customer_name.
+class FieldSpec:
+    def __init__(self, *lookups):
+        self.lookups = lookups
+        self.keys = tuple(lookup.replace("__", "_") for lookup in lookups)
+
+    def row(self, values):
+        return dict(zip(self.keys, values))
+
+    def rows(self, queryset, limit=None, chunk_size=None):
+        values = queryset.values_list(*self.lookups)
+        if limit is not None:
+            values = values[:limit]
+        if chunk_size is not None:
+            values = values.iterator(chunk_size=chunk_size)
+        keys = self.keys
+        return (dict(zip(keys, row)) for row in values)
+
+    async def arows(self, queryset, limit=None, chunk_size=None):
+        values = queryset.values_list(*self.lookups)
+        if limit is not None:
+            values = values[:limit]
+        keys = self.keys
+        if chunk_size is None:
+            async for row in values:
+                yield dict(zip(keys, row))
+            return
+
+        # QuerySet.aiterator() runs the values_list() query on the event loop, so drive the
+        # chunked iterator from the database thread instead, one chunk per hop
+        rows = None
+
+        def next_chunk():
+            nonlocal rows
+            if rows is None:
+                rows = values.iterator(chunk_size=chunk_size)
+            return list(islice(rows, chunk_size))
+
+        while chunk := await sync_to_async(next_chunk)():
+            for row in chunk:
+                yield dict(zip(keys, row))
+
+    async def afirst(self, queryset):
+        async for row in self.arows(queryset, limit=1):
+            return row
+        return None
+
+
+ADDRESS = FieldSpec("id", "street", "city", "state", "country", "postal_code")
+CUSTOMER = FieldSpec(
+    "id",
+    "name",
+    "contact_person",
+    "contact_email",
+    "contact_phone",
+    "address_id",
+    "billing_address_id",
+    "shipping_address_id",
+    "account_status",
+    "created_at",
+)
+FIRE_EXTINGUISHER = FieldSpec(
+    "id",
+    "name",
+    "description",
+    "fire_extinguisher_type",
+    "fire_class",
+    "certification",
+    "standards_compliance",
+    "capacity",
+    "inspection_date",
+    "service_date",
+    "expiry_date",
+    "manufacture_date",
+    "inventory",
+    "batch_number",
+    "warranty_period",
+    "discount",
+)
+CUSTOMER_SUGGESTION = FieldSpec("id", "name", "contact_person", "contact_email")
+PRODUCT_SUGGESTION = FieldSpec("id", "name", "fire_extinguisher_type", "batch_number", "inventory")
+ORDER = FieldSpec(
+    "id", "customer_id", "customer__name", "order_date", "status", "total_amount", "computed_total", "line_count"
+)
+ORDER_EXPORT = FieldSpec(
+    "id",
+    "order_date",
+    "status",
+    "total_amount",
+    "customer_id",
+    "customer__name",
+    "customer__contact_email",
+    "customer__billing_address__street",
+    "customer__billing_address__city",
+    "customer__billing_address__state",
+    "customer__billing_address__postal_code",
+    "customer__billing_address__country",
+    "items__id",
+    "items__fire_extinguisher_id",
+    "items__fire_extinguisher__name",
+    "items__fire_extinguisher__batch_number",
+    "items__quantity",
+    "items__price_per_unit",
+)
+ORDER_ITEM = FieldSpec("id", "order_id", "fire_extinguisher_id", "fire_extinguisher__name", "quantity", "price_per_unit")
+
+
+# Encodes what neither json nor orjson handle natively (decimals as strings, UUIDs, durations). Times
+# keep their microseconds and UTC is written as Z, as orjson does (DjangoJSONEncoder cuts them to
+# milliseconds), so the API output is the same with or without orjson installed.
+class _Encoder(DjangoJSONEncoder):
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            value = o.isoformat()
+            return value[:-6] + "Z" if value.endswith("+00:00") else value
+        return super().default(o)
+
+
+_encoder = _Encoder(separators=(",", ":"), ensure_ascii=False)
+
+
+def _stdlib_dumps(data):
+    return _encoder.encode(data).encode()
+
+
+if orjson is not None:
+    # Dates and datetimes are encoded natively (ISO 8601, UTC as Z); decimals fall back to
+    # the encoder above and are emitted as strings, the same as with the stdlib encoder
+    def dumps(data):
+        return orjson.dumps(data, default=_encoder.default, option=orjson.OPT_UTC_Z)
+
+    loads = orjson.loads
+else:
+    dumps = _stdlib_dumps
+    loads = json.loads
+
+
+# Drop-in for django.http.JsonResponse that encodes with the fastest available encoder
+class JsonResponse(HttpResponse):
+    def __init__(self, data, **kwargs):
+        kwargs.setdefault("content_type", "application/json")
+        super().__init__(content=dumps(data), **kwargs)
+
+
+def _batches(rows, size):
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+# Encode an iterable of row dicts as CSV (with a header) or NDJSON, one bytes chunk per batch of rows
+def encode_rows(rows, output_format, fieldnames, chunk_size):
+    if output_format == "csv":
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=fieldnames)
+        writer.writeheader()
+        for batch in _batches(rows, chunk_size):
+            writer.writerows(batch)
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode()
+    else:
+        for batch in _batches(rows, chunk_size):
+            yield b"".join(dumps(row) + b"\n" for row in batch)
@@ -0,0 +1,140 @@
+from decimal import Decimal
+from django.db import models, transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+from .models import Customer, FireExtinguisher, Order, OrderItem
+from .rollups import mark_days_dirty
+
+# Legal status moves; a claimed (Processing) order can be handed back to the queue
+ORDER_TRANSITIONS = {
+    "Pending": {"Processing", "Cancelled"},
+    "Processing": {"Pending", "Completed", "Cancelled"},
+    "Completed": set(),
+    "Cancelled": set(),
+}
+MAX_CLAIM_BATCH = 100
+
+
+class InsufficientInventory(Exception):
+    def __init__(self, shortages):
+        super().__init__("Insufficient inventory")
+        self.shortages = shortages
+
+
+class IllegalTransition(Exception):
+    pass
+
+
+def _shortages(quantities, available):
+    return [
+        {
+            "fire_extinguisher_id": fire_extinguisher_id,
+            "requested": quantity,
+            "available": available.get(fire_extinguisher_id, 0),
+        }
+        for fire_extinguisher_id, quantity in sorted(quantities.items())
+        if available.get(fire_extinguisher_id, 0) < quantity
+    ]
+
+
+# Place an order and reserve its stock in one transaction.
+# lines is a list of (fire_extinguisher_id, quantity, price_per_unit) tuples; repeated products are merged.
+# The product rows are locked in id order so concurrent orders over the same products can never deadlock,
+# and the stock is then taken for every line in a single guarded UPDATE. The order belongs to the customer's company.
+def place_order(customer_id, lines):
+    quantities = {}
+    for fire_extinguisher_id, quantity, _ in lines:
+        if quantity < 1:
+            raise ValueError("'quantity' must be a positive integer")
+        quantities[fire_extinguisher_id] = quantities.get(fire_extinguisher_id, 0) + quantity
+    if not quantities:
+        raise ValueError("An order needs at least one item")
+
+    with transaction.atomic():
+        customer = Customer.objects.filter(id=customer_id).values("company_id").first()
+        if customer is None:
+            raise Customer.DoesNotExist(f"Customer with ID {customer_id} not found")
+
+        available = dict(
+            FireExtinguisher.objects.select_for_update()
+            .filter(id__in=quantities)
+            .order_by("id")
+            .values_list("id", "inventory")
+        )
+        shortages = _shortages(quantities, available)
+        if shortages:
+            raise InsufficientInventory(shortages)
+
+        # The inventory >= requested guard keeps this safe on backends without row locks
+        requested = Case(
+            *[When(id=fire_extinguisher_id, then=Value(quantity)) for fire_extinguisher_id, quantity in quantities.items()],
+            output_field=models.PositiveIntegerField(),
+        )
+        reserved = FireExtinguisher.objects.filter(id__in=quantities, inventory__gte=requested).update(
+            inventory=F("inventory") - requested
+        )
+        if reserved != len(quantities):
+            available = dict(FireExtinguisher.objects.filter(id__in=quantities).values_list("id", "inventory"))
+            raise InsufficientInventory(_shortages(quantities, available))
+
+        order = Order.objects.create(
+            customer_id=customer_id,
+            company_id=customer["company_id"],
+            total_amount=sum((quantity * Decimal(price) for _, quantity, price in lines), Decimal("0.00")),
+        )
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, fire_extinguisher_id=fire_extinguisher_id, quantity=quantity, price_per_unit=price)
+            for fire_extinguisher_id, quantity, price in lines
+        ])
+    return order
+
+
+
+# Move an order to a new status. The UPDATE only matches while the order still has the status it was read
+# with (or `expected`, when the caller states what it last saw), so two concurrent moves can never both
+# apply; the loser gets IllegalTransition. Returns the previous status.
+def transition_order(order_id, status, expected=None):
+    if status not in ORDER_TRANSITIONS:
+        raise ValueError(f"'status' must be one of {', '.join(ORDER_TRANSITIONS)}")
+
+    with transaction.atomic():
+        order = Order.objects.filter(id=order_id).values("status", "order_date").first()
+        if order is None:
+            raise Order.DoesNotExist(f"Order with ID {order_id} not found")
+        current = order["status"]
+        if expected is not None and expected != current:
+            raise IllegalTransition(f"Order {order_id} is {current}, not {expected}")
+        if status not in ORDER_TRANSITIONS[current]:
+            raise IllegalTransition(f"Order {order_id} cannot move from {current} to {status}")
+
+        claim = {"claimed_by": None, "claimed_at": None} if status == "Pending" else {}
+        if not Order.objects.filter(id=order_id, status=current).update(status=status, **claim):
+            raise IllegalTransition(f"Order {order_id} changed status concurrently")
+        # A queryset update sends no post_save, so mark the rollup day here
+        mark_days_dirty(order["order_date"])
+    return current
+
+
+# Claim up to `limit` of the oldest pending orders for `worker` and return their ids.
+# FOR UPDATE SKIP LOCKED passes over rows another worker is claiming at that moment instead of waiting
+# for it, and the partial pending index serves the scan. Backends without row locks (SQLite) serialize
+# the whole claim on the write lock taken at BEGIN, and the status guard on the UPDATE backs both up.
+def claim_orders(worker, limit=10):
+    if not 1 <= limit <= MAX_CLAIM_BATCH:
+        raise ValueError(f"'limit' must be between 1 and {MAX_CLAIM_BATCH}")
+
+    with transaction.atomic():
+        pending = list(
+            Order.objects.select_for_update(skip_locked=True)
+            .filter(status="Pending")
+            .order_by("order_date", "id")
+            .values_list("id", "order_date")[:limit]
+        )
+        if not pending:
+            return []
+        ids = [order_id for order_id, _ in pending]
+        Order.objects.filter(id__in=ids, status="Pending").update(
+            status="Processing", claimed_by=worker, claimed_at=timezone.now()
+        )
+        mark_days_dirty(*(order_date for _, order_date in pending))
+    return ids
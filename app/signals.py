@@ -0,0 +1,49 @@
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_save
+from django.dispatch import receiver
+from .cache import invalidate_address
+from .changes import install_triggers
+from .middleware import install_query_recorder
+from .models import Address, Customer, FireExtinguisher, Order, OrderItem
+from .rollups import mark_days_dirty
+from .tenancy import current_company
+
+
+@receiver(post_save, sender=Address)
+@receiver(post_delete, sender=Address)
+def invalidate_cached_address(sender, instance, **kwargs):
+    invalidate_address(instance.pk)
+
+
+@receiver(pre_save, sender=Customer)
+@receiver(pre_save, sender=FireExtinguisher)
+@receiver(pre_save, sender=Order)
+def assign_current_company(sender, instance, **kwargs):
+    if instance.company_id is None:
+        instance.company_id = current_company()
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+def mark_order_day_dirty(sender, instance, **kwargs):
+    mark_days_dirty(instance.order_date)
+
+
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+def mark_order_item_day_dirty(sender, instance, **kwargs):
+    order_date = Order.objects.filter(id=instance.order_id).values_list("order_date", flat=True).first()
+    if order_date is not None:
+        mark_days_dirty(order_date)
+
+
+@receiver(connection_created)
+def record_connection_queries(sender, connection, **kwargs):
+    install_query_recorder(connection)
+
+
+@receiver(post_migrate)
+def install_change_triggers(sender, app_config, using, **kwargs):
+    if app_config.name == "app":
+        install_triggers(connections[using])
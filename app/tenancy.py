@@ -0,0 +1,43 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.db import models
+
+# The company whose data the current request may see; None means unscoped (system admins and
+# management commands; views over tenant-owned data refuse anonymous calls with jwt_required). A
+# ContextVar, so it follows async views into sync_to_async threads and never leaks between requests
+# served by the same thread.
+_current_company = ContextVar("current_company", default=None)
+
+
+def current_company():
+    return _current_company.get()
+
+
+@contextmanager
+def tenant(company_id):
+    token = _current_company.set(company_id)
+    try:
+        yield
+    finally:
+        _current_company.reset(token)
+
+
+class TenantQuerySet(models.QuerySet):
+    # bulk_create() skips pre_save, so tenant ownership is filled in here
+    def bulk_create(self, objs, *args, **kwargs):
+        company_id = current_company()
+        if company_id is not None:
+            objs = list(objs)
+            for obj in objs:
+                if obj.company_id is None:
+                    obj.company_id = company_id
+        return super().bulk_create(objs, *args, **kwargs)
+
+
+# Default manager of tenant-owned models: every query made through it (and through reverse
+# relations, which derive from it) is filtered to the current company
+class TenantManager(models.Manager.from_queryset(TenantQuerySet)):
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        company_id = current_company()
+        return queryset if company_id is None else queryset.filter(company_id=company_id)
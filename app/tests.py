@@ -1,3 +1,1275 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import tempfile
+import threading
+import time
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock, skipUnless
+from uuid import UUID
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection, transaction
+from django.db.models import BigIntegerField, Value
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import path
+from PIL import Image
+from . import health, images, serializers, tokens, urls as app_urls, views
+from .benchmarks import SCENARIOS, compare, resolve, run_client, seed
+from .cache import ADDRESS_LIST_VERSION_KEY
+from .compliance import SWEEP_REASONS, sweep
+from .models import Address, Change, Company, Customer, FireExtinguisher, Order, OrderItem, SalesRollupDirtyDay, User
+from .rollups import mark_days_dirty, refresh_day, sales_report
+from .services import IllegalTransition, InsufficientInventory, claim_orders, place_order, transition_order
+from .tenancy import tenant
+from .serializers import JsonResponse, dumps, loads
+from .tokens import InvalidToken, issue_token, verify_token
+from .views import MAX_PAGE_SIZE
 
-# Create your tests here.
+
+# Query plan regression tests: the hot filters must be answered from an index, never a full table scan
+class QueryPlanTests(TestCase):
+    def setUp(self):
+        if connection.vendor == "postgresql":
+            # Tiny test tables are always cheaper to scan, so make the planner prefer any usable index
+            with connection.cursor() as cursor:
+                cursor.execute("SET enable_seqscan = off")
+
+    def assertUsesIndex(self, queryset, *index_names):
+        plan = queryset.explain()
+        if connection.vendor == "postgresql":
+            self.assertNotIn("Seq Scan", plan)
+        elif connection.vendor == "sqlite":
+            self.assertNotRegex(plan, r"\bSCAN\b")
+        self.assertTrue(any(name in plan for name in index_names), plan)
+
+    def test_address_lookups(self):
+        self.assertUsesIndex(Address.objects.filter(city="Athens"), "address_city_idx")
+        self.assertUsesIndex(Address.objects.filter(postal_code="10558"), "address_postal_code_idx")
+
+    def test_customer_account_status(self):
+        self.assertUsesIndex(Customer.objects.filter(account_status="active"), "customer_account_status_idx")
+
+    def test_extinguisher_compliance_sweeps(self):
+        self.assertUsesIndex(
+            FireExtinguisher.objects.filter(expiry_date__lte=date(2025, 1, 1)), "fireext_expiry_date_idx"
+        )
+        for reason, index_name in [
+            ("inspection", "fireext_inspection_due_idx"),
+            ("service", "fireext_service_due_idx"),
+            ("warranty", "fireext_warranty_expiry_idx"),
+        ]:
+            self.assertUsesIndex(
+                FireExtinguisher.objects.annotate(due_date=SWEEP_REASONS[reason]())
+                .filter(due_date__lte=date(2025, 1, 1))
+                .order_by("due_date"),
+                index_name,
+            )
+
+    def test_order_dashboards(self):
+        self.assertUsesIndex(
+            Order.objects.filter(status="Completed", order_date__gte=date(2025, 1, 1)), "order_status_date_idx"
+        )
+
+    def test_pending_orders_use_index(self):
+        # SQLite cannot match a bound parameter against the partial index predicate and uses the composite one
+        self.assertUsesIndex(
+            Order.objects.filter(status="Pending").order_by("order_date").values("id"),
+            "order_pending_date_idx",
+            "order_status_date_idx",
+        )
+
+
+class ComplianceSweepTests(TestCase):
+    def add(self, name, inspected, serviced):
+        return FireExtinguisher.objects.create(
+            name=name,
+            fire_extinguisher_type="CO2",
+            fire_class="Class B",
+            certification="EN3",
+            standards_compliance="EN3",
+            capacity=5,
+            inspection_date=inspected,
+            service_date=serviced,
+            expiry_date=date(2035, 1, 1),
+            manufacture_date=date(2025, 1, 1),
+            inventory=1,
+            warranty_period=120,
+        )
+
+    def test_due_dates_follow_the_last_inspection_and_service(self):
+        self.add("Recently checked", date(2025, 12, 1), date(2025, 12, 1))
+        self.add("Inspection due soon", date(2025, 2, 1), date(2025, 12, 1))
+        self.add("Overdue", date(2024, 11, 1), date(2020, 12, 1))
+
+        rows = list(sweep(30, today=date(2026, 1, 15)))
+        self.assertEqual(
+            [(row["name"], row["reason"], row["status"], row["due_date"]) for row in rows],
+            [
+                ("Overdue", "inspection", "overdue", "2025-11-01"),
+                ("Overdue", "service", "overdue", "2025-12-01"),
+                ("Inspection due soon", "inspection", "due", "2026-02-01"),
+            ],
+        )
+
+
+# Stress test for order placement: concurrent orders must never oversell or deadlock
+class OrderPlacementConcurrencyTests(TransactionTestCase):
+    THREADS = 16
+
+    def setUp(self):
+        self.customer = Customer.objects.create(name="Customer", contact_email="customer@example.com")
+        self.products = [
+            FireExtinguisher.objects.create(
+                name=f"Extinguisher {number}",
+                fire_extinguisher_type="CO2",
+                fire_class="Class B",
+                certification="EN3",
+                standards_compliance="EN3",
+                capacity=5,
+                inspection_date=date(2025, 1, 1),
+                service_date=date(2025, 1, 1),
+                expiry_date=date(2030, 1, 1),
+                manufacture_date=date(2024, 1, 1),
+                inventory=20,
+                warranty_period=24,
+            )
+            for number in range(2)
+        ]
+
+    def run_concurrently(self, orders):
+        outcomes = []
+        barrier = threading.Barrier(len(orders))
+
+        def worker(lines):
+            barrier.wait()
+            try:
+                place_order(self.customer.id, lines)
+                outcomes.append("placed")
+            except InsufficientInventory:
+                outcomes.append("short")
+            except OperationalError:
+                outcomes.append("busy")
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(lines,)) for lines in orders]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return outcomes
+
+    def test_concurrent_orders_never_oversell(self):
+        first, second = self.products
+        # Half of the orders list the products in reverse, which deadlocks if locks are not taken in id order
+        lines = [(first.id, 3, "10.00"), (second.id, 3, "10.00")]
+        orders = [lines if number % 2 else lines[::-1] for number in range(self.THREADS)]
+        outcomes = self.run_concurrently(orders)
+
+        placed = outcomes.count("placed")
+        self.assertEqual(len(outcomes), self.THREADS)
+        self.assertNotIn("busy", outcomes)
+        self.assertEqual(placed, 20 // 3)
+        self.assertEqual(Order.objects.count(), placed)
+        for product in self.products:
+            product.refresh_from_db()
+            self.assertEqual(product.inventory, 20 - 3 * placed)
+        self.assertEqual(OrderItem.objects.filter(order__total_amount=60).count(), 2 * placed)
+
+    def test_shortage_is_reported_per_item(self):
+        first, second = self.products
+        with self.assertRaises(InsufficientInventory) as raised:
+            place_order(self.customer.id, [(first.id, 5, "10.00"), (second.id, 25, "10.00")])
+
+        self.assertEqual(raised.exception.shortages, [{"fire_extinguisher_id": second.id, "requested": 25, "available": 20}])
+        first.refresh_from_db()
+        self.assertEqual(first.inventory, 20)
+        self.assertFalse(Order.objects.exists())
+
+
+# Queue tests: concurrent workers claim disjoint batches and status moves follow the state machine
+class OrderClaimTests(TransactionTestCase):
+    WORKERS = 8
+
+    def setUp(self):
+        customer = Customer.objects.create(name="Customer", contact_email="customer@example.com")
+        Order.objects.bulk_create([Order(customer=customer, total_amount=10) for _ in range(50)])
+
+    def test_concurrent_workers_never_share_orders(self):
+        claimed = {}
+        barrier = threading.Barrier(self.WORKERS)
+
+        def worker(name):
+            barrier.wait()
+            try:
+                ids = []
+                while batch := claim_orders(name, limit=3):
+                    ids += batch
+                claimed[name] = ids
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(f"worker-{number}",)) for number in range(self.WORKERS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        all_ids = [order_id for ids in claimed.values() for order_id in ids]
+        self.assertEqual(len(claimed), self.WORKERS)
+        self.assertEqual(len(all_ids), 50)
+        self.assertEqual(len(set(all_ids)), 50)
+        self.assertFalse(Order.objects.filter(status="Pending").exists())
+        for name, ids in claimed.items():
+            self.assertEqual(Order.objects.filter(id__in=ids, claimed_by=name).count(), len(ids))
+
+    def test_transitions_are_enforced(self):
+        order_id = Order.objects.values_list("id", flat=True).first()
+        with self.assertRaises(IllegalTransition):
+            transition_order(order_id, "Completed")
+        self.assertEqual(transition_order(order_id, "Processing"), "Pending")
+        with self.assertRaises(IllegalTransition):
+            transition_order(order_id, "Cancelled", expected="Pending")
+        self.assertEqual(transition_order(order_id, "Completed"), "Processing")
+        with self.assertRaises(IllegalTransition):
+            transition_order(order_id, "Pending")
+
+
+# Query count regression tests: customer listings must not resolve their addresses row by row
+class CustomerAddressQueryTests(TestCase):
+    def setUp(self):
+        shared = Address.objects.create(street="1 Main St", city="Athens", state="Attica", postal_code="10558", country="GR")
+        for i in range(20):
+            own = Address.objects.create(street=f"{i} Side St", city="Patras", state="Achaea", postal_code="26221", country="GR")
+            Customer.objects.create(
+                name=f"Customer {i}",
+                contact_email=f"customer{i}@example.com",
+                address=own,
+                billing_address=shared,
+                shipping_address=own if i % 2 else None,
+            )
+
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {issue_token(1, 'System Admin', None)}"
+
+    def test_listing_uses_fixed_query_count(self):
+        for limit in (1, 5, 20):
+            with self.assertNumQueries(2):
+                response = self.client.get("/api/customers/", {"limit": limit})
+            customers = response.json()["customers"]
+            self.assertEqual(len(customers), limit)
+
+        first, second = customers[:2]
+        self.assertEqual(first["billing_address"], second["billing_address"])
+        self.assertEqual(first["billing_address"]["city"], "Athens")
+        self.assertIsNone(first["shipping_address"])
+        self.assertEqual(second["shipping_address"], second["address"])
+
+    def test_detail_uses_fixed_query_count(self):
+        customer = Customer.objects.get(name="Customer 3")
+        with self.assertNumQueries(2):
+            response = self.client.get(f"/api/customers/{customer.id}/")
+        self.assertEqual(response.json()["address"]["street"], "3 Side St")
+
+
+# Query count regression tests: order listings must not load their items or customers row by row
+class OrderListQueryTests(TestCase):
+    def setUp(self):
+        customers = [Customer.objects.create(name=f"Customer {i}", contact_email=f"c{i}@example.com") for i in range(3)]
+        products = [
+            FireExtinguisher.objects.create(
+                name=f"Extinguisher {number}",
+                fire_extinguisher_type="CO2",
+                fire_class="Class B",
+                certification="EN3",
+                standards_compliance="EN3",
+                capacity=5,
+                inspection_date=date(2025, 1, 1),
+                service_date=date(2025, 1, 1),
+                expiry_date=date(2030, 1, 1),
+                manufacture_date=date(2024, 1, 1),
+                inventory=20,
+                warranty_period=24,
+                batch_number=f"B{number}",
+            )
+            for number in range(3)
+        ]
+        for i in range(12):
+            order = Order.objects.create(customer=customers[i % 3], total_amount=0)
+            for product in products[:i % 3 + 1]:
+                OrderItem.objects.create(order=order, fire_extinguisher=product, quantity=2, price_per_unit="2.50")
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {issue_token(1, 'System Admin', None)}"
+
+    def test_listing_uses_fixed_query_count(self):
+        for limit in (1, 5, 12):
+            with self.assertNumQueries(2):
+                orders = self.client.get("/api/orders/", {"limit": limit}).json()["orders"]
+            self.assertEqual(len(orders), limit)
+
+        self.assertEqual([len(order["items"]) for order in orders], [i % 3 + 1 for i in range(12)])
+        self.assertEqual([order["line_count"] for order in orders], [i % 3 + 1 for i in range(12)])
+        self.assertEqual(orders[2]["customer_name"], "Customer 2")
+        self.assertEqual(orders[2]["computed_total"], "15.00")
+        self.assertEqual(orders[2]["items"][2]["fire_extinguisher_name"], "Extinguisher 2")
+
+    def test_detail_uses_fixed_query_count(self):
+        order = Order.objects.order_by("id").last()
+        with self.assertNumQueries(2):
+            response = self.client.get(f"/api/orders/{order.id}/")
+        self.assertEqual(len(response.json()["items"]), 3)
+
+
+class TenantScopingTests(TestCase):
+    def setUp(self):
+        self.first = Company.objects.create(name="First")
+        self.second = Company.objects.create(name="Second")
+        for company in (self.first, self.second):
+            with tenant(company.id):
+                Customer.objects.create(name=f"{company.name} customer", contact_email="a@example.com")
+                Customer.objects.bulk_create([Customer(name=f"{company.name} bulk", contact_email="b@example.com")])
+
+    def test_writes_take_the_current_company(self):
+        self.assertEqual(Customer.all_objects.filter(company=self.first).count(), 2)
+        self.assertEqual(Customer.all_objects.filter(company=self.second).count(), 2)
+
+    def test_queries_are_scoped_to_the_current_company(self):
+        with tenant(self.first.id):
+            self.assertEqual(set(Customer.objects.values_list("company_id", flat=True)), {self.first.id})
+            self.assertFalse(Customer.objects.filter(company=self.second).exists())
+
+    def test_requests_are_scoped_by_token_company(self):
+        token = issue_token(1, "Company Admin", self.second.id)
+        response = self.client.get("/api/customers/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        names = {customer["name"] for customer in response.json()["customers"]}
+        self.assertEqual(names, {"Second customer", "Second bulk"})
+
+        token = issue_token(1, "System Admin", self.second.id)
+        response = self.client.get("/api/customers/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.assertEqual(len(response.json()["customers"]), 4)
+
+    def test_anonymous_requests_to_tenant_data_are_refused(self):
+        customer = Customer.all_objects.filter(company=self.first).first()
+        order = Order.all_objects.create(customer=customer, total_amount=10, company=self.first)
+        for path in (
+            "/api/customers/",
+            f"/api/customers/{customer.id}/",
+            "/api/orders/",
+            f"/api/orders/{order.id}/",
+            "/api/orders/export/?month=2026-01",
+            "/api/compliance/sweep/",
+            "/api/reports/sales/?from=2026-01-01&to=2026-01-31",
+            "/api/search/?q=first",
+        ):
+            self.assertEqual(self.client.get(path).status_code, 401, path)
+        for path in ("/api/order/", f"/api/orders/{order.id}/status/", "/api/orders/claim/"):
+            response = self.client.post(path, dumps({"worker": "anonymous"}), content_type="application/json")
+            self.assertEqual(response.status_code, 401, path)
+        self.assertEqual(Order.all_objects.get(id=order.id).status, "Pending")
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="First")
+        with tenant(self.company.id):
+            for name in ("Aegean Hotels", "Aegean Shipping", "Olympus Foods"):
+                Customer.objects.create(name=name, contact_email=f"{name.split()[1].lower()}@example.com")
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {issue_token(1, 'Company Admin', self.company.id)}"
+
+    def names(self, query, **params):
+        response = self.client.get("/api/search/", {"q": query, "type": "customers", **params})
+        self.assertEqual(response.status_code, 200)
+        return [customer["name"] for customer in response.json()["customers"]]
+
+    def test_prefix_terms_match_and_rank_by_field(self):
+        self.assertEqual(self.names("aeg"), ["Aegean Hotels", "Aegean Shipping"])
+        self.assertEqual(self.names("aeg ship"), ["Aegean Shipping"])
+        self.assertEqual(self.names("shipping@"), ["Aegean Shipping"])
+        self.assertEqual(self.names("aeg", limit=1), ["Aegean Hotels"])
+        self.assertEqual(self.names("zzz"), [])
+
+    def test_queryset_writes_reach_the_index(self):
+        self.assertEqual(self.names("aeg"), ["Aegean Hotels", "Aegean Shipping"])
+        Customer.all_objects.filter(name="Aegean Hotels").update(name="Kronos Hotels")
+        self.assertEqual(self.names("aeg"), ["Aegean Shipping"])
+        clinics = Customer(name="Aegean Clinics", contact_email="clinics@example.com", company=self.company)
+        Customer.all_objects.bulk_create([clinics])
+        self.assertEqual(self.names("aeg"), ["Aegean Shipping", "Aegean Clinics"])
+        Customer.all_objects.filter(name="Aegean Shipping").delete()
+        self.assertEqual(self.names("aeg"), ["Aegean Clinics"])
+
+    def test_results_are_scoped_to_the_company(self):
+        with tenant(Company.objects.create(name="Second").id):
+            Customer.objects.create(name="Aegean Logistics", contact_email="l@example.com")
+        self.assertEqual(self.names("aeg"), ["Aegean Hotels", "Aegean Shipping"])
+
+    def test_parameters_are_validated(self):
+        for params in ({"q": ""}, {"q": "a" * 101}, {"q": "aeg", "type": "orders"}, {"q": "aeg", "limit": 0}):
+            self.assertEqual(self.client.get("/api/search/", params).status_code, 400, params)
+
+
+def forge_token(header, claims, key_id=None):
+    signing_input = tokens._b64encode(dumps(header)) + b"." + tokens._b64encode(dumps(claims))
+    signature = tokens._signature(key_id or next(iter(settings.JWT_SIGNING_KEYS)), signing_input)
+    return (signing_input + b"." + tokens._b64encode(signature)).decode()
+
+
+class TokenTests(TestCase):
+    def setUp(self):
+        tokens._verified_claims.cache_clear()
+        self.key_id = settings.JWT_ACTIVE_KEY_ID
+        self.claims = {"sub": "7", "role": "Company Admin", "company_id": 3, "exp": int(time.time()) + 60}
+
+    def assertInvalid(self, token, message):
+        with self.assertRaisesMessage(InvalidToken, message):
+            verify_token(token)
+
+    def test_issued_tokens_verify(self):
+        claims = verify_token(issue_token(7, "Company Admin", 3))
+        self.assertEqual((claims.user_id, claims.role, claims.company_id), (7, "Company Admin", 3))
+
+    def test_tampered_claims_fail_the_signature_check(self):
+        header, _, signature = issue_token(7, "System User", 3).split(".")
+        claims = tokens._b64encode(dumps({**self.claims, "role": "System Admin"})).decode()
+        self.assertInvalid(f"{header}.{claims}.{signature}", "Invalid token signature")
+
+    def test_unknown_key_and_other_algorithms_are_rejected(self):
+        self.assertInvalid(forge_token({"alg": "HS256", "kid": "retired"}, self.claims), "Unsupported token algorithm")
+        for alg in ("none", "HS512", "RS256"):
+            token = forge_token({"alg": alg, "kid": self.key_id}, self.claims, self.key_id)
+            self.assertInvalid(token, "Unsupported token algorithm")
+        self.assertInvalid(forge_token(["HS256"], self.claims), "Unsupported token algorithm")
+
+    def test_malformed_tokens_are_rejected(self):
+        valid = issue_token(7, "Company Admin", 3)
+        for token in ("", "abc", "a.b", f"{valid}.extra", "!!.??.##", "\u00e9.a.b", valid[:-4] + "*" + valid[-3:]):
+            self.assertInvalid(token, "")
+        self.assertInvalid(forge_token({"alg": "HS256", "kid": self.key_id}, {"role": "x"}, self.key_id), "Malformed")
+
+    def test_cached_tokens_still_expire(self):
+        now = time.time()
+        token = issue_token(7, "Company Admin", 3)
+        verify_token(token)
+        with mock.patch("app.tokens.time.time", return_value=now + settings.JWT_TTL + 1):
+            self.assertInvalid(token, "Token has expired")
+        self.assertEqual(tokens._verified_claims.cache_info().hits, 1)
+
+    def test_middleware_answers_bad_tokens_and_passes_anonymous_requests_through(self):
+        response = self.client.get("/health")
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get("/health", HTTP_AUTHORIZATION="Basic dXNlcjpwYXNz")
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get("/health", HTTP_AUTHORIZATION="Bearer not-a-token")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response["WWW-Authenticate"], 'Bearer error="invalid_token"')
+
+        response = self.client.get("/api/users/me/")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response["WWW-Authenticate"], "Bearer")
+
+        token = issue_token(7, "Company Admin", 3)
+        response = self.client.get("/api/users/me/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["user_id"], 7)
+
+
+class SignupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.first = Company.objects.create(name="First")
+        self.second = Company.objects.create(name="Second")
+
+    def signup(self, company_id, token=None):
+        headers = {"HTTP_AUTHORIZATION": f"Bearer {token}"} if token else {}
+        body = {"username": f"user{company_id}@example.com", "password": "c0rrect-h0rse-battery", "company_id": company_id}
+        return self.client.post("/api/users/signup/", dumps(body), content_type="application/json", **headers)
+
+    def test_anonymous_and_non_admin_callers_are_refused(self):
+        self.assertEqual(self.signup(self.first.id).status_code, 401)
+        self.assertEqual(self.signup(self.first.id, issue_token(1, "System User", self.first.id)).status_code, 403)
+        self.assertFalse(User.objects.exists())
+
+    def test_company_admins_add_users_to_their_own_company_only(self):
+        token = issue_token(1, "Company Admin", self.first.id)
+        self.assertEqual(self.signup(self.second.id, token).status_code, 403)
+        self.assertEqual(self.signup(self.first.id, token).status_code, 201)
+        self.assertEqual(list(User.objects.values_list("company_id", flat=True)), [self.first.id])
+
+    def test_system_admins_add_users_to_any_company(self):
+        response = self.signup(self.second.id, issue_token(1, "System Admin", self.first.id))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(User.objects.get(id=response.json()["user_id"]).company_id, self.second.id)
+
+
+class CompanyImageTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root.name))
+        self.media_root = Path(media_root.name)
+        self.company = Company.objects.create(name="First")
+
+    def upload(self, token):
+        image = io.BytesIO()
+        Image.new("RGB", (16, 16)).save(image, "PNG")
+        upload = SimpleUploadedFile("logo.png", image.getvalue(), content_type="image/png")
+        headers = {"HTTP_AUTHORIZATION": f"Bearer {token}"} if token else {}
+        return self.client.post(f"/api/companies/{self.company.id}/image/", {"image": upload}, **headers)
+
+    def test_uploads_need_an_admin_of_the_company(self):
+        self.assertEqual(self.upload(None).status_code, 401)
+        self.assertEqual(self.upload(issue_token(1, "System User", self.company.id)).status_code, 403)
+        self.assertEqual(self.upload(issue_token(1, "Company Admin", self.company.id + 1)).status_code, 403)
+        self.assertEqual(self.upload(issue_token(1, "Company Admin", self.company.id)).status_code, 202)
+        self.assertTrue(Company.objects.get(id=self.company.id).image)
+
+    def test_only_variants_are_served(self):
+        digest = "0123456789abcdef0123"
+        (self.media_root / "company_images").mkdir()
+        for name in (f"{digest}.png", f"{digest}-128.webp"):
+            (self.media_root / "company_images" / name).write_bytes(b"image")
+        self.assertEqual(self.client.get(f"/media/company_images/{digest}.png").status_code, 404)
+        self.assertEqual(self.client.get(f"/media/company_images/{digest}-128.webp").status_code, 200)
+
+    def test_failed_variants_are_reported(self):
+        Company.objects.filter(id=self.company.id).update(image="company_images/missing.png")
+        # The worker closes its connection when done; here it is the test's own
+        with self.assertLogs("app.images", "ERROR"), mock.patch("app.images.close_old_connections"):
+            images._build_variants(self.company.id, "company_images/missing.png", "missing")
+        response = self.client.get(f"/api/companies/{self.company.id}/")
+        self.assertEqual(response.json()["image"], {"status": "failed"})
+
+
+class BenchmarkSuiteTests(TestCase):
+    def test_every_scenario_runs_against_seeded_data(self):
+        context = seed(20)
+        self.assertEqual(context["counts"]["orders"], 100)
+        results = run_client(resolve(SCENARIOS, context), iterations=2, warmup=0, token=context["token"])
+        self.assertEqual(set(results), set(SCENARIOS))
+        self.assertEqual(results["customers_page"]["queries"], 2)
+
+    def test_missing_baseline_fails_the_gate(self):
+        with self.assertRaisesMessage(CommandError, "No baseline"):
+            call_command("benchmark", baseline=Path(tempfile.gettempdir()) / "missing-baseline.json", stdout=io.StringIO())
+
+    def test_compare_flags_only_real_regressions(self):
+        baseline = {"client": {"orders": {"p50_ms": 10.0, "p95_ms": 0.2, "requests_per_second": 100.0, "queries": 2}}}
+        noisy = {"client": {"orders": {"p50_ms": 11.0, "p95_ms": 0.5, "requests_per_second": 90.0, "queries": 2}}}
+        self.assertEqual(compare(noisy, baseline, threshold=0.25), [])
+
+        slower = {"client": {"orders": {"p50_ms": 20.0, "p95_ms": 0.2, "requests_per_second": 50.0, "queries": 3}}}
+        self.assertEqual(len(compare(slower, baseline, threshold=0.25)), 3)
+
+
+class ChangeFeedTests(TestCase):
+    def read_feed(self, **params):
+        token = issue_token(1, "System Admin", None)
+        response = self.client.get("/api/changes", params, HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.assertEqual(response.status_code, 200)
+        return [loads(line) for line in b"".join(response.streaming_content).splitlines()]
+
+    def test_every_write_path_is_logged_in_order(self):
+        address = Address.objects.create(street="1 Main St", city="Athens", state="Attica", postal_code="10558", country="GR")
+        customer = Customer.objects.create(name="Customer", contact_email="customer@example.com", address=address)
+        Address.objects.filter(id=address.id).update(city="Patras")
+        address.delete()
+
+        entries = self.read_feed()
+        self.assertEqual(
+            [(entry["model"], entry["action"]) for entry in entries],
+            [
+                ("address", "create"),
+                ("customer", "create"),
+                ("address", "update"),
+                ("customer", "update"),
+                ("address", "delete"),
+            ],
+        )
+        self.assertEqual([entry["seq"] for entry in entries], sorted(entry["seq"] for entry in entries))
+        self.assertIsNone(entries[-1]["data"])
+        self.assertIsNone(entries[1]["data"]["address_id"])
+
+        customer.refresh_from_db()
+        self.assertEqual(customer.change_seq, entries[3]["seq"])
+        page = self.read_feed(since=entries[1]["seq"], limit=2)
+        self.assertEqual([entry["seq"] for entry in page], [entry["seq"] for entry in entries[2:4]])
+
+    def test_entries_that_may_still_be_overtaken_are_held_back(self):
+        for city in ("Athens", "Patras", "Volos"):
+            Address.objects.create(street="1 Main St", city=city, state="Attica", postal_code="10558", country="GR")
+        first, second, third = Change.objects.order_by("seq")
+        Change.objects.filter(seq=first.seq).update(horizon=50)
+        Change.objects.filter(seq=second.seq).update(horizon=200)
+        Change.objects.filter(seq=third.seq).update(horizon=150)
+
+        # A final entry vouches for every lower seq, even one whose own horizon is not yet passed
+        everything = [first.seq, second.seq, third.seq]
+        for oldest_running, expected in ((40, []), (100, [first.seq]), (150, everything)):
+            oldest_running = Value(oldest_running, output_field=BigIntegerField())
+            with mock.patch("app.changes._oldest_running", return_value=oldest_running):
+                self.assertEqual([entry["seq"] for entry in self.read_feed()], expected)
+
+    # Runs the PostgreSQL stamp and log triggers, or the SQLite ones, through INSERT ... ON CONFLICT
+    def test_upsert_logs_what_actually_happened(self):
+        company = Company.objects.create(name="Company")
+        fields = {field: value for field, value in CatalogImportTests.ROW.items() if field != "discount"}
+        existing = FireExtinguisher.objects.create(company=company, **fields)
+        Change.objects.all().delete()
+
+        FireExtinguisher.objects.bulk_create(
+            [
+                FireExtinguisher(company=company, **{**fields, "inventory": 1}),
+                FireExtinguisher(company=company, **{**fields, "batch_number": "B-2"}),
+            ],
+            update_conflicts=True,
+            unique_fields=["company", "batch_number"],
+            update_fields=["inventory"],
+        )
+        created = FireExtinguisher.objects.get(batch_number="B-2")
+        entries = self.read_feed()
+        self.assertEqual(
+            sorted((entry["id"], entry["action"]) for entry in entries),
+            sorted([(existing.id, "update"), (created.id, "create")]),
+        )
+        seqs = {entry["id"]: entry["seq"] for entry in entries}
+        existing.refresh_from_db()
+        self.assertEqual((existing.inventory, existing.change_seq), (1, seqs[existing.id]))
+        self.assertEqual(created.change_seq, seqs[created.id])
+
+    @skipUnless(connection.vendor == "postgresql", "horizons are only recorded on PostgreSQL")
+    def test_postgres_entries_record_a_horizon(self):
+        address = Address.objects.create(street="1 Main St", city="Athens", state="Attica", postal_code="10558", country="GR")
+        address.delete()
+        entries = list(Change.objects.order_by("seq").values_list("action", "horizon"))
+        self.assertEqual([action for action, _ in entries], ["create", "delete"])
+        self.assertTrue(all(horizon is not None for _, horizon in entries))
+        # This test's own transaction is still running, so neither entry is final yet
+        self.assertEqual(self.read_feed(), [])
+
+    def test_feed_requires_a_system_admin(self):
+        self.assertEqual(self.client.get("/api/changes").status_code, 401)
+        token = issue_token(1, "Company Admin", None)
+        self.assertEqual(self.client.get("/api/changes", HTTP_AUTHORIZATION=f"Bearer {token}").status_code, 403)
+        self.assertFalse(Change.objects.exists())
+
+
+class BulkAddressTests(TestCase):
+    FIELDS = {"street": "1 Main St", "city": "Athens", "state": "Attica", "postal_code": "10558", "country": "GR"}
+
+    def post(self, body, content_type="application/json"):
+        response = self.client.post("/api/addresses/bulk/", body, content_type=content_type)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_mixed_actions_report_per_item(self):
+        kept, removed = (Address.objects.create(**self.FIELDS) for _ in range(2))
+        result = self.post(dumps([
+            {"action": "create", **self.FIELDS},
+            {"id": kept.id, "city": "Patras"},
+            {"action": "delete", "id": removed.id},
+            {"action": "delete", "id": 999999},
+            {"action": "create", **self.FIELDS, "postal_code": "1" * 30},
+        ]))
+
+        self.assertEqual([item["status"] for item in result["results"]], [201, 200, 200, 404, 400])
+        self.assertEqual((result["created"], result["updated"], result["deleted"], result["failed"]), (1, 1, 1, 2))
+        self.assertIn("at most 20 characters", result["results"][4]["error"])
+        kept.refresh_from_db()
+        self.assertEqual(kept.city, "Patras")
+        self.assertFalse(Address.objects.filter(id=removed.id).exists())
+        self.assertEqual(Address.objects.count(), 2)
+
+    def test_duplicate_ids_apply_in_order(self):
+        address = Address.objects.create(**self.FIELDS)
+        result = self.post(dumps([
+            {"id": address.id, "city": "Patras"},
+            {"id": address.id, "city": "Volos", "state": "Magnesia"},
+            {"action": "delete", "id": address.id + 1},
+            {"action": "delete", "id": address.id + 1},
+        ]))
+
+        self.assertEqual([item["status"] for item in result["results"]], [200, 200, 404, 404])
+        address.refresh_from_db()
+        self.assertEqual((address.city, address.state), ("Volos", "Magnesia"))
+
+    def test_id_both_updated_and_deleted_fails_its_items(self):
+        address = Address.objects.create(**self.FIELDS)
+        result = self.post(dumps([
+            {"id": address.id, "city": "Patras"},
+            {"action": "create", **self.FIELDS},
+            {"action": "delete", "id": address.id},
+        ]))
+
+        self.assertEqual([item["status"] for item in result["results"]], [409, 201, 409])
+        self.assertEqual((result["created"], result["updated"], result["deleted"], result["failed"]), (1, 0, 0, 2))
+        address.refresh_from_db()
+        self.assertEqual(address.city, "Athens")
+
+    def test_database_error_fails_every_applied_item(self):
+        address = Address.objects.create(**self.FIELDS)
+
+        def failing_delete(execute, sql, params, many, context):
+            if sql.startswith("DELETE"):
+                raise OperationalError("disk I/O error")
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(failing_delete):
+            result = self.post(dumps([
+                {"action": "create", **self.FIELDS},
+                {"action": "create", "city": "Patras"},
+                {"action": "delete", "id": address.id},
+            ]))
+
+        self.assertEqual([item["status"] for item in result["results"]], [500, 400, 500])
+        self.assertIn("disk I/O error", result["results"][0]["error"])
+        self.assertEqual((result["created"], result["deleted"], result["failed"]), (0, 0, 3))
+        self.assertEqual(list(Address.objects.values_list("id", flat=True)), [address.id])
+
+    def test_invalid_ndjson_lines_fail_alone(self):
+        body = b"\n".join([dumps({"action": "create", **self.FIELDS}), b"{not json", dumps(["array"]), b""])
+        result = self.post(body, content_type="application/x-ndjson")
+
+        self.assertEqual([item["status"] for item in result["results"]], [201, 400, 400])
+        self.assertTrue(result["results"][1]["error"].startswith("Invalid JSON"))
+        self.assertEqual(Address.objects.count(), 1)
+
+
+class AddressListTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.ids = [
+            Address.objects.create(street=f"{i} Main St", city="Athens", state="Attica", postal_code="10558", country="GR").id
+            for i in range(5)
+        ]
+
+    def test_pages_follow_the_next_cursor(self):
+        pages, after = [], 0
+        while after is not None:
+            body = self.client.get("/api/addresses/", {"after": after, "limit": 2}).json()
+            pages.append([address["id"] for address in body["addresses"]])
+            after = body["next"]
+        self.assertEqual(pages, [self.ids[0:2], self.ids[2:4], self.ids[4:]])
+
+        body = self.client.get("/api/addresses/", {"after": self.ids[1], "limit": 3}).json()
+        self.assertEqual([address["id"] for address in body["addresses"]], self.ids[2:])
+        self.assertIsNone(body["next"])
+        self.assertEqual(self.client.get("/api/addresses/", {"after": self.ids[-1]}).json(), {"addresses": [], "next": None})
+
+    def test_limit_and_cursor_are_validated(self):
+        for params in ({"limit": 0}, {"limit": MAX_PAGE_SIZE + 1}, {"after": "x"}, {"stream": "xml"}):
+            self.assertEqual(self.client.get("/api/addresses/", params).status_code, 400, params)
+        self.assertEqual(self.client.get("/api/addresses/", {"limit": MAX_PAGE_SIZE}).status_code, 200)
+
+    def test_streams_every_row_after_the_cursor(self):
+        # Chunks of two rows, so the stream spans several chunks
+        with mock.patch("app.views.STREAM_CHUNK_SIZE", 2):
+            response = self.client.get("/api/addresses/", {"stream": "json", "after": self.ids[0]})
+            self.assertEqual(response["Content-Type"], "application/json")
+            body = loads(b"".join(response.streaming_content))
+            self.assertEqual([address["id"] for address in body["addresses"]], self.ids[1:])
+            self.assertEqual(body["addresses"][0]["street"], "1 Main St")
+
+            response = self.client.get("/api/addresses/", {"stream": "ndjson"})
+            self.assertEqual(response["Content-Type"], "application/x-ndjson")
+            lines = b"".join(response.streaming_content).splitlines()
+            self.assertEqual([loads(line)["id"] for line in lines], self.ids)
+
+
+class AddressCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.address = Address.objects.create(street="1 Main St", city="Athens", state="Attica", postal_code="10558", country="GR")
+        self.url = f"/api/address/{self.address.id}/"
+
+    def stats(self):
+        return self.client.get("/api/cache/stats/").json()
+
+    def write(self, method, path, body=None):
+        # Invalidation waits for the commit
+        with self.captureOnCommitCallbacks(execute=True):
+            return getattr(self.client, method)(path, dumps(body), content_type="application/json")
+
+    def test_reads_are_served_from_the_cache(self):
+        before = self.stats()
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url).json()["city"], "Athens")
+        after = self.stats()
+        self.assertEqual((after["hits"] - before["hits"], after["misses"] - before["misses"]), (1, 1))
+        self.assertGreater(after["hit_ratio"], 0)
+
+    def test_put_and_delete_invalidate_the_address_and_list(self):
+        self.client.get(self.url)
+        self.client.get("/api/addresses/")
+        version = cache.get(ADDRESS_LIST_VERSION_KEY)
+
+        self.write("put", self.url, {"city": "Patras"})
+        self.assertEqual(self.client.get(self.url).json()["city"], "Patras")
+        self.assertEqual(self.client.get("/api/addresses/").json()["addresses"][0]["city"], "Patras")
+        self.assertGreater(cache.get(ADDRESS_LIST_VERSION_KEY), version)
+
+        self.write("delete", self.url)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.assertEqual(self.client.get("/api/addresses/").json()["addresses"], [])
+
+    def test_bulk_writes_invalidate_the_address_and_list(self):
+        self.client.get(self.url)
+        self.client.get("/api/addresses/")
+
+        created = {"street": "2 Side St", "city": "Patras", "state": "Achaea", "postal_code": "26221", "country": "GR"}
+        self.write("post", "/api/addresses/bulk/", [{"id": self.address.id, "city": "Volos"}, {"action": "create", **created}])
+        self.assertEqual(self.client.get(self.url).json()["city"], "Volos")
+        addresses = self.client.get("/api/addresses/").json()["addresses"]
+        self.assertEqual([address["city"] for address in addresses], ["Volos", "Patras"])
+
+
+# The address endpoints routed to their async variants, as under ASGI (settings.ASYNC_VIEWS)
+class AsyncAddressUrls:
+    urlpatterns = [
+        path("api/address/", views.acreate_address),
+        path("api/address/<int:address_id>/", views.aaddress_functionality),
+        path("api/addresses/", views.aget_all_addresses),
+    ]
+
+
+@override_settings(ROOT_URLCONF=AsyncAddressUrls)
+class AsyncAddressViewTests(TestCase):
+    FIELDS = {"street": "1 Main St", "city": "Athens", "state": "Attica", "postal_code": "10558", "country": "GR"}
+
+    def setUp(self):
+        cache.clear()
+
+    async def create(self, **fields):
+        body = dumps({**self.FIELDS, **fields})
+        response = await self.async_client.post("/api/address/", body, content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+        return response.json()["id"]
+
+    async def put(self, url, data, if_match=None):
+        headers = {"If-Match": if_match} if if_match else {}
+        return await self.async_client.put(url, dumps(data), content_type="application/json", headers=headers)
+
+    async def test_create_read_and_conditional_get(self):
+        address_id = await self.create()
+        response = await self.async_client.get(f"/api/address/{address_id}/")
+        self.assertEqual(response.json()["city"], "Athens")
+        etag = response["ETag"]
+        response = await self.async_client.get(f"/api/address/{address_id}/", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual((await self.async_client.get("/api/address/999999/")).status_code, 404)
+
+    async def test_updates_invalidate_the_cached_address_and_pages(self):
+        address_id = await self.create()
+        url = f"/api/address/{address_id}/"
+        etag = (await self.async_client.get(url))["ETag"]
+        await self.async_client.get("/api/addresses/")
+
+        response = await self.put(url, {"city": "Patras"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((await self.async_client.get(url)).json()["city"], "Patras")
+        page = (await self.async_client.get("/api/addresses/")).json()
+        self.assertEqual(page["addresses"][0]["city"], "Patras")
+
+        response = await self.put(url, {"city": "Volos"}, if_match=etag)
+        self.assertEqual(response.status_code, 412)
+        etag = response["ETag"]
+        response = await self.put(url, {"city": "Volos"}, if_match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((await self.async_client.get(url)).json()["city"], "Volos")
+
+    async def test_delete_invalidates_the_cached_address(self):
+        address_id = await self.create()
+        url = f"/api/address/{address_id}/"
+        await self.async_client.get(url)
+        self.assertEqual((await self.async_client.delete(url)).status_code, 200)
+        self.assertEqual((await self.async_client.get(url)).status_code, 404)
+        self.assertEqual((await self.async_client.delete(url)).status_code, 404)
+
+    async def test_listing_pages_and_streams(self):
+        ids = [await self.create(street=f"{i} Main St") for i in range(3)]
+        page = (await self.async_client.get("/api/addresses/", {"limit": 2})).json()
+        self.assertEqual(([address["id"] for address in page["addresses"]], page["next"]), (ids[:2], ids[1]))
+        page = (await self.async_client.get("/api/addresses/", {"after": page["next"], "limit": 2})).json()
+        self.assertEqual(([address["id"] for address in page["addresses"]], page["next"]), (ids[2:], None))
+
+        with mock.patch("app.views.STREAM_CHUNK_SIZE", 2):
+            response = await self.async_client.get("/api/addresses/", {"stream": "json"})
+            body = loads(b"".join([chunk async for chunk in response.streaming_content]))
+            self.assertEqual([address["id"] for address in body["addresses"]], ids)
+            response = await self.async_client.get("/api/addresses/", {"stream": "ndjson", "after": ids[0]})
+            lines = b"".join([chunk async for chunk in response.streaming_content]).splitlines()
+            self.assertEqual([loads(line)["id"] for line in lines], ids[1:])
+
+
+class AddressConditionalRequestTests(TestCase):
+    def setUp(self):
+        self.address = Address.objects.create(street="1 Main St", city="Athens", state="Attica", postal_code="10558", country="GR")
+        self.url = f"/api/address/{self.address.id}/"
+        self.etag = self.client.get(self.url)["ETag"]
+
+    def put(self, data, etag):
+        return self.client.put(self.url, dumps(data), content_type="application/json", HTTP_IF_MATCH=etag)
+
+    def test_matching_if_none_match_is_not_modified(self):
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=self.etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], self.etag)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH='"other"').status_code, 200)
+
+    def test_stale_etag_is_rejected(self):
+        self.assertEqual(self.put({"city": "Patras"}, self.etag).status_code, 200)
+        response = self.put({"city": "Volos"}, self.etag)
+        self.assertEqual(response.status_code, 412)
+        self.assertNotEqual(response["ETag"], self.etag)
+        self.address.refresh_from_db()
+        self.assertEqual(self.address.city, "Patras")
+
+    def test_unchanged_values_skip_the_write(self):
+        with self.assertNumQueries(1):
+            response = self.put({"city": "Athens"}, self.etag)
+        self.assertEqual(response.json()["message"], "Address unchanged")
+        self.assertEqual(response["ETag"], self.etag)
+
+    def test_write_racing_the_conditional_update_is_rejected(self):
+        raced = []
+
+        # Another writer changes the row between the view's read and its guarded UPDATE
+        def concurrent_write(execute, sql, params, many, context):
+            if sql.startswith("UPDATE") and not raced:
+                raced.append(sql)
+                Address.objects.filter(id=self.address.id).update(street="2 Side St")
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(concurrent_write):
+            response = self.put({"city": "Patras"}, self.etag)
+        self.assertEqual(response.status_code, 412)
+        self.address.refresh_from_db()
+        self.assertEqual((self.address.street, self.address.city), ("2 Side St", "Athens"))
+
+
+class SalesRollupTests(TestCase):
+    def test_day_cleared_by_a_concurrent_refresh_is_marked_again_on_commit(self):
+        day = date(2026, 1, 15)
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                mark_days_dirty(day)
+                # What a refresh_day running before this transaction commits does to the marker
+                SalesRollupDirtyDay.objects.filter(day=day).delete()
+        self.assertTrue(SalesRollupDirtyDay.objects.filter(day=day).exists())
+
+    def test_report_revenue_is_in_cents(self):
+        customer = Customer.objects.create(name="Customer", contact_email="customer@example.com")
+        product = FireExtinguisher.objects.create(
+            name="Extinguisher",
+            fire_extinguisher_type="CO2",
+            fire_class="Class B",
+            certification="EN3",
+            standards_compliance="EN3",
+            capacity=5,
+            inspection_date=date(2025, 1, 1),
+            service_date=date(2025, 1, 1),
+            expiry_date=date(2030, 1, 1),
+            manufacture_date=date(2024, 1, 1),
+            inventory=20,
+            warranty_period=24,
+        )
+        order = Order.objects.create(customer=customer, total_amount=0)
+        OrderItem.objects.create(order=order, fire_extinguisher=product, quantity=3, price_per_unit="10.51")
+        refresh_day(order.order_date)
+
+        [row] = sales_report(order.order_date, order.order_date)
+        self.assertEqual(str(row["revenue"]), "31.53")
+
+
+@override_settings(HEALTH_CHECK_TTL=0.2, HEALTH_PROBE_TIMEOUT=0.2)
+class ReadinessTests(TransactionTestCase):
+    def setUp(self):
+        health._latest = health._pending = None
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+
+    def hang(self, connection):
+        self.release.wait(10)
+        return {"ok": True}
+
+    def test_stale_result_is_served_only_while_a_probe_can_still_finish(self):
+        self.assertEqual(health.readiness()["status"], "OK")
+        with mock.patch.dict(health.PROBES, {"database": self.hang}):
+            time.sleep(0.25)
+            # Stale but within the probe timeout: the last result, while the probe runs in the background
+            self.assertEqual(health.readiness()["status"], "OK")
+            time.sleep(0.25)
+            started = time.monotonic()
+            self.assertEqual(health.readiness()["status"], "Unavailable")
+            self.assertLess(time.monotonic() - started, 0.1)
+
+    def test_first_check_waits_for_the_probe_timeout(self):
+        with mock.patch.dict(health.PROBES, {"database": self.hang}):
+            result = health.readiness()
+        self.assertEqual(result, {"status": "Unavailable", "checks": {}, "error": "Health probes timed out"})
+
+
+def repeated_queries(request):
+    for _ in range(3):
+        Address.objects.count()
+    return JsonResponse({})
+
+
+class MetricsUrls:
+    urlpatterns = [path("repeated/", repeated_queries, name="repeated_queries"), *app_urls.urlpatterns]
+
+
+@override_settings(ROOT_URLCONF=MetricsUrls)
+class RequestMetricsTests(TestCase):
+    def metric(self, line_prefix):
+        for line in self.client.get("/metrics").content.decode().splitlines():
+            if line.startswith(line_prefix + " "):
+                return float(line.rsplit(" ", 1)[1])
+        return 0.0
+
+    def test_server_timing_reports_queries_and_duplicates(self):
+        response = self.client.get("/repeated/")
+        self.assertRegex(
+            response["Server-Timing"], r'^total;dur=[0-9.]+, db;dur=[0-9.]+;desc="3 queries, 2 duplicates"$'
+        )
+        self.assertRegex(self.client.get("/health")["Server-Timing"], r'desc="0 queries, 0 duplicates"$')
+
+    def test_metrics_exposition_counts_requests_and_duplicates(self):
+        requests = 'http_requests_total{view="repeated_queries",method="GET",status="200"}'
+        duplicates = 'http_request_duplicate_queries_total{view="repeated_queries"}'
+        queries = 'http_request_queries_count{view="repeated_queries"}'
+        before = [self.metric(name) for name in (requests, duplicates, queries)]
+        self.client.get("/repeated/")
+        after = [self.metric(name) for name in (requests, duplicates, queries)]
+        self.assertEqual([now - was for was, now in zip(before, after)], [1, 2, 1])
+
+        response = self.client.get("/metrics")
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        body = response.content.decode()
+        self.assertIn("# TYPE http_request_duration_seconds histogram", body)
+        self.assertIn('http_request_queries_bucket{view="repeated_queries",le="5"}', body)
+        self.assertIn('address_cache_requests_total{result="hit"}', body)
+
+    @override_settings(SLOW_REQUEST_MS=0)
+    def test_slow_requests_are_logged_with_their_sql(self):
+        with self.assertLogs("app.requests", "WARNING") as logs:
+            self.client.get("/repeated/")
+        self.assertIn("Slow request GET /repeated/ (repeated_queries)", logs.output[0])
+        self.assertIn("3 queries (2 duplicates)", logs.output[0])
+        self.assertIn('SELECT COUNT(*) AS "__count" FROM "app_address"', logs.output[0])
+
+    def test_fast_requests_are_not_logged(self):
+        with self.assertNoLogs("app.requests", "WARNING"):
+            self.client.get("/repeated/")
+
+
+class SerializerTests(TestCase):
+    VALUES = {
+        "created": datetime(2026, 1, 2, 3, 4, 5, 123456, tzinfo=timezone.utc),
+        "whole_second": datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+        "offset": datetime(2026, 1, 2, 3, 4, 5, 7, tzinfo=timezone(timedelta(hours=2))),
+        "naive": datetime(2026, 1, 2, 3, 4, 5, 1),
+        "day": date(2026, 1, 2),
+        "time": dt_time(3, 4, 5, 250000),
+        "amount": Decimal("12.50"),
+        "name": "Πυρόσβεστήρας é",
+        "id": UUID(int=5),
+        "list": [1, None, True, 2.5],
+    }
+
+    @skipUnless(serializers.orjson, "orjson is not installed")
+    def test_backends_encode_identically(self):
+        self.assertEqual(serializers.dumps(self.VALUES), serializers._stdlib_dumps(self.VALUES))
+
+    def test_timestamps_keep_microseconds_and_utc_is_z(self):
+        encoded = loads(serializers._stdlib_dumps(self.VALUES))
+        self.assertEqual(encoded["created"], "2026-01-02T03:04:05.123456Z")
+        self.assertEqual(encoded["whole_second"], "2026-01-02T03:04:05Z")
+        self.assertEqual(encoded["offset"], "2026-01-02T03:04:05.000007+02:00")
+        self.assertEqual(encoded["time"], "03:04:05.250000")
+        self.assertEqual(encoded["amount"], "12.50")
+
+
+class CatalogImportTests(TestCase):
+    ROW = {
+        "name": "Foam 6L",
+        "batch_number": "B-1",
+        "fire_extinguisher_type": "Foam",
+        "fire_class": "Class A",
+        "certification": "CE Marking",
+        "standards_compliance": "EN3",
+        "capacity": 6,
+        "inventory": 10,
+        "warranty_period": 12,
+        "inspection_date": "2025-01-01",
+        "service_date": "2025-01-01",
+        "expiry_date": "2030-01-01",
+        "manufacture_date": "2024-06-01",
+        "discount": 2.5,
+    }
+
+    def setUp(self):
+        self.company = Company.objects.create(name="Company")
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+    def run_import(self, name, text, *args):
+        path = self.directory / name
+        path.write_text(text, encoding="utf-8")
+        stdout = io.StringIO()
+        call_command("import_extinguishers", str(path), "--company", str(self.company.id), *args, stdout=stdout)
+        return path, stdout.getvalue()
+
+    def ndjson(self, *rows):
+        return "".join(dumps(row).decode() + "\n" for row in rows)
+
+    def rejections(self, path):
+        return [loads(line) for line in Path(f"{path}.rejected.ndjson").read_text(encoding="utf-8").splitlines()]
+
+    # Runs through COPY + INSERT ... ON CONFLICT on PostgreSQL and bulk_create(update_conflicts=True) on SQLite
+    def test_csv_rows_are_upserted_on_batch_number(self):
+        header = ",".join(self.ROW)
+        lines = [",".join(str(value) for value in {**self.ROW, "batch_number": f"B-{i}"}.values()) for i in range(3)]
+        path, output = self.run_import("catalog.csv", "\n".join([header, *lines]) + "\n", "--batch-size", "2")
+        self.assertIn("3 written, 0 rejected", output)
+        self.assertFalse(Path(f"{path}.rejected.ndjson").exists())
+
+        self.run_import("catalog.csv", f"{header}\n{lines[0].replace('Foam 6L', 'Foam 9L').replace(',10,', ',4,')}\n")
+        self.assertEqual(FireExtinguisher.objects.filter(company=self.company).count(), 3)
+        extinguisher = FireExtinguisher.objects.get(company=self.company, batch_number="B-0")
+        self.assertEqual((extinguisher.name, extinguisher.inventory), ("Foam 9L", 4))
+        self.assertEqual(extinguisher.discount, Decimal("2.50"))
+        self.assertEqual(extinguisher.expiry_date, date(2030, 1, 1))
+
+    def test_a_later_row_in_the_same_batch_wins(self):
+        self.run_import("catalog.ndjson", self.ndjson(self.ROW, {**self.ROW, "inventory": 3}))
+        self.assertEqual(FireExtinguisher.objects.get(batch_number="B-1").inventory, 3)
+
+    def test_invalid_rows_are_written_to_the_rejection_file(self):
+        rows = [
+            {**self.ROW, "batch_number": "B-ok"},
+            {**self.ROW, "fire_extinguisher_type": ["CO2"]},
+            {**self.ROW, "name": {"en": "Foam"}},
+            {**self.ROW, "capacity": True},
+            {**self.ROW, "inventory": 1.5},
+            {**self.ROW, "warranty_period": 10**12},
+            {**self.ROW, "expiry_date": "tomorrow", "fire_class": "Class Z"},
+            {**self.ROW, "discount": [1]},
+            {key: value for key, value in self.ROW.items() if key != "name"},
+        ]
+        text = self.ndjson(*rows) + "not json\n[1, 2]\n" + self.ndjson({**self.ROW, "batch_number": "B-last"})
+        path, output = self.run_import("catalog.ndjson", text, "--batch-size", "1")
+
+        self.assertIn("Read 12 rows", output)
+        self.assertIn("2 written, 10 rejected", output)
+        self.assertEqual(
+            sorted(FireExtinguisher.objects.values_list("batch_number", flat=True)), ["B-last", "B-ok"]
+        )
+        rejected = self.rejections(path)
+        self.assertEqual([entry["line"] for entry in rejected], list(range(2, 12)))
+        self.assertEqual(
+            [entry["errors"] for entry in rejected[:-2]],
+            [
+                ["fire_extinguisher_type must be a string or a number"],
+                ["name must be a string or a number"],
+                ["capacity must be a string or a number"],
+                ["inventory must be a string or a number"],
+                ["warranty_period must be between 0 and 2147483647"],
+                ["fire_class 'Class Z' is not a valid choice", "expiry_date must be a YYYY-MM-DD date"],
+                ["discount must be a string or a number"],
+                ["name is required"],
+            ],
+        )
+        self.assertEqual(rejected[0]["row"], rows[1])
+        self.assertTrue(rejected[-2]["errors"][0].startswith("Invalid JSON"))
+        self.assertEqual(rejected[-2]["row"], "not json")
+        self.assertEqual(rejected[-1], {"line": 11, "errors": ["Expected a JSON object"], "row": "[1, 2]"})
+
+    def test_unknown_company_is_refused(self):
+        path = self.directory / "catalog.ndjson"
+        path.write_text(self.ndjson(self.ROW), encoding="utf-8")
+        with self.assertRaisesMessage(CommandError, "does not exist"):
+            call_command("import_extinguishers", str(path), "--company", str(self.company.id + 1))
+        self.assertFalse(FireExtinguisher.objects.exists())
+
+
+class OrderExportTests(TestCase):
+    def setUp(self):
+        billing = Address.objects.create(street="1 Main St", city="Athens", state="Attica", postal_code="10558", country="GR")
+        customer = Customer.objects.create(name="Customer", contact_email="customer@example.com", billing_address=billing)
+        product = FireExtinguisher.objects.create(
+            name="CO2 5kg",
+            fire_extinguisher_type="CO2",
+            fire_class="Class B",
+            certification="EN3",
+            standards_compliance="EN3",
+            capacity=5,
+            inspection_date=date(2025, 1, 1),
+            service_date=date(2025, 1, 1),
+            expiry_date=date(2030, 1, 1),
+            manufacture_date=date(2024, 1, 1),
+            inventory=20,
+            warranty_period=24,
+            batch_number="B1",
+        )
+        self.orders = []
+        for order_date, quantities in ((date(2026, 8, 31), [1]), (date(2026, 9, 1), [2, 3]), (date(2026, 9, 30), [])):
+            order = Order.objects.create(customer=customer, total_amount="12.50")
+            Order.objects.filter(id=order.id).update(order_date=order_date)
+            for quantity in quantities:
+                OrderItem.objects.create(order=order, fire_extinguisher=product, quantity=quantity, price_per_unit="2.50")
+            self.orders.append(order)
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {issue_token(1, 'System Admin', None)}"
+
+    def export(self, **params):
+        response = self.client.get("/api/orders/export/", params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        return response, b"".join(response.streaming_content)
+
+    def test_csv_has_one_row_per_order_line(self):
+        response, body = self.export(month="2026-09")
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="orders-2026-09.csv"')
+        self.assertNotIn("Content-Encoding", response)
+
+        rows = list(csv.DictReader(io.StringIO(body.decode())))
+        self.assertEqual(list(rows[0]), list(serializers.ORDER_EXPORT.keys))
+        self.assertEqual([int(row["id"]) for row in rows], [self.orders[1].id, self.orders[1].id, self.orders[2].id])
+        self.assertEqual([row["items_quantity"] for row in rows], ["2", "3", ""])
+        self.assertEqual(rows[0]["order_date"], "2026-09-01")
+        self.assertEqual(rows[0]["customer_billing_address_city"], "Athens")
+        self.assertEqual(rows[0]["items_fire_extinguisher_batch_number"], "B1")
+        self.assertEqual(rows[0]["items_price_per_unit"], "2.50")
+
+    def test_ndjson_rows_and_date_range(self):
+        response, body = self.export(format="ndjson", to="2026-09-01")
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="orders-start_2026-09-01.ndjson"')
+
+        rows = [loads(line) for line in body.splitlines()]
+        self.assertEqual([row["id"] for row in rows], [self.orders[0].id, self.orders[1].id, self.orders[1].id])
+        self.assertEqual(rows[0]["total_amount"], "12.50")
+        self.assertEqual(rows[0]["customer_name"], "Customer")
+        self.assertEqual(rows[0]["items_fire_extinguisher_name"], "CO2 5kg")
+
+        _, body = self.export(format="ndjson", **{"from": "2026-09-02"})
+        self.assertEqual([loads(line)["items_id"] for line in body.splitlines()], [None])
+
+    def test_gzip_is_negotiated(self):
+        response = self.client.get("/api/orders/export/", {"month": "2026-08"}, HTTP_ACCEPT_ENCODING="br, gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        rows = list(csv.DictReader(io.StringIO(gzip.decompress(b"".join(response.streaming_content)).decode())))
+        self.assertEqual([(int(row["id"]), row["items_quantity"]) for row in rows], [(self.orders[0].id, "1")])
+
+    def test_invalid_parameters_are_rejected(self):
+        for params in ({"month": "2026-13"}, {"from": "yesterday"}, {"format": "xml"}):
+            self.assertEqual(self.client.get("/api/orders/export/", params).status_code, 400)
+        self.assertEqual(self.client.get("/api/orders/export/", HTTP_AUTHORIZATION="").status_code, 401)
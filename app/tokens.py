@@ -0,0 +1,100 @@
+import base64
+import hashlib
+import hmac
+import time
+from collections import namedtuple
+from functools import lru_cache, wraps
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from .serializers import JsonResponse, dumps, loads
+
+# HS256 JSON Web Tokens, signed and checked with the standard library
+TokenClaims = namedtuple("TokenClaims", ["user_id", "role", "company_id", "expires_at"])
+
+
+class InvalidToken(Exception):
+    pass
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def _b64decode(segment):
+    return base64.urlsafe_b64decode(segment + b"=" * (-len(segment) % 4))
+
+
+# Key id -> HMAC already keyed with its secret; signing copies it instead of keying a new one
+@lru_cache(maxsize=None)
+def _signing_keys():
+    return {
+        key_id: hmac.new(secret.encode(), digestmod=hashlib.sha256)
+        for key_id, secret in settings.JWT_SIGNING_KEYS.items()
+    }
+
+
+def _signature(key_id, signing_input):
+    mac = _signing_keys()[key_id].copy()
+    mac.update(signing_input)
+    return mac.digest()
+
+
+def issue_token(user_id, role, company_id):
+    now = int(time.time())
+    key_id = settings.JWT_ACTIVE_KEY_ID
+    header = {"alg": "HS256", "typ": "JWT", "kid": key_id}
+    claims = {"sub": str(user_id), "role": role, "company_id": company_id, "iat": now, "exp": now + settings.JWT_TTL}
+    signing_input = _b64encode(dumps(header)) + b"." + _b64encode(dumps(claims))
+    return (signing_input + b"." + _b64encode(_signature(key_id, signing_input))).decode()
+
+
+# Recently verified tokens are remembered, so a client's repeated calls skip decoding and the
+# signature check; failures raise and are never cached. Expiry is still checked on every use.
+@lru_cache(maxsize=settings.JWT_VERIFIED_CACHE_SIZE)
+def _verified_claims(token):
+    try:
+        header_segment, claims_segment, signature_segment = token.encode("ascii").split(b".")
+        header = loads(_b64decode(header_segment))
+        key_id = header.get("kid") if isinstance(header, dict) and header.get("alg") == "HS256" else None
+        if key_id not in _signing_keys():
+            raise InvalidToken("Unsupported token algorithm or key")
+        signing_input = header_segment + b"." + claims_segment
+        if not hmac.compare_digest(_signature(key_id, signing_input), _b64decode(signature_segment)):
+            raise InvalidToken("Invalid token signature")
+        claims = loads(_b64decode(claims_segment))
+        return TokenClaims(int(claims["sub"]), claims["role"], claims["company_id"], int(claims["exp"]))
+    except (ValueError, TypeError, KeyError, AttributeError):
+        raise InvalidToken("Malformed token")
+
+
+def verify_token(token):
+    claims = _verified_claims(token)
+    if claims.expires_at <= time.time():
+        raise InvalidToken("Token has expired")
+    return claims
+
+
+# Views behind this need a valid bearer token (checked by JWTAuthenticationMiddleware), and one of
+# `roles` if given; the role comes from the token, so the check costs no query
+def jwt_required(*roles):
+    def check(request):
+        if request.claims is None:
+            return JsonResponse(
+                {"error": "Authentication required"}, status=401, headers={"WWW-Authenticate": "Bearer"}
+            )
+        if roles and request.claims.role not in roles:
+            return JsonResponse({"error": "Permission denied"}, status=403)
+        return None
+
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def wrapper(request, *args, **kwargs):
+                return check(request) or await view(request, *args, **kwargs)
+        else:
+            @wraps(view)
+            def wrapper(request, *args, **kwargs):
+                return check(request) or view(request, *args, **kwargs)
+        return wrapper
+
+    return decorator
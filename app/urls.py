@@ -1,9 +1,70 @@
+from django.conf import settings
 from django.urls import path
-from .views import create_address, address_functionality, get_all_addresses
+from .views import (
+    acreate_address,
+    aaddress_functionality,
+    aget_all_addresses,
+    asignin,
+    asignup,
+    create_address,
+    address_functionality,
+    get_all_addresses,
+    bulk_addresses,
+    cache_stats,
+    health,
+    health_ready,
+    metrics,
+    get_all_customers,
+    get_customer,
+    create_order,
+    get_all_orders,
+    get_order,
+    order_status,
+    claim_pending_orders,
+    export_orders,
+    changes,
+    compliance_sweep,
+    sales_report,
+    search,
+    signin,
+    signup,
+    current_user,
+    get_company,
+    upload_company_image,
+    media,
+)
+
+# Under ASGI the address and sign-in endpoints are served by their async variants
+if settings.ASYNC_VIEWS:
+    create_address, address_functionality, get_all_addresses = acreate_address, aaddress_functionality, aget_all_addresses
+    signup, signin = asignup, asignin
 
 urlpatterns = [
     path('api/address/', create_address, name='create_address'),
     path('api/address/<int:address_id>/', address_functionality, name='get_address'),
     path('api/addresses/', get_all_addresses, name='get_all_addresses'),
+    path('api/addresses/bulk/', bulk_addresses, name='bulk_addresses'),
+    path('api/cache/stats/', cache_stats, name='cache_stats'),
+    path('health', health, name='health'),
+    path('health/ready', health_ready, name='health_ready'),
+    path('metrics', metrics, name='metrics'),
+    path('api/customers/', get_all_customers, name='get_all_customers'),
+    path('api/customers/<int:customer_id>/', get_customer, name='get_customer'),
+    path('api/order/', create_order, name='create_order'),
+    path('api/orders/', get_all_orders, name='get_all_orders'),
+    path('api/orders/<int:order_id>/', get_order, name='get_order'),
+    path('api/orders/<int:order_id>/status/', order_status, name='order_status'),
+    path('api/orders/claim/', claim_pending_orders, name='claim_pending_orders'),
+    path('api/orders/export/', export_orders, name='export_orders'),
+    path('api/changes', changes, name='changes'),
+    path('api/compliance/sweep/', compliance_sweep, name='compliance_sweep'),
+    path('api/reports/sales/', sales_report, name='sales_report'),
+    path('api/search/', search, name='search'),
+    path('api/users/signup/', signup, name='signup'),
+    path('api/users/signin/', signin, name='signin'),
+    path('api/users/me/', current_user, name='current_user'),
+    path('api/companies/<int:company_id>/', get_company, name='get_company'),
+    path('api/companies/<int:company_id>/image/', upload_company_image, name='upload_company_image'),
+    path(f"{settings.MEDIA_URL.strip('/')}/<path:path>", media, name='media'),
 ]
 
@@ -1,13 +1,65 @@
+import hashlib
 import json
-from django.http import JsonResponse
+import re
+import time
+from datetime import date
+from decimal import Decimal
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.contrib.auth.password_validation import validate_password
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, transaction
+from django.http import HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import parse_etags
 from django.views.decorators.csrf import csrf_exempt
-from .models import Address
+from django.views.static import serve
+from .accounts import SIGNIN_BY_IP, SIGNIN_BY_USERNAME, SIGNUP_BY_IP, PasswordHashingBusy
+from .accounts import ahash_password, averify_password, hash_password, verify_password
+from .cache import acached_address, acached_address_page, ainvalidate_address
+from .cache import cached_address, cached_address_page, invalidate_address, invalidate_address_list
+from .cache import stats as address_cache_stats
+from .changes import CHANGE_FEED_BATCH_SIZE, CHANGE_FIELDS, change_rows
+from .compliance import SWEEP_FORMATS, SWEEP_REASONS, render as render_sweep, sweep
+from .exports import EXPORT_FORMATS, export_orders as export_order_rows, month_range
+from .health import readiness
+from .images import InvalidImage, image_urls, is_variant, set_company_image
+from .metrics import expose as expose_metrics
+from .models import Address, Company, Customer, Order, OrderItem, User
+from .serializers import ADDRESS, CUSTOMER, ORDER, ORDER_ITEM, JsonResponse, dumps, encode_rows, loads
+from .ratelimit import client_ip
+from .rollups import ROLLUP_DIMENSIONS, sales_report as rollup_sales_report
+from .search import SEARCH_TARGETS, search as search_records
+from .services import IllegalTransition, InsufficientInventory, claim_orders, place_order, transition_order
+from .tokens import issue_token, jwt_required
+
+ADDRESS_WRITABLE_FIELDS = ADDRESS.keys[1:]
+ADDRESS_MAX_LENGTHS = {name: Address._meta.get_field(name).max_length for name in ADDRESS_WRITABLE_FIELDS}
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_CHUNK_SIZE = 2000
+STREAM_CONTENT_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "json": "application/json",
+    "csv": "text/csv",
+}
+BULK_ACTIONS = ("create", "update", "delete")
+BULK_BATCH_SIZE = 1000
+MAX_BULK_ITEMS = 50000
+CENTS = Decimal("0.01")
+CUSTOMER_ADDRESS_FIELDS = ("address", "billing_address", "shipping_address")
+DEFAULT_SUGGESTIONS = 10
+MAX_SUGGESTIONS = 50
+MAX_QUERY_LENGTH = 100
+ACCEPTS_GZIP = re.compile(r"\bgzip\b")
+DEFAULT_CHANGES = 10000
+MAX_CHANGES = 100000
+
 
 @csrf_exempt
 def create_address(request):
     if request.method == "POST":
         try:
-            data = json.loads(request.body)
+            data = loads(request.body)
             address = Address.objects.create(
                 street=data.get("street"),
                 city=data.get("city"),
@@ -19,66 +71,999 @@ def create_address(request):
         except Exception as e:
             return JsonResponse({"error": str(e)}, status=400)
 
+    else:
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+
+
+# Strong validator over the serialized address, used for ETag / If-Match / If-None-Match
+def _address_etag(address):
+    payload = json.dumps([address[name] for name in ADDRESS.keys]).encode()
+    return '"%s"' % hashlib.md5(payload, usedforsecurity=False).hexdigest()
+
+
+def _etag_matches(etag, header):
+    etags = parse_etags(header)
+    return "*" in etags or etag in etags
+
 
 @csrf_exempt
 def address_functionality(request, address_id):
     if request.method == "GET":
-        try:
-            address = Address.objects.get(id=address_id)
-            return JsonResponse({
-                "id": address.id,
-                "street": address.street,
-                "city": address.city,
-                "state": address.state,
-                "country": address.country,
-                "postal_code": address.postal_code,
-            }, status=200)
-        except Address.DoesNotExist:
-            return JsonResponse({"error": "Address not found"}, status=404)
-    
-    elif request.method == "PUT":
-        try:
-            data = json.loads(request.body)
-            address = Address.objects.get(id=address_id)
-            address.street = data.get("street", address.street)
-            address.city = data.get("city", address.city)
-            address.state = data.get("state", address.state)
-            address.country = data.get("country", address.country)
-            address.postal_code = data.get("postal_code", address.postal_code)
-            address.save()
-            return JsonResponse({"message": "Address updated successfully!"}, status=200)
-        except Address.DoesNotExist:
+        address = cached_address(
+            address_id,
+            lambda: next(ADDRESS.rows(Address.objects.filter(id=address_id)), None),
+        )
+        if address is None:
             return JsonResponse({"error": "Address not found"}, status=404)
+        etag = _address_etag(address)
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match is not None and _etag_matches(etag, if_none_match):
+            return HttpResponseNotModified(headers={"ETag": etag})
+        return JsonResponse(address, status=200, headers={"ETag": etag})
+
+    elif request.method in ("PUT", "PATCH"):
+        try:
+            data = loads(request.body)
+            if not isinstance(data, dict):
+                raise ValueError("Expected a JSON object")
+            changes = {name: data[name] for name in ADDRESS_WRITABLE_FIELDS if name in data}
+
+            # Without a precondition only the supplied columns are written, in a single UPDATE
+            if_match = request.headers.get("If-Match")
+            if if_match is None:
+                if changes:
+                    found = Address.objects.filter(id=address_id).update(**changes)
+                else:
+                    found = Address.objects.filter(id=address_id).exists()
+                if not found:
+                    return JsonResponse({"error": "Address not found"}, status=404)
+                if changes:
+                    invalidate_address(address_id)
+                return JsonResponse({"message": "Address updated successfully!"}, status=200)
+
+            current = next(ADDRESS.rows(Address.objects.filter(id=address_id)), None)
+            if current is None:
+                return JsonResponse({"error": "Address not found"}, status=404)
+            etag = _address_etag(current)
+            if not _etag_matches(etag, if_match):
+                return JsonResponse({"error": "Address has been modified"}, status=412, headers={"ETag": etag})
+
+            changes = {name: value for name, value in changes.items() if current[name] != value}
+            if not changes:
+                return JsonResponse({"message": "Address unchanged"}, status=200, headers={"ETag": etag})
+
+            # Matching on every read column makes the write fail if the row changed since it was read
+            if not Address.objects.filter(**current).update(**changes):
+                return JsonResponse({"error": "Address has been modified"}, status=412)
+            invalidate_address(address_id)
+            return JsonResponse(
+                {"message": "Address updated successfully!"},
+                status=200,
+                headers={"ETag": _address_etag({**current, **changes})},
+            )
         except Exception as e:
             return JsonResponse({"error": str(e)}, status=400)
-    
+
     elif request.method == "DELETE":
-        try:
-            address = Address.objects.get(id=address_id)
-            address.delete()
-            return JsonResponse({"message": f"Address with ID {address_id} deleted successfully!"}, status=200)
-        except Address.DoesNotExist:
+        addresses = Address.objects.filter(id=address_id)
+        if_match = request.headers.get("If-Match")
+        conditional = if_match is not None and parse_etags(if_match) != ["*"]
+        if conditional:
+            current = next(ADDRESS.rows(addresses), None)
+            if current is None:
+                return JsonResponse({"error": f"Address with ID {address_id} not found"}, status=404)
+            if not _etag_matches(_address_etag(current), if_match):
+                return JsonResponse({"error": "Address has been modified"}, status=412)
+            addresses = Address.objects.filter(**current)
+
+        _, deleted = addresses.delete()
+        if not deleted.get(Address._meta.label):
+            if conditional:
+                return JsonResponse({"error": "Address has been modified"}, status=412)
             return JsonResponse({"error": f"Address with ID {address_id} not found"}, status=404)
-    
+        return JsonResponse({"message": f"Address with ID {address_id} deleted successfully!"}, status=200)
+
     else:
         return JsonResponse({"error": "Method not allowed"}, status=405)
 
 
+# Address streams are written as NDJSON lines or as one JSON document, a batch of rows per chunk,
+# so neither the rows nor the encoded body are ever held in memory as a whole.
+def _encode_address_batch(batch, stream_format, first):
+    if stream_format == "ndjson":
+        return b"".join(dumps(row) + b"\n" for row in batch)
+    return (b"" if first else b",") + b",".join(dumps(row) for row in batch)
+
+
+def _stream_addresses(queryset, stream_format):
+    if stream_format == "json":
+        yield b'{"addresses":['
+
+    batch, first = [], True
+    for row in ADDRESS.rows(queryset, chunk_size=STREAM_CHUNK_SIZE):
+        batch.append(row)
+        if len(batch) == STREAM_CHUNK_SIZE:
+            yield _encode_address_batch(batch, stream_format, first)
+            batch, first = [], False
+    if batch:
+        yield _encode_address_batch(batch, stream_format, first)
+
+    if stream_format == "json":
+        yield b"]}"
+
+
+async def _astream_addresses(queryset, stream_format):
+    if stream_format == "json":
+        yield b'{"addresses":['
+
+    batch, first = [], True
+    async for row in ADDRESS.arows(queryset, chunk_size=STREAM_CHUNK_SIZE):
+        batch.append(row)
+        if len(batch) == STREAM_CHUNK_SIZE:
+            yield _encode_address_batch(batch, stream_format, first)
+            batch, first = [], False
+    if batch:
+        yield _encode_address_batch(batch, stream_format, first)
+
+    if stream_format == "json":
+        yield b"]}"
+
+
+def _page_params(request):
+    try:
+        after = int(request.GET.get("after", 0))
+        limit = int(request.GET.get("limit", DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ValueError("'after' and 'limit' must be integers")
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"'limit' must be between 1 and {MAX_PAGE_SIZE}")
+    return after, limit
 
 
 @csrf_exempt
 def get_all_addresses(request):
     if request.method == "GET":
-        addresses = Address.objects.all()
-        address_list = [
-            {
-                "id": address.id,
-                "street": address.street,
-                "city": address.city,
-                "state": address.state,
-                "country": address.country,
-                "postal_code": address.postal_code,
-            }
-            for address in addresses
-        ]
-        return JsonResponse({"addresses": address_list}, status=200)
+        try:
+            after, limit = _page_params(request)
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+
+        addresses = Address.objects.filter(id__gt=after).order_by("id")
+
+        stream_format = request.GET.get("stream")
+        if stream_format is not None:
+            if stream_format not in ("ndjson", "json"):
+                return JsonResponse({"error": f"Unsupported stream format '{stream_format}'"}, status=400)
+            return StreamingHttpResponse(
+                _stream_addresses(addresses, stream_format),
+                content_type=STREAM_CONTENT_TYPES[stream_format],
+            )
+
+        # Fetch one extra row to know whether another page follows without a COUNT query
+        def load_page():
+            address_list = list(ADDRESS.rows(addresses, limit=limit + 1))
+            next_after = address_list[limit - 1]["id"] if len(address_list) > limit else None
+            return {"addresses": address_list[:limit], "next": next_after}
+
+        return JsonResponse(cached_address_page(after, limit, load_page), status=200)
+
+    else:
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+
+
+
+# Async variants of the address views, routed instead of the sync ones under ASGI (settings.ASYNC_VIEWS).
+# They keep the same behaviour but await the async ORM and cache APIs, so no worker thread is held per request.
+@csrf_exempt
+async def acreate_address(request):
+    if request.method == "POST":
+        try:
+            data = loads(request.body)
+            address = await Address.objects.acreate(
+                street=data.get("street"),
+                city=data.get("city"),
+                state=data.get("state"),
+                country=data.get("country"),
+                postal_code=data.get("postal_code"),
+            )
+            return JsonResponse({"id": address.id, "message": "Address created successfully!"}, status=201)
+        except Exception as e:
+            return JsonResponse({"error": str(e)}, status=400)
+
+    else:
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+
+
+@csrf_exempt
+async def aaddress_functionality(request, address_id):
+    if request.method == "GET":
+        address = await acached_address(
+            address_id,
+            lambda: ADDRESS.afirst(Address.objects.filter(id=address_id)),
+        )
+        if address is None:
+            return JsonResponse({"error": "Address not found"}, status=404)
+        etag = _address_etag(address)
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match is not None and _etag_matches(etag, if_none_match):
+            return HttpResponseNotModified(headers={"ETag": etag})
+        return JsonResponse(address, status=200, headers={"ETag": etag})
+
+    elif request.method in ("PUT", "PATCH"):
+        try:
+            data = loads(request.body)
+            if not isinstance(data, dict):
+                raise ValueError("Expected a JSON object")
+            changes = {name: data[name] for name in ADDRESS_WRITABLE_FIELDS if name in data}
+
+            if_match = request.headers.get("If-Match")
+            if if_match is None:
+                if changes:
+                    found = await Address.objects.filter(id=address_id).aupdate(**changes)
+                else:
+                    found = await Address.objects.filter(id=address_id).aexists()
+                if not found:
+                    return JsonResponse({"error": "Address not found"}, status=404)
+                if changes:
+                    await ainvalidate_address(address_id)
+                return JsonResponse({"message": "Address updated successfully!"}, status=200)
+
+            current = await ADDRESS.afirst(Address.objects.filter(id=address_id))
+            if current is None:
+                return JsonResponse({"error": "Address not found"}, status=404)
+            etag = _address_etag(current)
+            if not _etag_matches(etag, if_match):
+                return JsonResponse({"error": "Address has been modified"}, status=412, headers={"ETag": etag})
+
+            changes = {name: value for name, value in changes.items() if current[name] != value}
+            if not changes:
+                return JsonResponse({"message": "Address unchanged"}, status=200, headers={"ETag": etag})
+
+            if not await Address.objects.filter(**current).aupdate(**changes):
+                return JsonResponse({"error": "Address has been modified"}, status=412)
+            await ainvalidate_address(address_id)
+            return JsonResponse(
+                {"message": "Address updated successfully!"},
+                status=200,
+                headers={"ETag": _address_etag({**current, **changes})},
+            )
+        except Exception as e:
+            return JsonResponse({"error": str(e)}, status=400)
+
+    elif request.method == "DELETE":
+        addresses = Address.objects.filter(id=address_id)
+        if_match = request.headers.get("If-Match")
+        conditional = if_match is not None and parse_etags(if_match) != ["*"]
+        if conditional:
+            current = await ADDRESS.afirst(addresses)
+            if current is None:
+                return JsonResponse({"error": f"Address with ID {address_id} not found"}, status=404)
+            if not _etag_matches(_address_etag(current), if_match):
+                return JsonResponse({"error": "Address has been modified"}, status=412)
+            addresses = Address.objects.filter(**current)
+
+        _, deleted = await addresses.adelete()
+        if not deleted.get(Address._meta.label):
+            if conditional:
+                return JsonResponse({"error": "Address has been modified"}, status=412)
+            return JsonResponse({"error": f"Address with ID {address_id} not found"}, status=404)
+        await ainvalidate_address(address_id)
+        return JsonResponse({"message": f"Address with ID {address_id} deleted successfully!"}, status=200)
+
+    else:
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+
+
+@csrf_exempt
+async def aget_all_addresses(request):
+    if request.method == "GET":
+        try:
+            after, limit = _page_params(request)
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+
+        addresses = Address.objects.filter(id__gt=after).order_by("id")
+
+        stream_format = request.GET.get("stream")
+        if stream_format is not None:
+            if stream_format not in ("ndjson", "json"):
+                return JsonResponse({"error": f"Unsupported stream format '{stream_format}'"}, status=400)
+            return StreamingHttpResponse(
+                _astream_addresses(addresses, stream_format),
+                content_type=STREAM_CONTENT_TYPES[stream_format],
+            )
+
+        async def load_page():
+            address_list = [row async for row in ADDRESS.arows(addresses, limit=limit + 1)]
+            next_after = address_list[limit - 1]["id"] if len(address_list) > limit else None
+            return {"addresses": address_list[:limit], "next": next_after}
+
+        return JsonResponse(await acached_address_page(after, limit, load_page), status=200)
+
+    else:
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+
+
+# Parse a JSON array body, or one JSON object per line when the body is NDJSON.
+# Lines that fail to parse are kept as exceptions so they can be reported per item.
+def _parse_bulk_body(request):
+    body = request.body.strip()
+    if request.content_type != "application/x-ndjson" and body.startswith(b"["):
+        items = loads(body)
+        if not isinstance(items, list):
+            raise ValueError("Expected a JSON array of items")
+        return items
+
+    items = []
+    for line in body.splitlines():
+        if not line.strip():
+            continue
+        try:
+            items.append(loads(line))
+        except ValueError as e:
+            items.append(e)
+    return items
+
+
+def _validate_bulk_item(item):
+    if isinstance(item, Exception):
+        raise ValueError(f"Invalid JSON: {item}")
+    if not isinstance(item, dict):
+        raise ValueError("Item must be a JSON object")
+
+    action = item.get("action", "update" if "id" in item else "create")
+    if action not in BULK_ACTIONS:
+        raise ValueError(f"Unknown action '{action}'")
+
+    fields = {name: item[name] for name in ADDRESS_WRITABLE_FIELDS if name in item}
+    for name, value in fields.items():
+        if not isinstance(value, str):
+            raise ValueError(f"'{name}' must be a string")
+        # Checked here so one over-long value fails its own item, not the whole batch's transaction
+        if len(value) > ADDRESS_MAX_LENGTHS[name]:
+            raise ValueError(f"'{name}' must be at most {ADDRESS_MAX_LENGTHS[name]} characters")
+
+    if action == "create":
+        missing = [name for name in ADDRESS_WRITABLE_FIELDS if name not in fields]
+        if missing:
+            raise ValueError(f"Missing fields: {', '.join(missing)}")
+        return action, None, fields
+
+    if not isinstance(item.get("id"), int) or isinstance(item.get("id"), bool):
+        raise ValueError("'id' must be an integer")
+    return action, item["id"], fields
+
+
+def _apply_bulk(creates, updates, deletes, results):
+    created = Address.objects.bulk_create([Address(**fields) for _, fields in creates], batch_size=BULK_BATCH_SIZE)
+    for (index, _), address in zip(creates, created):
+        results[index] = {"index": index, "id": address.id, "status": 201}
+    if created:
+        invalidate_address_list()
+
+    existing = Address.objects.in_bulk(list(updates)) if updates else {}
+    changed_fields = set()
+    for address_id, entries in updates.items():
+        address = existing.get(address_id)
+        for index, fields in entries:
+            if address is None:
+                results[index] = {"index": index, "id": address_id, "status": 404, "error": "Address not found"}
+                continue
+            for name, value in fields.items():
+                setattr(address, name, value)
+            changed_fields.update(fields)
+            results[index] = {"index": index, "id": address_id, "status": 200}
+    if changed_fields:
+        Address.objects.bulk_update(
+            [existing[address_id] for address_id in updates if address_id in existing],
+            sorted(changed_fields),
+            batch_size=BULK_BATCH_SIZE,
+        )
+        invalidate_address(*(address_id for address_id in updates if address_id in existing))
+
+    found = set(Address.objects.filter(id__in=list(deletes)).values_list("id", flat=True)) if deletes else set()
+    if found:
+        Address.objects.filter(id__in=found).delete()
+    for address_id, indexes in deletes.items():
+        for index in indexes:
+            if address_id in found:
+                results[index] = {"index": index, "id": address_id, "status": 200}
+            else:
+                results[index] = {"index": index, "id": address_id, "status": 404, "error": "Address not found"}
+
+    return {
+        "created": len(created),
+        "updated": sum(1 for entries in updates.values() for index, _ in entries if results[index]["status"] == 200),
+        "deleted": len(found),
+    }
+
+
+@csrf_exempt
+def bulk_addresses(request):
+    if request.method == "POST":
+        started = time.perf_counter()
+        try:
+            items = _parse_bulk_body(request)
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+        if len(items) > MAX_BULK_ITEMS:
+            return JsonResponse({"error": f"A batch may contain at most {MAX_BULK_ITEMS} items"}, status=400)
+
+        results = [None] * len(items)
+        creates, updates, deletes = [], {}, {}
+        for index, item in enumerate(items):
+            try:
+                action, address_id, fields = _validate_bulk_item(item)
+            except ValueError as e:
+                results[index] = {"index": index, "status": 400, "error": str(e)}
+                continue
+            if action == "create":
+                creates.append((index, fields))
+            elif action == "update":
+                updates.setdefault(address_id, []).append((index, fields))
+            else:
+                deletes.setdefault(address_id, []).append(index)
+
+        # Actions are applied grouped (creates, updates, deletes), so an id that is both updated and
+        # deleted would depend on that grouping rather than on the request order; such items fail
+        for address_id in set(updates) & set(deletes):
+            error = f"Address {address_id} is both updated and deleted in this batch"
+            for index in [index for index, _ in updates.pop(address_id)] + deletes.pop(address_id):
+                results[index] = {"index": index, "id": address_id, "status": 409, "error": error}
+
+        try:
+            with transaction.atomic():
+                counts = _apply_bulk(creates, updates, deletes, results)
+        except DatabaseError as e:
+            # The whole batch was rolled back, so every item that got this far failed with it
+            counts = {"created": 0, "updated": 0, "deleted": 0}
+            for index, result in enumerate(results):
+                if result is None or result["status"] < 400:
+                    results[index] = {"index": index, "status": 500, "error": f"Batch rolled back: {e}"}
+
+        return JsonResponse({
+            "results": results,
+            **counts,
+            "failed": sum(1 for result in results if result["status"] >= 400),
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+        }, status=200)
+
+    else:
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+
+
+@csrf_exempt
+def cache_stats(request):
+    if request.method == "GET":
+        return JsonResponse(address_cache_stats(), status=200)
+
+    else:
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+
+
+def health(request):
+    if request.method == "GET":
+        return JsonResponse({"status": "OK"}, status=200)
+
+    else:
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+
+
+def health_ready(request):
+    if request.method == "GET":
+        result = readiness()
+        return JsonResponse(result, status=200 if result["status"] == "OK" else 503)
+
+    else:
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+
+
+def metrics(request):
+    if request.method == "GET":
+        return HttpResponse(expose_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+    else:
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+
+
+
+# Orders with their totals and line counts aggregated in the same query and the customer name joined in,
+# then the items of all of those orders with their product names in one more query, read as plain tuples
+def _serialize_orders(orders, limit=None):
+    order_list = list(ORDER.rows(orders.with_totals().order_by("id"), limit=limit))
+    items_by_order = {order["id"]: [] for order in order_list}
+    for item in ORDER_ITEM.rows(OrderItem.objects.filter(order_id__in=items_by_order).order_by("id")):
+        item["total_price"] = item["quantity"] * item["price_per_unit"]
+        items_by_order[item.pop("order_id")].append(item)
+    for order in order_list:
+        order["computed_total"] = order["computed_total"].quantize(CENTS)
+        order["items"] = items_by_order[order["id"]]
+    return order_list
+
+
+# Customers with their three addresses nested, using one query for the customers and one for every
+# distinct address they reference (customers often share the same address row)
+def _serialize_customers(customers, limit=None):
+    customer_list = list(CUSTOMER.rows(customers.order_by("id"), limit=limit))
+    address_ids = {customer[f"{field}_id"] for customer in customer_list for field in CUSTOMER_ADDRESS_FIELDS}
+    address_ids.discard(None)
+    addresses = {address["id"]: address for address in ADDRESS.rows(Address.objects.filter(id__in=address_ids))}
+    for customer in customer_list:
+        for field in CUSTOMER_ADDRESS_FIELDS:
+            customer[field] = addresses.get(customer.pop(f"{field}_id"))
+    return customer_list
+
+
+@csrf_exempt
+@jwt_required()
+def get_all_customers(request):
+    if request.method == "GET":
+        try:
+            after, limit = _page_params(request)
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+
+        customers = Customer.objects.filter(id__gt=after)
+        if "account_status" in request.GET:
+            customers = customers.filter(account_status=request.GET["account_status"])
+        customer_list = _serialize_customers(customers, limit=limit + 1)
+        next_after = customer_list[limit - 1]["id"] if len(customer_list) > limit else None
+        return JsonResponse({"customers": customer_list[:limit], "next": next_after}, status=200)
+
+    else:
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+
+
+@csrf_exempt
+@jwt_required()
+def get_customer(request, customer_id):
+    if request.method == "GET":
+        customers = _serialize_customers(Customer.objects.filter(id=customer_id))
+        if not customers:
+            return JsonResponse({"error": "Customer not found"}, status=404)
+        return JsonResponse(customers[0], status=200)
+
+    else:
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+
+
+@csrf_exempt
+@jwt_required()
+def create_order(request):
+    if request.method == "POST":
+        try:
+            data = loads(request.body)
+            lines = [
+                (int(item["fire_extinguisher_id"]), int(item["quantity"]), Decimal(str(item["price_per_unit"])))
+                for item in data.get("items", [])
+            ]
+            order = place_order(data.get("customer_id"), lines)
+            return JsonResponse({"id": order.id, "message": "Order created successfully!"}, status=201)
+        except InsufficientInventory as e:
+            return JsonResponse({"error": str(e), "shortages": e.shortages}, status=409)
+        except Customer.DoesNotExist as e:
+            return JsonResponse({"error": str(e)}, status=404)
+        except Exception as e:
+            return JsonResponse({"error": str(e)}, status=400)
+
+    else:
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+
+
+@csrf_exempt
+@jwt_required()
+def get_all_orders(request):
+    if request.method == "GET":
+        try:
+            after, limit = _page_params(request)
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+
+        orders = _serialize_orders(Order.objects.filter(id__gt=after), limit=limit + 1)
+        next_after = orders[limit - 1]["id"] if len(orders) > limit else None
+        return JsonResponse({"orders": orders[:limit], "next": next_after}, status=200)
+
+    else:
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+
+
+@csrf_exempt
+@jwt_required()
+def get_order(request, order_id):
+    if request.method == "GET":
+        orders = _serialize_orders(Order.objects.filter(id=order_id))
+        if not orders:
+            return JsonResponse({"error": "Order not found"}, status=404)
+        return JsonResponse(orders[0], status=200)
+
+    else:
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+
+
+@csrf_exempt
+@jwt_required()
+def order_status(request, order_id):
+    if request.method == "POST":
+        try:
+            data = loads(request.body)
+            previous = transition_order(order_id, data["status"], data.get("expected"))
+            return JsonResponse({"id": order_id, "status": data["status"], "previous": previous}, status=200)
+        except IllegalTransition as e:
+            return JsonResponse({"error": str(e)}, status=409)
+        except Order.DoesNotExist as e:
+            return JsonResponse({"error": str(e)}, status=404)
+        except KeyError as e:
+            return JsonResponse({"error": f"Missing field {e}"}, status=400)
+        except Exception as e:
+            return JsonResponse({"error": str(e)}, status=400)
+
+    else:
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+
+
+# Hand the oldest pending orders to a fulfilment worker; concurrent workers always get disjoint batches
+@csrf_exempt
+@jwt_required()
+def claim_pending_orders(request):
+    if request.method == "POST":
+        try:
+            data = loads(request.body) if request.body else {}
+            worker = str(data["worker"])
+            ids = claim_orders(worker, int(data.get("limit", 10)))
+        except KeyError as e:
+            return JsonResponse({"error": f"Missing field {e}"}, status=400)
+        except (TypeError, ValueError) as e:
+            return JsonResponse({"error": str(e)}, status=400)
+
+        return JsonResponse({"worker": worker, "orders": _serialize_orders(Order.objects.filter(id__in=ids))}, status=200)
+
+    else:
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+
+
+# Incremental sync for downstream consumers: NDJSON change entries after ?since=<seq>, streamed a batch
+# at a time. The feed spans every company, so it is limited to system admins.
+@csrf_exempt
+@jwt_required("System Admin")
+def changes(request):
+    if request.method == "GET":
+        try:
+            since = int(request.GET.get("since", 0))
+            limit = int(request.GET.get("limit", DEFAULT_CHANGES))
+        except ValueError:
+            return JsonResponse({"error": "'since' and 'limit' must be integers"}, status=400)
+        if not 1 <= limit <= MAX_CHANGES:
+            return JsonResponse({"error": f"'limit' must be between 1 and {MAX_CHANGES}"}, status=400)
+
+        return StreamingHttpResponse(
+            encode_rows(change_rows(since, limit), "ndjson", CHANGE_FIELDS, CHANGE_FEED_BATCH_SIZE),
+            content_type=STREAM_CONTENT_TYPES["ndjson"],
+        )
+
+    else:
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+
+
+@csrf_exempt
+@jwt_required()
+def export_orders(request):
+    if request.method == "GET":
+        try:
+            if "month" in request.GET:
+                start, end = month_range(request.GET["month"])
+                label = request.GET["month"]
+            else:
+                start = date.fromisoformat(request.GET["from"]) if "from" in request.GET else None
+                end = date.fromisoformat(request.GET["to"]) if "to" in request.GET else None
+                label = f"{start or 'start'}_{end or 'end'}"
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+        output_format = request.GET.get("format", "csv")
+        if output_format not in EXPORT_FORMATS:
+            return JsonResponse({"error": f"Unsupported format '{output_format}'"}, status=400)
+
+        # Compressed on the fly, chunk by chunk, so the download starts with the first rows
+        compress = bool(ACCEPTS_GZIP.search(request.headers.get("Accept-Encoding", "")))
+        response = StreamingHttpResponse(
+            export_order_rows(start, end, output_format, compress=compress),
+            content_type=STREAM_CONTENT_TYPES[output_format],
+        )
+        response["Content-Disposition"] = f'attachment; filename="orders-{label}.{output_format}"'
+        response["Vary"] = "Accept-Encoding"
+        if compress:
+            response["Content-Encoding"] = "gzip"
+        return response
+
+    else:
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+
+
+@csrf_exempt
+@jwt_required()
+def compliance_sweep(request):
+    if request.method == "GET":
+        try:
+            days = int(request.GET.get("days", 30))
+        except ValueError:
+            return JsonResponse({"error": "'days' must be an integer"}, status=400)
+        reasons = request.GET.getlist("reason") or None
+        if reasons and not set(reasons) <= set(SWEEP_REASONS):
+            return JsonResponse({"error": f"'reason' must be one of {', '.join(SWEEP_REASONS)}"}, status=400)
+        output_format = request.GET.get("format", "ndjson")
+        if output_format not in SWEEP_FORMATS:
+            return JsonResponse({"error": f"Unsupported format '{output_format}'"}, status=400)
+
+        return StreamingHttpResponse(
+            render_sweep(sweep(days, reasons), output_format),
+            content_type=STREAM_CONTENT_TYPES[output_format],
+        )
+
+    else:
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+
+
+@csrf_exempt
+@jwt_required()
+def sales_report(request):
+    if request.method == "GET":
+        try:
+            start = date.fromisoformat(request.GET["from"])
+            end = date.fromisoformat(request.GET["to"])
+            customer_id = int(request.GET["customer_id"]) if "customer_id" in request.GET else None
+        except KeyError as e:
+            return JsonResponse({"error": f"Missing parameter {e}"}, status=400)
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+        group_by = request.GET.getlist("group_by") or ["day"]
+        if not set(group_by) <= set(ROLLUP_DIMENSIONS):
+            return JsonResponse({"error": f"'group_by' must be one of {', '.join(ROLLUP_DIMENSIONS)}"}, status=400)
+
+        rows = rollup_sales_report(start, end, group_by, customer_id)
+        return JsonResponse({"from": start, "to": end, "rows": rows}, status=200)
+
+    else:
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+
+
+@csrf_exempt
+@jwt_required()
+def search(request):
+    if request.method == "GET":
+        query = request.GET.get("q", "").strip()
+        targets = request.GET.getlist("type") or list(SEARCH_TARGETS)
+        try:
+            limit = int(request.GET.get("limit", DEFAULT_SUGGESTIONS))
+        except ValueError:
+            return JsonResponse({"error": "'limit' must be an integer"}, status=400)
+        if not query or len(query) > MAX_QUERY_LENGTH:
+            return JsonResponse({"error": f"'q' must be between 1 and {MAX_QUERY_LENGTH} characters"}, status=400)
+        if not set(targets) <= set(SEARCH_TARGETS):
+            return JsonResponse({"error": f"'type' must be one of {', '.join(SEARCH_TARGETS)}"}, status=400)
+        if not 1 <= limit <= MAX_SUGGESTIONS:
+            return JsonResponse({"error": f"'limit' must be between 1 and {MAX_SUGGESTIONS}"}, status=400)
+
+        return JsonResponse({target: search_records(target, query, limit) for target in targets}, status=200)
+
+    else:
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+
+
+def _credentials(request):
+    data = loads(request.body)
+    if not isinstance(data, dict):
+        raise ValueError("Expected a JSON object")
+    username, password = data.get("username"), data.get("password")
+    if not isinstance(username, str) or not isinstance(password, str) or not username.strip() or not password:
+        raise ValueError("'username' and 'password' are required")
+    return data, username.strip(), password
+
+
+def _validate_signup(data, username, password):
+    validate_email(username)
+    validate_password(password)
+    try:
+        return int(data["company_id"])
+    except (KeyError, TypeError, ValueError):
+        raise ValidationError("'company_id' must be an integer")
+
+
+# Company admins manage their own company only; system admins any company
+def _manages_company(claims, company_id):
+    return claims.role == "System Admin" or claims.company_id == company_id
+
+
+def _too_many_attempts(retry_after):
+    return JsonResponse(
+        {"error": "Too many attempts, try again later"}, status=429, headers={"Retry-After": str(retry_after)}
+    )
+
+
+def _hashing_busy(e):
+    return JsonResponse({"error": str(e)}, status=503, headers={"Retry-After": "1"})
+
+
+# Sign-up and sign-in are throttled before any hashing or database work; the hashing itself runs on
+# the bounded password pool (app/accounts.py). New users are added by an admin of their company.
+@csrf_exempt
+@jwt_required("Company Admin", "System Admin")
+def signup(request):
+    if request.method == "POST":
+        try:
+            data, username, password = _credentials(request)
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+        retry_after = SIGNUP_BY_IP.take(client_ip(request))
+        if retry_after:
+            return _too_many_attempts(retry_after)
+        try:
+            company_id = _validate_signup(data, username, password)
+        except ValidationError as e:
+            return JsonResponse({"error": " ".join(e.messages)}, status=400)
+        if not _manages_company(request.claims, company_id):
+            return JsonResponse({"error": "Permission denied"}, status=403)
+
+        if User.objects.filter(username=username).exists():
+            return JsonResponse({"error": "Username already exists"}, status=409)
+        if not Company.objects.filter(id=company_id).exists():
+            return JsonResponse({"error": "Company not found"}, status=404)
+        try:
+            encoded = hash_password(password)
+        except PasswordHashingBusy as e:
+            return _hashing_busy(e)
+        try:
+            user = User.objects.create(username=username, password=encoded, role="System User", company_id=company_id)
+        except IntegrityError:
+            return JsonResponse({"error": "Username already exists"}, status=409)
+        return JsonResponse({"message": "User registered successfully.", "user_id": user.id}, status=201)
+
+    else:
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+
+
+@csrf_exempt
+def signin(request):
+    if request.method == "POST":
+        try:
+            data, username, password = _credentials(request)
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+        retry_after = SIGNIN_BY_IP.take(client_ip(request)) or SIGNIN_BY_USERNAME.take(username.lower())
+        if retry_after:
+            return _too_many_attempts(retry_after)
+
+        user = User.objects.filter(username=username).values("id", "password", "role", "company_id").first()
+        try:
+            valid = verify_password(password, user["password"] if user else None)
+        except PasswordHashingBusy as e:
+            return _hashing_busy(e)
+        if not valid:
+            return JsonResponse({"error": "Invalid username or password"}, status=401)
+        token = issue_token(user["id"], user["role"], user["company_id"])
+        return JsonResponse({"message": "User authenticated successfully.", "token": token}, status=200)
+
+    else:
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+
+
+@csrf_exempt
+@jwt_required("Company Admin", "System Admin")
+async def asignup(request):
+    if request.method == "POST":
+        try:
+            data, username, password = _credentials(request)
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+        retry_after = await SIGNUP_BY_IP.atake(client_ip(request))
+        if retry_after:
+            return _too_many_attempts(retry_after)
+        try:
+            company_id = _validate_signup(data, username, password)
+        except ValidationError as e:
+            return JsonResponse({"error": " ".join(e.messages)}, status=400)
+        if not _manages_company(request.claims, company_id):
+            return JsonResponse({"error": "Permission denied"}, status=403)
+
+        if await User.objects.filter(username=username).aexists():
+            return JsonResponse({"error": "Username already exists"}, status=409)
+        if not await Company.objects.filter(id=company_id).aexists():
+            return JsonResponse({"error": "Company not found"}, status=404)
+        try:
+            encoded = await ahash_password(password)
+        except PasswordHashingBusy as e:
+            return _hashing_busy(e)
+        try:
+            user = await User.objects.acreate(
+                username=username, password=encoded, role="System User", company_id=company_id
+            )
+        except IntegrityError:
+            return JsonResponse({"error": "Username already exists"}, status=409)
+        return JsonResponse({"message": "User registered successfully.", "user_id": user.id}, status=201)
+
+    else:
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+
+
+@csrf_exempt
+async def asignin(request):
+    if request.method == "POST":
+        try:
+            data, username, password = _credentials(request)
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+        retry_after = await SIGNIN_BY_IP.atake(client_ip(request)) or await SIGNIN_BY_USERNAME.atake(username.lower())
+        if retry_after:
+            return _too_many_attempts(retry_after)
+
+        user = await User.objects.filter(username=username).values("id", "password", "role", "company_id").afirst()
+        try:
+            valid = await averify_password(password, user["password"] if user else None)
+        except PasswordHashingBusy as e:
+            return _hashing_busy(e)
+        if not valid:
+            return JsonResponse({"error": "Invalid username or password"}, status=401)
+        token = issue_token(user["id"], user["role"], user["company_id"])
+        return JsonResponse({"message": "User authenticated successfully.", "token": token}, status=200)
+
+    else:
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+
+
+@csrf_exempt
+@jwt_required()
+def current_user(request):
+    if request.method == "GET":
+        return JsonResponse(request.claims._asdict(), status=200)
+
+    else:
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+
+
+@csrf_exempt
+def get_company(request, company_id):
+    if request.method == "GET":
+        company = (
+            Company.objects.filter(id=company_id)
+            .values("id", "name", "email", "location_id", "image", "image_variants")
+            .first()
+        )
+        if company is None:
+            return JsonResponse({"error": "Company not found"}, status=404)
+        company["image"] = image_urls(company["image"], company.pop("image_variants"))
+        return JsonResponse(company, status=200)
+
+    else:
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+
+
+# The original is streamed to storage in chunks; the resized WebP variants are built in the background
+@csrf_exempt
+@jwt_required("Company Admin", "System Admin")
+def upload_company_image(request, company_id):
+    if request.method == "POST":
+        if not _manages_company(request.claims, company_id):
+            return JsonResponse({"error": "Permission denied"}, status=403)
+        upload = request.FILES.get("image")
+        if upload is None:
+            return JsonResponse({"error": "Missing 'image' file"}, status=400)
+        if not Company.objects.filter(id=company_id).exists():
+            return JsonResponse({"error": "Company not found"}, status=404)
+        try:
+            found = set_company_image(company_id, upload)
+        except InvalidImage as e:
+            return JsonResponse({"error": str(e)}, status=400)
+        if not found:
+            return JsonResponse({"error": "Company not found"}, status=404)
+        return JsonResponse({"message": "Image uploaded, variants are being generated"}, status=202)
+
+    else:
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+
+
+# Media names are content-hashed, so a URL's bytes never change and can be cached for good. Only
+# image variants are served; uploaded originals stay private.
+def media(request, path):
+    if not is_variant(path):
+        return JsonResponse({"error": "Not found"}, status=404)
+    response = serve(request, path, document_root=settings.MEDIA_ROOT)
+    response["Cache-Control"] = "public, max-age=31536000, immutable"
+    return response
@@ -10,12 +10,17 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 
+def env_flag(name, default=False):
+    return os.environ.get(name, str(default)).lower() in ("1", "true", "yes", "on")
+
+
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.1/howto/deployment/checklist/
 
@@ -41,6 +46,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Outermost, so timings cover the whole stack
+    "app.middleware.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -48,6 +55,8 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "app.middleware.JWTAuthenticationMiddleware",
+    "app.middleware.TenantMiddleware",
 ]
 
 ROOT_URLCONF = "fire_safe_pro.urls"
@@ -70,21 +79,133 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "fire_safe_pro.wsgi.application"
 
+# Serve the async view variants; fire_safe_pro/asgi.py turns this on for the ASGI deployment
+ASYNC_VIEWS = env_flag("ASYNC_VIEWS")
+
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
+# DB_ENGINE=sqlite selects the local/benchmark profile on db.sqlite3 (WAL mode, tuned pragmas).
+# On PostgreSQL, connections are kept open for DB_CONN_MAX_AGE seconds and health-checked
+# before reuse; DB_POOL=true switches to a psycopg3 connection pool instead (needs psycopg[pool]).
+
+if os.environ.get("DB_ENGINE", "postgresql") == "sqlite":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.environ.get("SQLITE_PATH", BASE_DIR / "db.sqlite3"),
+            # A file-backed test database keeps WAL and the busy timeout, so threaded tests behave like production
+            "TEST": {"NAME": os.environ.get("SQLITE_TEST_PATH", BASE_DIR / "test_db.sqlite3")},
+            "OPTIONS": {
+                "timeout": int(os.environ.get("SQLITE_TIMEOUT", 20)),
+                "transaction_mode": "IMMEDIATE",
+                "init_command": (
+                    "PRAGMA journal_mode=WAL;"
+                    "PRAGMA synchronous=NORMAL;"
+                    "PRAGMA temp_store=MEMORY;"
+                    "PRAGMA cache_size=-64000;"
+                    "PRAGMA mmap_size=268435456;"
+                ),
+            },
+        }
+    }
+else:
+    DATABASES = {
+        "default": {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'fire_extinguisher'),
+            'USER': os.environ.get('DB_USER', 'admin'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', 'admin'),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+            # Fail fast on an unreachable server instead of blocking requests and health probes
+            'OPTIONS': {'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', 5))},
+        }
+    }
+
+    if env_flag("DB_POOL"):
+        # Pooled connections are handed back to the pool after each request, so Django must not persist them
+        DATABASES["default"]["CONN_MAX_AGE"] = 0
+        DATABASES["default"]["OPTIONS"]["pool"] = {
+            "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", 2)),
+            "max_size": int(os.environ.get("DB_POOL_MAX_SIZE", 20)),
+            "timeout": float(os.environ.get("DB_POOL_TIMEOUT", 10)),
+            "max_idle": float(os.environ.get("DB_POOL_MAX_IDLE", 300)),
+        }
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Per-process LRU by default; set REDIS_URL to share one cache between workers.
+
+CACHES = {
     "default": {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': 'fire_extinguisher',
-        'USER': 'admin',
-        'PASSWORD': 'admin',
-        'HOST': 'localhost',
-        'PORT': '5432',
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "fire-safe-pro",
+        "OPTIONS": {"MAX_ENTRIES": 10000},
     }
 }
 
+if os.environ.get("REDIS_URL"):
+    CACHES["default"] = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.environ["REDIS_URL"],
+    }
+
+ADDRESS_CACHE_TIMEOUT = int(os.environ.get("ADDRESS_CACHE_TIMEOUT", 300))
+
+
+# Request metrics
+# Requests slower than SLOW_REQUEST_MS are logged to the "app.requests" logger together with
+# their first SLOW_REQUEST_SQL_LIMIT SQL statements; histograms are served at /metrics.
+
+SLOW_REQUEST_MS = int(os.environ.get("SLOW_REQUEST_MS", 500))
+SLOW_REQUEST_SQL_LIMIT = int(os.environ.get("SLOW_REQUEST_SQL_LIMIT", 50))
+
+
+# Health checks
+# /health/ready serves the last probe result for HEALTH_CHECK_TTL seconds and refreshes it in the
+# background; it reports unavailable while the connection pool is saturated past HEALTH_POOL_MAX_SATURATION
+# with requests queueing, and once no probe has completed for HEALTH_CHECK_TTL + HEALTH_PROBE_TIMEOUT.
+
+HEALTH_CHECK_TTL = float(os.environ.get("HEALTH_CHECK_TTL", 5))
+HEALTH_PROBE_TIMEOUT = float(os.environ.get("HEALTH_PROBE_TIMEOUT", 2))
+HEALTH_POOL_MAX_SATURATION = float(os.environ.get("HEALTH_POOL_MAX_SATURATION", 0.9))
+
+
+# Sign-in / sign-up
+# Passwords are hashed on PASSWORD_HASH_WORKERS threads with room for PASSWORD_HASH_QUEUE waiting
+# requests; past that, sign-ins get a 503. The token buckets allow BURST attempts at once, refilled
+# at PER_MINUTE attempts a minute, per username and per client IP (the last X-Forwarded-For entry
+# when RATE_LIMIT_TRUST_X_FORWARDED_FOR is set, i.e. behind a proxy that appends it).
+
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+PASSWORD_HASH_QUEUE = int(os.environ.get("PASSWORD_HASH_QUEUE", 32))
+SIGNIN_USERNAME_BURST = int(os.environ.get("SIGNIN_USERNAME_BURST", 5))
+SIGNIN_USERNAME_PER_MINUTE = float(os.environ.get("SIGNIN_USERNAME_PER_MINUTE", 5))
+SIGNIN_IP_BURST = int(os.environ.get("SIGNIN_IP_BURST", 20))
+SIGNIN_IP_PER_MINUTE = float(os.environ.get("SIGNIN_IP_PER_MINUTE", 30))
+SIGNUP_IP_BURST = int(os.environ.get("SIGNUP_IP_BURST", 5))
+SIGNUP_IP_PER_MINUTE = float(os.environ.get("SIGNUP_IP_PER_MINUTE", 5))
+RATE_LIMIT_TRUST_X_FORWARDED_FOR = env_flag("RATE_LIMIT_TRUST_X_FORWARDED_FOR")
+
+
+# JWT authentication
+# Tokens are HS256-signed with the key JWT_ACTIVE_KEY_ID from JWT_SIGNING_KEYS ("kid=secret,kid=secret");
+# keep retired keys listed until the tokens they signed have expired. Defaults to SECRET_KEY.
+
+JWT_SIGNING_KEYS = (
+    dict(entry.split("=", 1) for entry in os.environ["JWT_SIGNING_KEYS"].split(","))
+    if os.environ.get("JWT_SIGNING_KEYS")
+    else {"default": SECRET_KEY}
+)
+JWT_ACTIVE_KEY_ID = os.environ.get("JWT_ACTIVE_KEY_ID", next(iter(JWT_SIGNING_KEYS)))
+JWT_TTL = int(os.environ.get("JWT_TTL", 3600))
+JWT_VERIFIED_CACHE_SIZE = int(os.environ.get("JWT_VERIFIED_CACHE_SIZE", 10000))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -122,6 +243,27 @@ USE_TZ = True
 
 STATIC_URL = "static/"
 
+
+# Uploaded media
+# Company images are stored under content-hashed names and served with a one-year immutable
+# Cache-Control; originals are never returned by the API or served under MEDIA_URL, only the
+# COMPANY_IMAGE_VARIANTS (name -> bounding box in pixels) that IMAGE_WORKERS background threads
+# render as WebP. A front-end server publishing MEDIA_ROOT directly must do the same.
+
+MEDIA_URL = "media/"
+MEDIA_ROOT = os.environ.get("MEDIA_ROOT", BASE_DIR / "media")
+COMPANY_IMAGE_MAX_BYTES = int(os.environ.get("COMPANY_IMAGE_MAX_BYTES", 10 * 1024 * 1024))
+COMPANY_IMAGE_VARIANTS = {"thumbnail": 128, "small": 320, "large": 1024}
+COMPANY_IMAGE_QUALITY = int(os.environ.get("COMPANY_IMAGE_QUALITY", 80))
+IMAGE_WORKERS = int(os.environ.get("IMAGE_WORKERS", 2))
+
+# Compliance
+# inspection_date and service_date record the last one done; the next falls due this many months later.
+# The due dates are indexed as expressions over these values, so changing one needs a new migration.
+
+INSPECTION_INTERVAL_MONTHS = 12
+SERVICE_INTERVAL_MONTHS = 60
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 